@@ -1,14 +1,10 @@
+import contextlib
+import functools
 import json
-import os
-import re
 import time
-from os.path import join
-from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 import dash
-import plotly.graph_objects as go
-from cryptography.fernet import Fernet as F
 from dash import dcc, html
 from dash.dependencies import Input, Output, State
 from dash_extensions.enrich import MultiplexerTransform, TriggerTransform, DashProxy
@@ -16,52 +12,47 @@ from dash_extensions.enrich import MultiplexerTransform, TriggerTransform, DashP
 from algorithmics.assets.generate_scatter import generate_path_scatters, generate_graph_scatter, \
     generate_all_scenario_scatters, \
     generate_graph_layout
-from algorithmics.enemy.asteroids_zone import AsteroidsZone
-from algorithmics.enemy.black_hole import BlackHole
-from algorithmics.enemy.enemy import Enemy
-from algorithmics.enemy.radar import Radar
-from algorithmics.navigator import calculate_path
+from algorithmics.navigator import calculate_path, calculate_path_anytime
+from algorithmics.utils import profiling, jobs
+from algorithmics.utils.constrained_search import EXPOSURE_TOLERANCE
 from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.create_graph import get_detected_segments
+from algorithmics.utils.graph_cache import GraphCache, scenario_key
+from algorithmics.utils.jobs import Job, JobManager
+from algorithmics.utils.scenario_cache import ScenarioCache, CachedScenario
+from algorithmics.utils.scenario_loader import list_scenario_groups, load_scenario_names, scenario_number
 
 KEY = b'nNjpIl9Ax2LRtm-p6ryCRZ8lRsL0DtuY0f9JeAe2wG0='
 
 
-def _extract_scenario_number_from_path(path: str) -> int:
-    """Extract the number of a scenario given its name in the file system
+@functools.lru_cache(maxsize=None)
+def _scenario_groups() -> Dict[str, List[str]]:
+    """Scenario files of every group, looked up next to the package on first use rather than on import"""
+    return {group: [str(path) for path in paths] for group, paths in list_scenario_groups().items()}
 
-    For example, the file
-        ../resources/scenarios/scenario_5.json
 
-    Will be converted into the integer 5.
+@functools.lru_cache(maxsize=None)
+def _scenario_names() -> Dict[int, str]:
+    return load_scenario_names()
 
-    :param path: path to scenario's JSON in the file system
-    :return: scenario's number
-    """
-    return int(re.match(r'.*scenario_(\d+)\.json', path).group(1))
-
-
-scenario_groups = os.listdir(Path('../resources/scenarios'))
-
-scenario_paths = {group: sorted(os.listdir(join(Path('../resources/scenarios'), group)),
-                                key=lambda path: _extract_scenario_number_from_path(path))
-                  for group in scenario_groups}
-
-for group, files in scenario_paths.items():
-    scenario_paths[group] = [join(Path('../resources/scenarios'), group, f) for f in files]
-
-scenario_groups = sorted(scenario_groups,
-                         key=lambda group: _extract_scenario_number_from_path(scenario_paths[group][0]))
 
+def _generate_scenario_label(path: str) -> str:
+    number = scenario_number(path)
+    return f'Scenario #{number} - {_scenario_names()[number]}'
 
-with open('../resources/scenario_names.json', 'r') as f:
-    scenario_names = json.load(f)
-    scenario_names = {int(number): name for number, name in scenario_names.items()}
 
+def _generate_static_traces(source: Coordinate, targets: List[Coordinate], enemies) -> List[dict]:
+    # Plain dictionaries can be handed to the figure as is, without validating the traces again on every redraw
+    return [scatter.to_plotly_json() for scatter in generate_all_scenario_scatters(source, targets, enemies)]
 
-def _generate_scenario_label(path: str) -> str:
-    scenario_number = _extract_scenario_number_from_path(path)
-    return f'Scenario #{scenario_number} - {scenario_names[scenario_number]}'
 
+# Parsed scenarios and their enemy traces, shared by all callbacks
+scenario_cache = ScenarioCache(build_traces=_generate_static_traces)
+# Graphs of scenarios planned before, kept across app restarts
+graph_cache = GraphCache()
+# Plans scenarios in the background, so slow ones don't hold a request worker
+planning_jobs = JobManager()
+graph_layout = generate_graph_layout().to_plotly_json()
 
 colors = {
     'background': '#111111',
@@ -72,70 +63,113 @@ colors = {
 app = DashProxy(__name__, transforms=[TriggerTransform(), MultiplexerTransform()],
                 external_stylesheets=[r'./assets/bWLwgP.css'])
 
-app.layout = html.Div([
-    html.H1('Lost in deep space: Run your algorithm', style={'text-align': 'center', 'font-family': 'Courier New',
-                                                             'font-weight': 'bold', 'font-size': '30px',
-                                                             'color': colors['h1']}),
-    html.Div(children=[
-        dcc.Dropdown(id='scenario-group-dropdown',
-                     options=[{'label': group, 'value': group} for group in scenario_groups],
-                     value=scenario_groups[0],
-                     clearable=False,
-                     style={'font-family': 'Courier New', 'font-weight': 'bold', 'color': colors['text'],
-                            'margin-bottom': '10px', 'margin-right': '10px', 'font-size': '16px',
-                            'width': '100%'}),
-        dcc.Dropdown(id='scenario-dropdown',
-                     options=[{'label': _generate_scenario_label(filename),
-                               'value': filename}
-                              for filename in list(scenario_paths.values())[0]],
-                     value=list(scenario_paths.values())[0][0],
-                     clearable=False,
-                     style={'font-family': 'Courier New', 'font-weight': 'bold', 'color': colors['text'],
-                            'margin-bottom': '10px', 'margin-right': '10px', 'font-size': '16px',
-                            'width': '100%'}),
-        html.Button('Run Algorithm!', id='run-button',
-                    style={'color': colors['h1'], 'background-color': 'black'},
-                    )
-    ], style={'display': 'flex'}, className='1 row'),
-    dcc.Graph(
-        id='graph',
-        config={'scrollZoom': True},
-        style={'height': '60vh', 'margin-bottom': '10px'}
-    ),
-    html.Div(
-        children=[
-            dcc.Checklist(id='graph-toggle',
-                          options=[{'label': 'Show Graph', 'value': 'Toggle'}],
-                          value=[],
+
+def _layout() -> html.Div:
+    """Built when a page is served, so scenarios are only looked up once the app runs"""
+    scenario_groups = _scenario_groups()
+    first_group = next(iter(scenario_groups.values()))
+    return html.Div([
+        html.H1('Lost in deep space: Run your algorithm', style={'text-align': 'center', 'font-family': 'Courier New',
+                                                                 'font-weight': 'bold', 'font-size': '30px',
+                                                                 'color': colors['h1']}),
+        html.Div(children=[
+            dcc.Dropdown(id='scenario-group-dropdown',
+                         options=[{'label': group, 'value': group} for group in scenario_groups],
+                         value=next(iter(scenario_groups)),
+                         clearable=False,
+                         style={'font-family': 'Courier New', 'font-weight': 'bold', 'color': colors['text'],
+                                'margin-bottom': '10px', 'margin-right': '10px', 'font-size': '16px',
+                                'width': '100%'}),
+            dcc.Dropdown(id='scenario-dropdown',
+                         options=[{'label': _generate_scenario_label(filename),
+                                   'value': filename}
+                                  for filename in first_group],
+                         value=first_group[0],
+                         clearable=False,
+                         style={'font-family': 'Courier New', 'font-weight': 'bold', 'color': colors['text'],
+                                'margin-bottom': '10px', 'margin-right': '10px', 'font-size': '16px',
+                                'width': '100%'}),
+            html.Button('Run Algorithm!', id='run-button',
+                        style={'color': colors['h1'], 'background-color': 'black'},
+                        ),
+            html.Button('Cancel', id='cancel-button',
+                        style={'color': colors['h1'], 'background-color': 'black', 'margin-left': '10px'},
+                        )
+        ], style={'display': 'flex'}, className='1 row'),
+        dcc.Graph(
+            id='graph',
+            config={'scrollZoom': True},
+            style={'height': '60vh', 'margin-bottom': '10px'}
+        ),
+        html.Div(
+            children=[
+                dcc.Checklist(id='graph-toggle',
+                              options=[{'label': 'Show Graph', 'value': 'Toggle'}],
+                              value=[],
+                              style={'font-family': 'Courier New', 'font-weight': 'bold', 'margin-top': '5px',
+                                     'margin-bottom': '5px', 'color': '#ffffff', 'display': 'inline-block'}),
+                dcc.Checklist(id='profile-toggle',
+                              options=[{'label': 'Profile', 'value': 'Toggle'}],
+                              value=[],
+                              style={'font-family': 'Courier New', 'font-weight': 'bold', 'margin-top': '5px',
+                                     'margin-bottom': '5px', 'margin-left': '10px', 'color': '#ffffff',
+                                     'display': 'inline-block'}),
+                dcc.Input(id='time-budget', type='number', min=0, step=0.1, debounce=True,
+                          placeholder='Time budget [s]',
                           style={'font-family': 'Courier New', 'font-weight': 'bold', 'margin-top': '5px',
-                                 'margin-bottom': '5px', 'color': '#ffffff', 'display': 'inline-block'}),
-            html.Div(id='allowed-detection', children='Allowed detection: 0 miles',
-                     style={'font-family': 'Courier New', 'font-weight': 'bold', 'margin-top': '5px',
-                            'margin-bottom': '5px', 'margin-left': 'auto', 'color': '#e61010',
-                            'display': 'inline-block'}),
-        ],
-        style={'display': 'flex'}
-    ),
-    html.Div('Calculated path:',
-             style={'font-family': 'Courier New', 'font-weight': 'bold', 'margin-top': '5px',
-                    'margin-bottom': '5px', 'color': '#ffffff'}),
-    html.Div(
-        children=[dcc.Textarea(id='calculated-path',
-                               readOnly=True,
-                               style={'font-family': 'Courier New', 'font-weight': 'bold', 'background-color': 'black',
-                                      'color': 'white', 'width': '100%', 'height': '65px', 'display': 'inline-block'}),
-
-                  html.Button('Download', id='download-path-btn',
-                              style={'color': colors['h1'], 'background-color': 'black', 'display': 'inline-block',
-                                     'height': '65px'})
-                  ],
-        style={'display': 'flex'}
-    ),
-    dcc.Store(id='path-store', data=[]),
-    dcc.Store(id='edges-store', data=[]),
-    dcc.Store(id='calculation-time-store', data=0),
-    dcc.Download(id='download')
-], style={'margin-top': '20px', 'margin-left': '10px', 'margin-right': '10px'})
+                                 'margin-bottom': '5px', 'margin-left': '10px', 'background-color': 'black',
+                                 'color': '#ffffff', 'width': '150px'}),
+                html.Div(id='job-status', children='',
+                         style={'font-family': 'Courier New', 'font-weight': 'bold', 'margin-top': '5px',
+                                'margin-bottom': '5px', 'margin-left': '10px', 'color': colors['text'],
+                                'display': 'inline-block'}),
+                html.Div(id='allowed-detection', children='Allowed detection: 0 miles',
+                         style={'font-family': 'Courier New', 'font-weight': 'bold', 'margin-top': '5px',
+                                'margin-bottom': '5px', 'margin-left': 'auto', 'color': '#e61010',
+                                'display': 'inline-block'}),
+            ],
+            style={'display': 'flex'}
+        ),
+        html.Div('Calculated path:',
+                 style={'font-family': 'Courier New', 'font-weight': 'bold', 'margin-top': '5px',
+                        'margin-bottom': '5px', 'color': '#ffffff'}),
+        html.Div(
+            children=[dcc.Textarea(id='calculated-path',
+                                   readOnly=True,
+                                   style={'font-family': 'Courier New', 'font-weight': 'bold',
+                                          'background-color': 'black', 'color': 'white', 'width': '100%',
+                                          'height': '65px', 'display': 'inline-block'}),
+
+                      html.Button('Download', id='download-path-btn',
+                                  style={'color': colors['h1'], 'background-color': 'black', 'display': 'inline-block',
+                                         'height': '65px'})
+                      ],
+            style={'display': 'flex'}
+        ),
+        html.Div(
+            children=[html.Pre(id='profile-breakdown',
+                               style={'font-family': 'Courier New', 'background-color': 'black', 'color': 'white',
+                                      'width': '100%', 'margin': '0px'}),
+                      html.Button('Download profile', id='download-profile-btn',
+                                  style={'color': colors['h1'], 'background-color': 'black', 'display': 'inline-block'})
+                      ],
+            id='profile-panel',
+            style={'display': 'none'}
+        ),
+        dcc.Store(id='path-store', data=[]),
+        # Id of the job whose graph is drawn, the edges themselves stay on the server
+        dcc.Store(id='edges-store', data=None),
+        dcc.Store(id='viewport-store', data=None),
+        dcc.Store(id='calculation-time-store', data=0),
+        dcc.Store(id='profile-store', data=None),
+        dcc.Store(id='job-store', data=None),
+        dcc.Interval(id='job-poll', interval=250, disabled=True),
+        dcc.Download(id='download'),
+        dcc.Download(id='download-profile')
+    ], style={'margin-top': '20px', 'margin-left': '10px', 'margin-right': '10px'})
+
+
+app.layout = _layout
 
 
 @app.callback(Output('calculated-path', 'value'),
@@ -148,36 +182,13 @@ def update_path_text(path: List[Tuple[float, float]]) -> str:
     return ', '.join(coordinates)
 
 
-def _parse_coordinate(values: List[float]) -> Coordinate:
-    return Coordinate(values[0], values[1])
-
-
-def _load_scenario(scenario_path: str) -> Tuple[Coordinate, List[Coordinate], float, List[Enemy]]:
-    with open(scenario_path, 'r') as f:
-        raw_scenario = json.load(f)
-
-    # Parse scenario JSON
-    source = _parse_coordinate(raw_scenario['source'])
-    targets = [_parse_coordinate(target) for target in raw_scenario['targets']]
-    allowed_detection = raw_scenario['allowed-detection']
-    enemies: List[Enemy] = []
-    enemies += [BlackHole(_parse_coordinate(hole['center']), hole['radius'])
-                for hole in raw_scenario['black_holes']]
-    enemies += [AsteroidsZone([_parse_coordinate(c) for c in raw_zone['boundary']])
-                for raw_zone in raw_scenario['asteroids_zones']]
-    enemies += [Radar(_parse_coordinate(raw_radar['center']), raw_radar['radius'])
-                for raw_radar in raw_scenario['radars']]
-
-    return source, targets, allowed_detection, enemies
-
-
 @app.callback(Output('scenario-dropdown', 'options'),
               Output('scenario-dropdown', 'value'),
               Input('scenario-group-dropdown', 'value'),
               prevent_initial_call=True)
 def update_scenario_list(scenario_group) -> Tuple[List, str]:
     options = [{'label': _generate_scenario_label(filename),
-                'value': filename} for filename in scenario_paths[scenario_group]]
+                'value': filename} for filename in _scenario_groups()[scenario_group]]
     return options, options[0]['value']
 
 
@@ -187,46 +198,213 @@ def reset_path_panel(scenario: str) -> Optional[str]:
     return ''
 
 
+def _viewport_from_relayout(relayout: dict) -> Optional[dict]:
+    """Reads the visible ranges out of the graph's relayout event
+
+    :return: `x` and `y` ranges, None for either when it is autoranged
+    """
+    viewport = {}
+    for axis in ('x', 'y'):
+        if relayout.get(f'{axis}axis.autorange'):
+            viewport[axis] = None
+        elif f'{axis}axis.range[0]' in relayout:
+            viewport[axis] = (relayout[f'{axis}axis.range[0]'], relayout[f'{axis}axis.range[1]'])
+        elif f'{axis}axis.range' in relayout:
+            viewport[axis] = tuple(relayout[f'{axis}axis.range'])
+    return viewport or None
+
+
+@app.callback(Output('viewport-store', 'data'),
+              Input('graph', 'relayoutData'),
+              State('viewport-store', 'data'),
+              prevent_initial_call=True)
+def update_viewport(relayout: Optional[dict], viewport: Optional[dict]):
+    changes = _viewport_from_relayout(relayout or {})
+    # Events such as resizing the window don't move the view
+    if changes is None:
+        return dash.no_update
+    return {'x': None, 'y': None, **(viewport or {}), **changes}
+
+
+@app.callback(Output('viewport-store', 'data'),
+              Input('scenario-dropdown', 'value'),
+              prevent_initial_call=True)
+def reset_viewport(scenario: str) -> None:
+    return None
+
+
 @app.callback(Output('graph', 'figure'),
               Output('allowed-detection', 'children'),
               Input('scenario-dropdown', 'value'),
               Input('path-store', 'data'),
               Input('edges-store', 'data'),
-              Input('graph-toggle', 'value'))
-def update_map(scenario_path: str, path: List[Tuple[float, float]],
-               edges: List[Tuple[float, float, float, float]], graph_on: str) -> Tuple[go.Figure, str]:
-    source, targets, allowed_detection, enemies = _load_scenario(scenario_path)
+              Input('graph-toggle', 'value'),
+              Input('viewport-store', 'data'))
+def update_map(scenario_path: str, path: List[Tuple[float, float]], edges_job_id: Optional[int], graph_on: str,
+               viewport: Optional[dict]) -> Tuple[dict, str]:
+    trigger = dash.callback_context.triggered[0]['prop_id'].split('.')[0]
+    # Panning and zooming only change which edges are drawn
+    if trigger == 'viewport-store' and not graph_on:
+        return dash.no_update, dash.no_update
+
+    scenario = scenario_cache.get(scenario_path)
 
     # If only scenario was changed, path and graph are empty
-    if dash.callback_context.triggered[0]['prop_id'].split('.')[0] == 'scenario-dropdown':
+    if trigger == 'scenario-dropdown':
         draw_path, edges_scatter = [], []
 
     # Otherwise, parse path and graph
     else:
         draw_path = [Coordinate(c[0], c[1]) for c in path]
-        edges_scatter = [generate_graph_scatter(edges)] if len(graph_on) > 0 else []
+        job = None if edges_job_id is None or not graph_on else planning_jobs.get(edges_job_id)
+        # The graph of the best path so far while an anytime job runs
+        result = None if job is None else job.result if job.status == Job.DONE else \
+            job.partial if not job.finished else None
+        if result is not None:
+            viewport = viewport or {}
+            edges_scatter = [generate_graph_scatter(result['edges'], x_range=viewport.get('x'),
+                                                    y_range=viewport.get('y'))]
+        else:
+            edges_scatter = []
+
+    detected_segments = get_detected_segments(draw_path, scenario.enemies)
+    data = scenario.traces + [scatter.to_plotly_json() for scatter in
+                              generate_path_scatters(draw_path, color='#cccccc',
+                                                     detected_segments=detected_segments) + edges_scatter]
+    # Keeps the view when redrawing the same scenario
+    layout = {**graph_layout, 'uirevision': scenario_path}
+    detection = sum(start.distance_to(end) for start, end in detected_segments)
+    detection_text = f'Allowed detection: {scenario.allowed_detection} miles'
+    if detection > scenario.allowed_detection + EXPOSURE_TOLERANCE:
+        # Planning is relaxed, when no path fits the least detected one is drawn
+        detection_text += f', exceeded: the path is detected for {detection:.2f} miles'
+    return {'data': data, 'layout': layout}, detection_text
+
+
+def _plan(scenario: CachedScenario, profile_on: bool, time_budget: Optional[float]) -> dict:
+    """Plans a scenario, runs as a background job
+
+    With a time budget, planning is anytime: every better path found is reported as the job's partial result, and
+    the best one found in time is the result.
+
+    :return: everything the stores need, Dash doesn't support custom types so the path is a list of tuples. The
+        edges are drawn from the job's result and never sent as is.
+    """
+    def describe(path: List[Coordinate], graph, profile=None) -> dict:
+        return {'path': [(c.x, c.y) for c in path],
+                'edges': graph.edge_segments(),
+                'calculation_time': time.time() - start_time,
+                'profile': profile and profile.as_dict()}
+
+    with profiling.profiling() if profile_on else contextlib.nullcontext() as profile:
+        start_time = time.time()
+        if time_budget:
+            path, graph = calculate_path_anytime(scenario.source, scenario.targets, scenario.enemies,
+                                                 scenario.allowed_detection, time_budget, cache=graph_cache,
+                                                 on_path=lambda path, graph: jobs.report(describe(path, graph)),
+                                                 relax_detection=True)
+        else:
+            path, graph = calculate_path(scenario.source, scenario.targets, scenario.enemies,
+                                         scenario.allowed_detection, as_networkx=False, cache=graph_cache,
+                                         relax_detection=True)
+    return describe(path, graph, profile)
+
+
+def _describe_job(job: Job) -> str:
+    if job.status == Job.DONE:
+        return f'Done in {job.elapsed:.2f}s' if not job.memoized else 'Done (memoized)'
+    if job.status == Job.FAILED:
+        return f'Failed: {job.error}'
+    if job.status == Job.CANCELLED:
+        return 'Cancelled'
+    if job.status == Job.PENDING:
+        return 'Waiting for a free worker...'
+    if job.partial is not None:
+        return f'{job.stage.capitalize()}... {job.progress:.0%}, best path so far shown'
+    return f'{job.stage.capitalize()}... {job.progress:.0%}'
+
+
+@app.callback(Output('job-store', 'data'),
+              Output('job-poll', 'disabled'),
+              Output('job-status', 'children'),
+              Input('run-button', 'n_clicks'),
+              State('scenario-dropdown', 'value'),
+              State('profile-toggle', 'value'),
+              State('time-budget', 'value'),
+              prevent_initial_call=True)
+def run_button_n_clicks_changed(n_clicks: int, scenario_path: str, profile_on: List[str],
+                                time_budget: Optional[float]) -> Tuple[int, bool, str]:
+    scenario = scenario_cache.get(scenario_path)
+    profile_on = bool(profile_on)
+    time_budget = time_budget or None
 
-    data = generate_all_scenario_scatters(source, targets, enemies) + \
-           generate_path_scatters(draw_path, color='#cccccc') + edges_scatter
-    return go.Figure(data=data, layout=generate_graph_layout()), f'Allowed detection: {allowed_detection} miles'
+    # Equal scenarios share their job while it runs and its result afterwards, whichever file they came from
+    key = (scenario_key(scenario.source, scenario.targets, scenario.enemies,
+                        allowed_detection=scenario.allowed_detection), profile_on, time_budget)
+    job = planning_jobs.submit(key, lambda: _plan(scenario, profile_on, time_budget))
+    return job.id, False, _describe_job(job)
 
 
 @app.callback(Output('path-store', 'data'),
               Output('edges-store', 'data'),
               Output('calculation-time-store', 'data'),
-              Input('run-button', 'n_clicks'),
-              State('scenario-dropdown', 'value'),
+              Output('profile-store', 'data'),
+              Output('job-poll', 'disabled'),
+              Output('job-status', 'children'),
+              Input('job-poll', 'n_intervals'),
+              State('job-store', 'data'),
+              State('path-store', 'data'),
+              prevent_initial_call=True)
+def poll_job(n_intervals: int, job_id: Optional[int], shown_path: List[Tuple[float, float]]) -> tuple:
+    job = None if job_id is None else planning_jobs.get(job_id)
+    if job is None:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, True, ''
+    if not job.finished:
+        partial = job.partial
+        # The best path so far, only sent when it changed. The store holds lists once it went through the browser.
+        if partial is not None and [list(c) for c in partial['path']] != [list(c) for c in shown_path or []]:
+            return partial['path'], job.id, partial['calculation_time'], dash.no_update, False, _describe_job(job)
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, False, _describe_job(job)
+    if job.status == Job.DONE:
+        result = job.result
+        return result['path'], job.id, result['calculation_time'], result['profile'], True, _describe_job(job)
+    if job.status == Job.FAILED:
+        return [], None, 0, None, True, _describe_job(job)
+    return dash.no_update, dash.no_update, dash.no_update, dash.no_update, True, _describe_job(job)
+
+
+@app.callback(Output('job-status', 'children'),
+              Input('cancel-button', 'n_clicks'),
+              State('job-store', 'data'),
               prevent_initial_call=True)
-def run_button_n_clicks_changed(n_clicks: int, scenario_path: str) -> \
-        Tuple[List[Tuple[float, float]], List[Tuple[float, ...]], float]:
-    source, targets, allowed_detection, enemies = _load_scenario(scenario_path)
+def cancel_button_n_clicks_changed(n_clicks: int, job_id: Optional[int]):
+    job = None if job_id is None else planning_jobs.get(job_id)
+    if job is None or job.finished:
+        return dash.no_update
+    job.cancel()
+    return 'Cancelling...'
 
-    # Dash doesn't support custom return types from callbacks, so we convert the path into a list of tuples
-    start_time = time.time()
-    path, graph = calculate_path(source, targets, enemies, allowed_detection)
-    calculation_time = time.time() - start_time
-    return [(c.x, c.y) for c in path], [(edge[0].x, edge[0].y, edge[1].x, edge[1].y) for edge in
-                                        graph.edges], calculation_time
+
+@app.callback(Output('profile-breakdown', 'children'),
+              Output('profile-panel', 'style'),
+              Input('profile-store', 'data'),
+              prevent_initial_call=True)
+def update_profile_panel(profile: Optional[dict]) -> Tuple[str, dict]:
+    if profile is None:
+        return '', {'display': 'none'}
+    return profiling.Profile.from_dict(profile).summary(), {'display': 'flex', 'margin-top': '10px'}
+
+
+@app.callback(Output('download-profile', 'data'),
+              Input('download-profile-btn', 'n_clicks'),
+              State('profile-store', 'data'),
+              State('scenario-dropdown', 'value'),
+              prevent_initial_call=True)
+def download_profile(n_clicks: int, profile: Optional[dict], scenario_path: str):
+    if profile is None:
+        return None
+    return dict(content=profiling.Profile.from_dict(profile).to_json(),
+                filename=f'scenario{scenario_number(scenario_path)}_profile.json')
 
 
 @app.callback(
@@ -239,10 +417,13 @@ def run_button_n_clicks_changed(n_clicks: int, scenario_path: str) -> \
 )
 def download_path(n_clicks: int, path: List[Tuple[float, float]], calculation_time: float, scenario_path: str):
     return dict(content=generate_path_file(path, calculation_time),
-                filename=f'scenario{_extract_scenario_number_from_path(scenario_path)}.txt')
+                filename=f'scenario{scenario_number(scenario_path)}.txt')
 
 
 def generate_path_file(path: List[Tuple[float, float]], calculation_time: float) -> str:
+    # Only downloads need cryptography, it isn't loaded with the app
+    from cryptography.fernet import Fernet as F
+
     # file can only be encrypted when in bytes format
     to_encript: bytes = json.dumps({'path': path, 'calculation_time': calculation_time}).encode()
     # encrypt and convert to str
@@ -1,5 +1,7 @@
 import math
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
+
+import numpy as np
 
 from algorithmics.enemy.asteroids_zone import AsteroidsZone
 from algorithmics.enemy.black_hole import BlackHole
@@ -11,6 +13,7 @@ try:
 except:
     import plotly.graph_objs as go
 
+from algorithmics.utils import graph_rendering
 from algorithmics.utils.coordinate import Coordinate
 
 
@@ -72,28 +75,40 @@ def generate_path_scatters(path: List[Coordinate], color: str = '#47d147',
     scatters = [go.Scatter(x=xs, y=ys, hoverinfo='skip', mode='lines+markers',
                            line=go.scatter.Line(color=color, width=3))]
 
-    if detected_segments is None:
+    if not detected_segments:
         return scatters
 
-    for segment in detected_segments:
-        start, end = segment
-        scatters.append(go.Scatter(x=[start.x, end.x], y=[start.y, end.y], hoverinfo='skip', mode='lines',
-                                   line=go.scatter.Line(color='#e61010', width=3)))
+    # All detected parts in a single trace, separated by gaps
+    detected_xs, detected_ys = [], []
+    for start, end in detected_segments:
+        detected_xs += [start.x, end.x, None]
+        detected_ys += [start.y, end.y, None]
+    scatters.append(go.Scatter(x=detected_xs, y=detected_ys, hoverinfo='skip', mode='lines',
+                               line=go.scatter.Line(color='#e61010', width=3)))
 
     return scatters
 
-def generate_graph_scatter(edges: List[Tuple[float, float, float, float]], color: str = '#0099FF') -> go.Scatter:
-    """Converts a path into a displayable plotly scatter
 
-    :param edges: list of edges
+def generate_graph_scatter(edges: Union[np.ndarray, List[Tuple[float, float, float, float]]],
+                           color: str = '#0099FF', x_range: Optional[Tuple[float, float]] = None,
+                           y_range: Optional[Tuple[float, float]] = None,
+                           max_edges: int = graph_rendering.MAX_DRAWN_EDGES) -> go.Scattergl:
+    """Converts graph edges into a displayable WebGL plotly scatter
+
+    Only the edges visible in the given ranges are drawn, and at most `max_edges` of them, see
+    `graph_rendering.visible_edges`.
+
+    :param edges: array or list of (x1, y1, x2, y2) edges
     :param color: scatter's color
-    :return: plotly scatter graphics object displaying the path
+    :param x_range: visible x range, None for no limit
+    :param y_range: visible y range, None for no limit
+    :param max_edges: amount of edges drawn at most
+    :return: plotly scatter graphics object displaying the edges
     """
-    xs = [x for pairs in [[edge[0], edge[2], None] for edge in edges] for x in pairs]
-    ys = [y for pairs in [[edge[1], edge[3], None] for edge in edges] for y in pairs]
+    xs, ys = graph_rendering.edge_lines(graph_rendering.visible_edges(edges, x_range, y_range, max_edges))
 
-    return go.Scatter(x=xs, y=ys, hoverinfo='skip', mode='lines+markers',
-                      line=go.scatter.Line(color=color, width=3))
+    return go.Scattergl(x=xs, y=ys, hoverinfo='skip', mode='lines+markers',
+                        line=go.scattergl.Line(color=color, width=3))
 
 
 def generate_polygon_scatter(boundary: List[Coordinate], color: str = '#00ff00', hover_text=None) -> go.Scatter:
@@ -1,13 +1,185 @@
-import networkx as nx
+import concurrent.futures
+import os
 from itertools import combinations
-import math
-from algorithmics.utils.coordinate import Coordinate
-import edge_checker
+from typing import Optional, Tuple, Dict, Callable, List
 
+import numpy as np
 
+from algorithmics import edge_checker
+from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.utils import profiling, jobs
+from algorithmics.utils.lazy_import import lazy_import
+from algorithmics.utils.node_provenance import NodeProvenance
+from algorithmics.utils.obstacle_index import ObstacleIndex
 
-def get_legal_edges(graph, enemies):
+nx = lazy_import('networkx')
+
+# Amount of candidate pairs checked together in batch mode, bounds the memory of the intermediate arrays
+BATCH_SIZE = 8192
+# Below this amount of candidate pairs, starting worker processes costs more than it saves
+PARALLEL_MIN_PAIRS = 200000
+
+# Scenario shipped once to every worker process by `_init_worker`
+_worker_state: Dict[str, object] = {}
+
+
+def get_legal_edges(graph, enemies, index: Optional[ObstacleIndex] = None,
+                    provenance: Optional[NodeProvenance] = None):
+    profiling.count('candidate pairs', graph.number_of_nodes() * (graph.number_of_nodes() - 1) // 2)
     for start, end in combinations(graph.nodes, 2):
 
-        if edge_checker.is_legal_edge(start, end, enemies):
-            graph.add_edge(start, end, dist=start.distance_to(end))
\ No newline at end of file
+        if edge_checker.is_legal_edge(start, end, enemies, index, provenance):
+            graph.add_edge(start, end, dist=start.distance_to(end))
+
+
+def get_legal_edge_arrays(coordinates: np.ndarray, enemies, batch_size: int = BATCH_SIZE,
+                          index: Optional[ObstacleIndex] = None,
+                          vertex_tables: Optional[Dict[Enemy, np.ndarray]] = None,
+                          pair_filter: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None,
+                          workers: Optional[int] = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Finds all legal edges between the given points, checking candidate pairs in vectorized batches
+
+    :param coordinates: (n, 2) array of node coordinates
+    :param enemies: list of enemies along the way
+    :param batch_size: amount of candidate pairs checked together
+    :param index: obstacle index built over `enemies`, used to skip edges far from each obstacle
+    :param vertex_tables: for asteroid zones, the vertex index of every node (-1 where it isn't a vertex of the
+        zone), as given by `NodeProvenance.vertex_table`
+    :param pair_filter: called with the node indices of both ends of candidate pairs, returns a mask of the pairs
+        worth checking. Pairs it rejects are dropped without any legality check.
+    :param workers: amount of processes checking the pairs, None for one per core. Below `PARALLEL_MIN_PAIRS`
+        candidate pairs the check is serial anyway.
+    :return: node indices of both ends of every legal edge, ordered like `combinations`, and the edge lengths
+    """
+    if index is None:
+        index = ObstacleIndex(enemies)
+
+    first, second = np.triu_indices(len(coordinates), k=1)
+    if pair_filter is not None:
+        candidates = pair_filter(first, second)
+        first, second = first[candidates], second[candidates]
+    profiling.count('candidate pairs', len(first))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(first) >= PARALLEL_MIN_PAIRS:
+        legal, lengths = _check_pairs_parallel(coordinates, enemies, first, second, batch_size, index, vertex_tables,
+                                               workers)
+    else:
+        legal, lengths = _check_pairs(coordinates, enemies, first, second, 0, len(first), batch_size, index,
+                                      vertex_tables)
+
+    return first[legal], second[legal], lengths[legal]
+
+
+def _check_pairs(coordinates: np.ndarray, enemies, first: np.ndarray, second: np.ndarray, chunk_start: int,
+                 chunk_end: int, batch_size: int, index: ObstacleIndex,
+                 vertex_tables: Optional[Dict[Enemy, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Checks the candidate pairs `chunk_start` to `chunk_end` in batches
+
+    :return: legality mask and lengths of the checked pairs
+    """
+    legal = np.zeros(chunk_end - chunk_start, dtype=bool)
+    lengths = np.empty(chunk_end - chunk_start, dtype=float)
+
+    for batch_start in range(chunk_start, chunk_end, batch_size):
+        jobs.checkpoint(progress=(batch_start - chunk_start) / (chunk_end - chunk_start))
+        batch = slice(batch_start, min(batch_start + batch_size, chunk_end))
+        results = slice(batch.start - chunk_start, batch.stop - chunk_start)
+        zone_vertices = None if vertex_tables is None else \
+            {zone: (table[first[batch]], table[second[batch]]) for zone, table in vertex_tables.items()}
+        legal[results], lengths[results] = edge_checker.check_edges_batch(coordinates[first[batch]],
+                                                                          coordinates[second[batch]], enemies, index,
+                                                                          zone_vertices)
+    return legal, lengths
+
+
+def _check_pairs_parallel(coordinates: np.ndarray, enemies, first: np.ndarray, second: np.ndarray,
+                          batch_size: int, index: ObstacleIndex, vertex_tables: Optional[Dict[Enemy, np.ndarray]],
+                          workers: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Checks the candidate pairs in chunks spread over a pool of worker processes
+
+    The scenario is shipped to every worker once when it starts, tasks only carry the bounds of their chunk.
+    Chunks are merged back in order, so the result is the same as when checking serially.
+
+    :return: legality mask and lengths of all the pairs
+    """
+    # Enemies are pickled separately in every worker, so tables are matched to them by position rather than identity
+    tables = None if vertex_tables is None else [vertex_tables.get(enemy) for enemy in enemies]
+    # A few chunks per worker balance the load without much overhead
+    chunk_size = max(batch_size, -(-len(first) // (4 * workers)))
+    bounds = [(chunk_start, min(chunk_start + chunk_size, len(first)))
+              for chunk_start in range(0, len(first), chunk_size)]
+
+    legal, lengths = [], []
+    # Accessed through the package, which only imports the multiprocessing machinery on first use
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(coordinates, enemies, first, second, batch_size,
+                                                          tables)) as executor:
+        futures = [executor.submit(_check_chunk, chunk_bounds) for chunk_bounds in bounds]
+        try:
+            for future in futures:
+                chunk_legal, chunk_lengths, tests, pruned_tests = future.result()
+                jobs.checkpoint(progress=len(legal) / len(bounds))
+                legal.append(chunk_legal)
+                lengths.append(chunk_lengths)
+                index.tests += tests
+                index.pruned_tests += pruned_tests
+        except jobs.JobCancelled:
+            # Pending chunks are dropped, leaving the executor only waits for the ones already running
+            for future in futures:
+                future.cancel()
+            raise
+    return np.concatenate(legal), np.concatenate(lengths)
+
+
+def _init_worker(coordinates: np.ndarray, enemies, first: np.ndarray, second: np.ndarray, batch_size: int,
+                 tables: Optional[List[Optional[np.ndarray]]]):
+    _worker_state.update(coordinates=coordinates, enemies=enemies, first=first, second=second,
+                         batch_size=batch_size, index=ObstacleIndex(enemies),
+                         vertex_tables=None if tables is None else
+                         {enemy: table for enemy, table in zip(enemies, tables) if table is not None})
+
+
+def _check_chunk(bounds: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    index = _worker_state['index']
+    tests, pruned_tests = index.tests, index.pruned_tests
+    legal, lengths = _check_pairs(_worker_state['coordinates'], _worker_state['enemies'], _worker_state['first'],
+                                  _worker_state['second'], bounds[0], bounds[1], _worker_state['batch_size'],
+                                  index, _worker_state['vertex_tables'])
+    return legal, lengths, index.tests - tests, index.pruned_tests - pruned_tests
+
+
+def get_legal_edges_batch(graph: 'nx.Graph', enemies, batch_size: int = BATCH_SIZE,
+                          index: Optional[ObstacleIndex] = None, provenance: Optional[NodeProvenance] = None,
+                          workers: Optional[int] = 1):
+    """Adds all legal edges between the graph's nodes, checking candidate pairs in vectorized batches
+
+    Produces the same edges as `get_legal_edges`, in the same order.
+
+    :param graph: graph whose nodes are coordinates, legal edges are added to it with a `dist` attribute
+    :param enemies: list of enemies along the way
+    :param batch_size: amount of candidate pairs checked together
+    :param index: obstacle index built over `enemies`, used to skip edges far from each obstacle
+    :param provenance: enemy vertices the graph's nodes come from
+    :param workers: amount of processes checking the pairs, see `get_legal_edge_arrays`
+    """
+    nodes = list(graph.nodes)
+    coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float).reshape(-1, 2)
+    vertex_tables = None if provenance is None else get_vertex_tables(nodes, enemies, provenance)
+    first, second, lengths = get_legal_edge_arrays(coordinates, enemies, batch_size, index, vertex_tables,
+                                                   workers=workers)
+    graph.add_weighted_edges_from(((nodes[a], nodes[b], float(d)) for a, b, d in zip(first, second, lengths)),
+                                  weight='dist')
+
+
+def get_vertex_tables(nodes, enemies, provenance: NodeProvenance) -> Dict[Enemy, np.ndarray]:
+    """Looks up, for every asteroid zone, which of its vertices every node is
+
+    :param nodes: coordinates of the graph's nodes
+    :param enemies: list of enemies along the way
+    :param provenance: enemy vertices the nodes come from
+    :return: mapping from zone to an (n,) array of vertex indices, -1 where the node isn't a vertex of the zone
+    """
+    return provenance.vertex_tables(nodes, [enemy for enemy in enemies if isinstance(enemy, AsteroidsZone)])
@@ -1,46 +1,153 @@
-from utils.coordinate import Coordinate
-from enemy.asteroids_zone import AsteroidsZone
-from enemy.enemy import Enemy
-from enemy.black_hole import BlackHole
-from typing import List
+import math
+from typing import List, Tuple, Optional, Dict
 
-from shapely.geometry import Point, LineString, Polygon
+import numpy as np
 
+from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.black_hole import BlackHole, CIRCLE_QUAD_SEGMENTS
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.utils import geometry, profiling
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.node_provenance import NodeProvenance
+from algorithmics.utils.obstacle_index import ObstacleIndex
 
-def is_legal_edge(c0: Coordinate, c1: Coordinate, enemies: List[Enemy]):
+# Batches up to this size are matched against all obstacles at once before checking them obstacle by obstacle
+SMALL_BATCH = 256
+
+
+def is_legal_edge(c0: Coordinate, c1: Coordinate, enemies: List[Enemy], index: Optional[ObstacleIndex] = None,
+                  provenance: Optional[NodeProvenance] = None):
+    if index is not None:
+        enemies = index.query(c0, c1)
     for enemy in enemies:
-        if "AsteroidsZone" in str(type(enemy)):
-            if not is_legal_edge_astroid(c0, c1, enemy):
+        if isinstance(enemy, AsteroidsZone):
+            profiling.count('edge checks/AsteroidsZone')
+            if not is_legal_edge_astroid(c0, c1, enemy, provenance):
                 return False
-        if "BlackHole" in str(type(enemy)):
+        elif isinstance(enemy, BlackHole):
+            profiling.count('edge checks/BlackHole')
             if not is_legal_edge_black_hole(c0, c1, enemy):
                 return False
     return True
 
-def is_legal_edge_astroid(c0: Coordinate, c1: Coordinate, zone: AsteroidsZone):
+def is_legal_edge_astroid(c0: Coordinate, c1: Coordinate, zone: AsteroidsZone,
+                          provenance: Optional[NodeProvenance] = None):
+    from shapely.geometry import LineString
     line = LineString([(c0.x, c0.y), (c1.x, c1.y)])
 
-    poly = Polygon([(c.x, c.y) for c in zone.boundary])
-    if not line.intersects(poly):
+    poly = zone.polygon
+    if not zone.prepared_polygon.intersects(line):
         return True
+
+    if provenance is not None:
+        # Constant time lookups instead of scanning the boundary
+        c0_on_zone = provenance.vertex_index(c0, zone) is not None
+        c1_on_zone = provenance.vertex_index(c1, zone) is not None
+        if c0_on_zone != c1_on_zone:
+            return line.intersection(poly).length == 0
+        return c0_on_zone and provenance.are_adjacent(c0, c1, zone, len(zone.boundary))
+
+    # Edges leaving the zone from one of its vertices may only touch it. The intersection mixes points and lines
+    # (a GeometryCollection) when the edge also touches another vertex, so it's measured rather than type checked
     if c0 not in zone.boundary and c1 in zone.boundary:
-        return "LineString" not in str(type(line.intersection(poly)))
+        return line.intersection(poly).length == 0
     if c0 in zone.boundary and c1 not in zone.boundary:
-        return "LineString" not in str(type(line.intersection(poly)))
+        return line.intersection(poly).length == 0
 
-    # return False
-    #
     boundary = zone.boundary
     for i in range(len(boundary) - 1):
         if (c0 == boundary[i] and c1 == boundary[i+1]) or (c0 == boundary[i+1] and c1 == boundary[i]):
-            print(line, "True")
             return True
     if (c0 == boundary[-1] and c1 == boundary[0]) or (c1 == boundary[-1] and c0 == boundary[0]):
-        print(line, "True")
         return True
     return False
 
 def is_legal_edge_black_hole(c0: Coordinate, c1: Coordinate, hole: BlackHole):
+    from shapely.geometry import LineString
     line = LineString([(c0.x, c0.y), (c1.x, c1.y)])
-    circle = Point(hole.center.x, hole.center.y).buffer(hole.radius)
-    return not line.intersects(circle)
+    return not hole.prepared_circle.intersects(line)
+
+
+def check_edges_batch(starts: np.ndarray, ends: np.ndarray, enemies: List[Enemy],
+                      index: Optional[ObstacleIndex] = None,
+                      zone_vertices: Optional[Dict[Enemy, Tuple[np.ndarray, np.ndarray]]] = None) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """Checks the legality of many candidate edges at once
+
+    Gives exactly the same answers as calling `is_legal_edge` on every edge, but tests all the segments against one
+    enemy at a time with array operations instead of building shapely objects per edge.
+
+    :param starts: (m, 2) array of edge start points
+    :param ends: (m, 2) array of edge end points
+    :param enemies: list of enemies along the way
+    :param index: obstacle index built over `enemies`, used to skip edges far from each obstacle
+    :param zone_vertices: for asteroid zones, the vertex index of the start and of the end of every edge (-1 where
+        it isn't a vertex of the zone), as given by `NodeProvenance`. Zones missing from it are matched by coordinates.
+    :return: (m,) boolean legality mask and (m,) array of edge lengths
+    """
+    starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+    legal = np.ones(len(starts), dtype=bool)
+    if index is None:
+        index = ObstacleIndex(enemies)
+
+    # Small batches, e.g. the few edges of a lazily checked path, skip the obstacles far from all of them at once
+    if len(starts) <= SMALL_BATCH:
+        obstacles = np.flatnonzero(index.overlapping_obstacles(starts, ends))
+    else:
+        obstacles = range(len(index.obstacles))
+
+    for i in obstacles:
+        enemy = index.obstacles[i]
+        # Only keep testing edges that are still legal and near the obstacle
+        candidates = np.flatnonzero(legal)
+        candidates = candidates[index.overlapping_segments(i, starts[candidates], ends[candidates])]
+        if len(candidates) == 0:
+            continue
+        profiling.count(f'edge checks/{type(enemy).__name__}', len(candidates))
+        if isinstance(enemy, AsteroidsZone):
+            if zone_vertices is not None and enemy in zone_vertices:
+                start_vertex, end_vertex = zone_vertices[enemy]
+                start_vertex, end_vertex = start_vertex[candidates], end_vertex[candidates]
+            else:
+                start_vertex = geometry.match_vertices(starts[candidates], enemy.vertices)
+                end_vertex = geometry.match_vertices(ends[candidates], enemy.vertices)
+            legal[candidates] = _check_edges_astroid(starts[candidates], ends[candidates], enemy,
+                                                     start_vertex, end_vertex)
+        elif isinstance(enemy, BlackHole):
+            legal[candidates] = _check_edges_black_hole(starts[candidates], ends[candidates], enemy)
+
+    delta = ends - starts
+    lengths = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+    return legal, lengths
+
+
+def _check_edges_astroid(starts: np.ndarray, ends: np.ndarray, zone: AsteroidsZone,
+                         start_vertex: np.ndarray, end_vertex: np.ndarray) -> np.ndarray:
+    vertices = zone.vertices
+    legal = ~geometry.segments_intersect_polygon(starts, ends, vertices)
+
+    # Edges leaving the zone from one of its vertices may only touch it
+    single_vertex = ~legal & ((start_vertex >= 0) != (end_vertex >= 0))
+    legal[single_vertex] = ~geometry.segments_overlap_polygon(starts[single_vertex], ends[single_vertex], vertices)
+
+    # Edges between two vertices of the zone are legal only along its sides
+    both_vertices = ~legal & (start_vertex >= 0) & (end_vertex >= 0)
+    index_gap = np.abs(start_vertex - end_vertex)
+    legal |= both_vertices & ((index_gap == 1) | (index_gap == len(vertices) - 1))
+    return legal
+
+
+def _check_edges_black_hole(starts: np.ndarray, ends: np.ndarray, hole: BlackHole) -> np.ndarray:
+    center = np.array([hole.center.x, hole.center.y], dtype=float)
+    distances = geometry.segments_point_distance(starts, ends, center)
+
+    # The polygon used by `is_legal_edge_black_hole` is inscribed in the circle, so segments farther than the radius
+    # never hit it and segments closer than its inner radius always do
+    inner_radius = hole.radius * math.cos(math.pi / (4 * CIRCLE_QUAD_SEGMENTS))
+    legal = distances > hole.radius
+    undecided = ~legal & (distances >= inner_radius)
+    if undecided.any():
+        legal[undecided] = ~geometry.segments_intersect_polygon(starts[undecided], ends[undecided],
+                                                                hole.circle_vertices)
+    return legal
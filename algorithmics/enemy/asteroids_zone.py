@@ -1,8 +1,14 @@
-from typing import List
+from typing import List, Optional, TYPE_CHECKING
+
+import numpy as np
 
 from algorithmics.enemy.enemy import Enemy
 from algorithmics.utils.coordinate import Coordinate
 
+if TYPE_CHECKING:
+    from shapely.geometry import Polygon
+    from shapely.prepared import PreparedGeometry
+
 
 class AsteroidsZone(Enemy):
 
@@ -13,5 +19,53 @@ class AsteroidsZone(Enemy):
         """
         self.boundary = boundary
 
+    @property
+    def boundary(self) -> List[Coordinate]:
+        return self._boundary
+
+    @boundary.setter
+    def boundary(self, boundary: List[Coordinate]):
+        self._boundary = boundary
+        self.invalidate_geometry()
+
+    def invalidate_geometry(self):
+        """Drops the cached geometry of the zone
+
+        Called automatically when `boundary` is assigned, must be called manually after mutating it in place.
+        """
+        self._polygon: Optional[Polygon] = None
+        self._prepared_polygon: Optional[PreparedGeometry] = None
+        self._vertices: Optional[np.ndarray] = None
+
+    def __getstate__(self):
+        # Prepared geometries can't be pickled (e.g. when shipping enemies to worker processes), rebuild them lazily
+        state = self.__dict__.copy()
+        state.update({'_polygon': None, '_prepared_polygon': None, '_vertices': None})
+        return state
+
+    @property
+    def polygon(self) -> 'Polygon':
+        """Shapely polygon of the zone, built on first use and shared by all edge checks"""
+        if self._polygon is None:
+            # Only the per-edge checks use shapely, batch checks run on `vertices`
+            from shapely.geometry import Polygon
+            self._polygon = Polygon([(c.x, c.y) for c in self.boundary])
+        return self._polygon
+
+    @property
+    def prepared_polygon(self) -> 'PreparedGeometry':
+        """Prepared version of `polygon`, faster for repeated predicates such as `intersects`"""
+        if self._prepared_polygon is None:
+            from shapely.prepared import prep
+            self._prepared_polygon = prep(self.polygon)
+        return self._prepared_polygon
+
+    @property
+    def vertices(self) -> np.ndarray:
+        """(k, 2) array of the boundary coordinates"""
+        if self._vertices is None:
+            self._vertices = np.array([(c.x, c.y) for c in self.boundary], dtype=float).reshape(-1, 2)
+        return self._vertices
+
     def get_points(self) -> List[Coordinate]:
         return self.boundary
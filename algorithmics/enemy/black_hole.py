@@ -1,10 +1,20 @@
 import math
-from typing import List
+from typing import List, Tuple, Optional, TYPE_CHECKING
 
 import numpy as np
 
 from algorithmics.enemy.enemy import Enemy
 from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.geometry import CLEARANCE
+
+if TYPE_CHECKING:
+    from shapely.geometry import Polygon
+    from shapely.prepared import PreparedGeometry
+
+# The circle of a black hole is approximated with this many segments per quarter circle (shapely's default)
+CIRCLE_QUAD_SEGMENTS = 16
+# Upper bound on the amount of points placed around a black hole for a path length tolerance
+MAX_VERTICES = 1024
 
 
 class BlackHole(Enemy):
@@ -18,11 +28,101 @@ class BlackHole(Enemy):
         self.center = center
         self.radius = radius
 
-    def get_points(self, n=30) -> List[Coordinate]:
+    @property
+    def center(self) -> Coordinate:
+        return self._center
+
+    @center.setter
+    def center(self, center: Coordinate):
+        self._center = center
+        self.invalidate_geometry()
+
+    @property
+    def radius(self) -> float:
+        return self._radius
+
+    @radius.setter
+    def radius(self, radius: float):
+        self._radius = radius
+        self.invalidate_geometry()
+
+    def invalidate_geometry(self):
+        """Drops the cached geometry of the black hole
+
+        Called automatically when `center` or `radius` are assigned, must be called manually after mutating the
+        center coordinate in place.
+        """
+        self._circle: Optional[Polygon] = None
+        self._prepared_circle: Optional[PreparedGeometry] = None
+        self._circle_vertices: Optional[np.ndarray] = None
+
+    def __getstate__(self):
+        # Prepared geometries can't be pickled (e.g. when shipping enemies to worker processes), rebuild them lazily
+        state = self.__dict__.copy()
+        state.update({'_circle': None, '_prepared_circle': None, '_circle_vertices': None})
+        return state
+
+    @property
+    def circle(self) -> 'Polygon':
+        """Polygon approximating the black hole, built on first use and shared by all edge checks"""
+        if self._circle is None:
+            # Loaded when the first circle is built rather than with the enemies
+            from shapely.geometry import Point
+            self._circle = Point(self.center.x, self.center.y).buffer(self.radius, CIRCLE_QUAD_SEGMENTS)
+        return self._circle
+
+    @property
+    def prepared_circle(self) -> 'PreparedGeometry':
+        """Prepared version of `circle`, faster for repeated predicates such as `intersects`"""
+        if self._prepared_circle is None:
+            from shapely.prepared import prep
+            self._prepared_circle = prep(self.circle)
+        return self._prepared_circle
+
+    @property
+    def circle_vertices(self) -> np.ndarray:
+        """(k, 2) array of the vertices of `circle`"""
+        if self._circle_vertices is None:
+            self._circle_vertices = np.array(self.circle.exterior.coords[:-1], dtype=float)
+        return self._circle_vertices
+
+    def get_points(self, n=30, tolerance: Optional[float] = None) -> List[Coordinate]:
+        """Points around the black hole, forming a polygon that contains it
+
+        :param n: amount of points
+        :param tolerance: maximal extra length a path may take by going around the polygon instead of the circle.
+            When given, it overrides `n` with the least amount of points achieving it, and the points are placed
+            as close to the circle as possible.
+        :return: the polygon's vertices
+        """
+        if tolerance is not None:
+            n = self.vertices_for_tolerance(tolerance)
         dif = 360/n
-        angles = [math.radians(theta) for theta in np.arange(0, 360, dif)]
-        rad_with_dif = self.radius / (math.cos(math.radians(dif)))
-        print("rad_with_dif", rad_with_dif)
+        angles = [math.radians(theta) for theta in np.arange(0, 360, dif)][:n]
+        if tolerance is not None:
+            # Sides of a regular polygon circumscribing the circle touch it, enlarge slightly to stay clear of it
+            rad_with_dif = self.radius / math.cos(math.pi / n) * (1 + CLEARANCE)
+        else:
+            rad_with_dif = self.radius / (math.cos(math.radians(dif)))
         return [Coordinate(self.center.x + rad_with_dif * math.cos(theta),
                            self.center.y + rad_with_dif * math.sin(theta)) for
                 theta in angles]
+
+    def vertices_for_tolerance(self, tolerance: float) -> int:
+        """Finds the least amount of points keeping the detour around the black hole within the tolerance
+
+        Going around an arc of the circle along a circumscribed regular n-gon is longer by a factor of at most
+        tan(pi / n) / (pi / n), the worst detour being a full turn.
+
+        :param tolerance: maximal extra length allowed
+        :return: amount of points, between 3 and `MAX_VERTICES`
+        """
+        for n in range(3, MAX_VERTICES):
+            ratio = math.tan(math.pi / n) / (math.pi / n) * (1 + CLEARANCE)
+            if 2 * math.pi * self.radius * (ratio - 1) <= tolerance:
+                return n
+        return MAX_VERTICES
+
+    def get_bounding_box(self) -> Tuple[float, float, float, float]:
+        return (self.center.x - self.radius, self.center.y - self.radius,
+                self.center.x + self.radius, self.center.y + self.radius)
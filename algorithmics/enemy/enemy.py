@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import List
+from typing import List, Tuple
 
 from algorithmics.utils.coordinate import Coordinate
 
@@ -8,4 +8,14 @@ class Enemy(ABC):
     pass
 
     def get_points(self) -> List[Coordinate]:
-        return list()
\ No newline at end of file
+        return list()
+
+    def get_bounding_box(self) -> Tuple[float, float, float, float]:
+        """Computes the axis-aligned box containing the enemy
+
+        :return: tuple of (min x, min y, max x, max y)
+        """
+        points = self.get_points()
+        xs = [point.x for point in points]
+        ys = [point.y for point in points]
+        return min(xs), min(ys), max(xs), max(ys)
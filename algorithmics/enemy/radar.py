@@ -1,5 +1,9 @@
+import math
+from typing import List, Tuple
+
 from algorithmics.enemy.enemy import Enemy
 from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.geometry import CLEARANCE
 
 
 class Radar(Enemy):
@@ -12,3 +16,17 @@ class Radar(Enemy):
         """
         self.center = center
         self.radius = radius
+
+    def get_points(self, n=30) -> List[Coordinate]:
+        """Points around the radar, placed so that the polygon they form lies just outside the detection circle
+
+        They let paths skirt the radar without being detected, or cut through it when detection is allowed.
+        """
+        # Circumscribed like the polygons around black holes, see `BlackHole.get_points`
+        radius = self.radius / math.cos(math.pi / n) * (1 + CLEARANCE)
+        return [Coordinate(self.center.x + radius * math.cos(2 * math.pi * i / n),
+                           self.center.y + radius * math.sin(2 * math.pi * i / n)) for i in range(n)]
+
+    def get_bounding_box(self) -> Tuple[float, float, float, float]:
+        return (self.center.x - self.radius, self.center.y - self.radius,
+                self.center.x + self.radius, self.center.y + self.radius)
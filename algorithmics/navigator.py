@@ -1,18 +1,45 @@
-from typing import List, Tuple
+import contextlib
+import time
+from typing import Callable, Iterator, List, Tuple, Union, Optional
 
-import networkx as nx
+import numpy as np
 
+from algorithmics import create_legal_edges
+from algorithmics.enemy.black_hole import BlackHole
 from algorithmics.enemy.enemy import Enemy
-from algorithmics.utils import create_graph
+from algorithmics.enemy.radar import Radar
+from algorithmics.utils import create_graph, tour, profiling, jobs
+from algorithmics.utils.constrained_search import radar_constrained_path, EXPOSURE_TOLERANCE
 from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.csr_graph import CSRGraph
+from algorithmics.utils.graph_cache import GraphCache
+from algorithmics.utils.lazy_import import lazy_import
+from algorithmics.utils.lazy_search import LazyEdges
+from algorithmics.utils.obstacle_index import OBSTACLE_TYPES, ObstacleIndex
+
+nx = lazy_import('networkx')
+
+# Black hole tolerances of the successive graphs anytime planning searches, relative to the largest black hole's
+# radius. Coarser graphs have fewer points around black holes so they are faster to build, None is the graph
+# `calculate_path` builds by default.
+ANYTIME_TOLERANCES = (2.0, 0.5, 0.1, None)
+# Below this amount of obstacles the whole graph is built in milliseconds, faster than the rounds of lazy searches and
+# checks
+LAZY_MIN_OBSTACLES = 25
 
 
 # Navigator
 
 
-def calculate_path(source: Coordinate, targets: List[Coordinate], enemies: List[Enemy], allowed_detection: float = 0) \
-        -> Tuple[List[Coordinate], nx.Graph]:
-    """Calculates a path from source to target without any detection
+def calculate_path(source: Coordinate, targets: List[Coordinate], enemies: List[Enemy], allowed_detection: float = 0,
+                   as_networkx: bool = True, reduced: Optional[bool] = None, exact_black_holes: bool = False,
+                   black_hole_tolerance: Optional[float] = None,
+                   workers: Optional[int] = 1, cache: Optional[GraphCache] = None,
+                   lazy: bool = False, relax_detection: bool = False) \
+        -> Tuple[List[Coordinate], Union['nx.Graph', CSRGraph]]:
+    """Calculates a path from source to target without exceeding the allowed radar detection
+
+    When several targets are given, the path visits all of them in the shortest order found.
 
     Note: The path must start at the source coordinate and end at the target coordinate!
 
@@ -20,9 +47,278 @@ def calculate_path(source: Coordinate, targets: List[Coordinate], enemies: List[
     :param targets: target coordinate of the spaceship
     :param enemies: list of enemies along the way
     :param allowed_detection: maximum allowed distance of radar detection
-    :return: list of calculated path waypoints and the graph constructed
+    :param as_networkx: whether to convert the constructed graph into a networkx graph before returning it
+    :param reduced: whether to plan on the reduced visibility graph. It only preserves shortest path lengths, so by
+        default it is used when there are no radars to trade length for detection against.
+    :param exact_black_holes: whether to go around black holes along their tangents and circles, instead of along
+        polygons around them
+    :param black_hole_tolerance: maximal extra length a path may take going around a black hole's polygon, sets the
+        amount of points around every black hole. Ignored with `exact_black_holes`.
+    :param workers: amount of processes checking candidate edges, None for one per core
+    :param cache: on-disk cache of graphs, skips building the graph of a scenario planned before. Ignored with
+        `exact_black_holes`.
+    :param lazy: whether to check only the edges the searches need instead of building the whole graph first, see
+        `plan_lazy`. Pays off when obstacles are sparse. Ignored below `LAZY_MIN_OBSTACLES` obstacles, with radars,
+        whose detection budget needs the exposures of the whole graph, and with `exact_black_holes`.
+    :param relax_detection: whether to return the least detected path when no path fits in the allowed detection
+        (e.g. a target is inside radar coverage), see `radar_constrained_path`. The path then exceeds it.
+    :return: list of calculated path waypoints and the graph constructed, only holding the edges found legal when lazy
+    :raises nx.NetworkXNoPath: if a target can't be reached, or only by exceeding the allowed detection and
+        `relax_detection` isn't set
+    """
+    has_radars = any(isinstance(enemy, Radar) for enemy in enemies)
+    if reduced is None:
+        reduced = not has_radars
+    obstacles = sum(isinstance(enemy, OBSTACLE_TYPES) for enemy in enemies)
+    if lazy and obstacles >= LAZY_MIN_OBSTACLES and not has_radars and not exact_black_holes:
+        jobs.checkpoint('searching')
+        with profiling.phase('lazy search'):
+            path, lazy_graph = plan_lazy(source, targets, enemies, reduced=reduced,
+                                         black_hole_tolerance=black_hole_tolerance)
+        if not as_networkx:
+            return path, lazy_graph
+        with profiling.phase('convert graph'):
+            return path, lazy_graph.to_networkx()
+    jobs.checkpoint('building graph')
+    with profiling.phase('build graph'):
+        if exact_black_holes:
+            main_graph = create_graph.init_tangent_graph(source, targets, enemies, reduced=reduced)
+        else:
+            main_graph = create_graph.init_csr_graph(source, targets, enemies, reduced=reduced,
+                                                     black_hole_tolerance=black_hole_tolerance, workers=workers,
+                                                     cache=cache)
+    jobs.checkpoint('searching')
+    with profiling.phase('search'):
+        path = plan_path(main_graph, source, targets, allowed_detection, relax_detection)
+    if not as_networkx:
+        return path, main_graph
+    with profiling.phase('convert graph'):
+        return path, main_graph.to_networkx()
+
+
+def iterate_paths(source: Coordinate, targets: List[Coordinate], enemies: List[Enemy], allowed_detection: float = 0,
+                  time_budget: Optional[float] = None, workers: Optional[int] = 1,
+                  cache: Optional[GraphCache] = None,
+                  relax_detection: bool = False) -> Iterator[Tuple[List[Coordinate], CSRGraph]]:
+    """Plans over finer and finer graphs until the time budget runs out, yielding every improved path
+
+    Graphs are built like `calculate_path` builds them, with the black hole tolerances of `ANYTIME_TOLERANCES`. The
+    polygons around black holes always contain them, so paths over coarse graphs are legal, only longer. The last
+    graph is the default one, so given enough time the last path is at least as good as the one `calculate_path`
+    finds.
+    A path improves on another when it is detected less beyond the allowed detection (which only happens with
+    `relax_detection`, see `radar_constrained_path`), or as much and is shorter.
+
+    :param source: source coordinate of the spaceship
+    :param targets: coordinates to visit
+    :param enemies: list of enemies along the way
+    :param allowed_detection: maximum allowed distance of radar detection
+    :param time_budget: seconds planning may take, None for no limit. Graphs are abandoned half built once it runs out.
+    :param workers: see `calculate_path`
+    :param cache: see `calculate_path`
+    :param relax_detection: see `calculate_path`
+    :return: generator of the paths and the graphs they were found over, paths get shorter
+    """
+    end_time = None if time_budget is None else time.perf_counter() + time_budget
+    radius = max((enemy.radius for enemy in enemies if isinstance(enemy, BlackHole)), default=0)
+    best_excess, best_length = float('inf'), float('inf')
+    for relative_tolerance in ANYTIME_TOLERANCES:
+        # Without black holes all the graphs are the same
+        if relative_tolerance is not None and radius == 0:
+            continue
+        remaining_time = None if end_time is None else end_time - time.perf_counter()
+        if remaining_time is not None and remaining_time <= 0:
+            return
+        tolerance = None if relative_tolerance is None else relative_tolerance * radius
+        try:
+            with jobs.deadline(remaining_time) if remaining_time is not None else contextlib.nullcontext():
+                path, graph = calculate_path(source, targets, enemies, allowed_detection, as_networkx=False,
+                                             black_hole_tolerance=tolerance, workers=workers, cache=cache,
+                                             relax_detection=relax_detection)
+        except jobs.DeadlineExceeded:
+            return
+        except nx.NetworkXNoPath:
+            # Coarse polygons may close passages between black holes
+            continue
+        profiling.count('anytime paths')
+        waypoints = np.array([(c.x, c.y) for c in path], dtype=float)
+        exposures = create_graph.get_edge_exposures(waypoints[:-1], waypoints[1:], enemies)
+        excess = 0.0 if exposures is None else max(float(exposures.sum()) - allowed_detection, 0.0)
+        length = sum(start.distance_to(end) for start, end in zip(path, path[1:]))
+        if excess < best_excess - EXPOSURE_TOLERANCE or \
+                (excess <= best_excess + EXPOSURE_TOLERANCE and length < best_length):
+            best_excess, best_length = min(excess, best_excess), length
+            yield path, graph
+
+
+def calculate_path_anytime(source: Coordinate, targets: List[Coordinate], enemies: List[Enemy],
+                           allowed_detection: float = 0, time_budget: float = 1.0,
+                           on_path: Optional[Callable[[List[Coordinate], CSRGraph], None]] = None,
+                           workers: Optional[int] = 1,
+                           cache: Optional[GraphCache] = None,
+                           relax_detection: bool = False) -> Tuple[List[Coordinate], CSRGraph]:
+    """Calculates the shortest path found within the time budget, see `iterate_paths`
+
+    :param source: source coordinate of the spaceship
+    :param targets: coordinates to visit
+    :param enemies: list of enemies along the way
+    :param allowed_detection: maximum allowed distance of radar detection
+    :param time_budget: seconds planning may take
+    :param on_path: called with every path found shorter than the ones before, and its graph
+    :param workers: see `calculate_path`
+    :param cache: see `calculate_path`
+    :param relax_detection: see `calculate_path`
+    :return: the shortest path found and its graph
+    :raises nx.NetworkXNoPath: if no path was found in time
+    """
+    best = None
+    for best in iterate_paths(source, targets, enemies, allowed_detection, time_budget, workers, cache,
+                              relax_detection):
+        if on_path is not None:
+            on_path(*best)
+    if best is None:
+        raise nx.NetworkXNoPath(f'No path found within {time_budget}s.')
+    return best
+
+
+def plan_path(graph: CSRGraph, source: Coordinate, targets: List[Coordinate],
+              allowed_detection: float = 0, relax_detection: bool = False) -> List[Coordinate]:
+    """Finds the path from the source through all targets over a graph containing all of them as nodes
+
+    :param graph: graph to search
+    :param source: source coordinate of the spaceship
+    :param targets: coordinates to visit
+    :param allowed_detection: maximum allowed distance of radar detection along the whole path
+    :param relax_detection: see `calculate_path`
+    :return: list of waypoints
+    """
+    if len(targets) == 1:
+        path = plan_leg(graph, graph.node_index(source), graph.node_index(targets[0]), allowed_detection,
+                        relax_detection)
+        return graph.path_coordinates(path)
+    return plan_tour(graph, source, targets, allowed_detection, relax_detection)
+
+
+def plan_lazy(source: Coordinate, targets: List[Coordinate], enemies: List[Enemy], reduced: bool = False,
+              black_hole_tolerance: Optional[float] = None) -> Tuple[List[Coordinate], CSRGraph]:
+    """Plans the shortest path through all targets ignoring radars, checking only the edges on candidate paths
+
+    Searches run over the complete graph between the same nodes as `create_graph.init_csr_graph`, see
+    `LazyEdges.shortest_path`. With several targets, the paths between every pair of stops are found over the same
+    lazy graph, then ordered like `plan_tour` orders them.
+
+    :param source: source coordinate of the spaceship
+    :param targets: coordinates to visit
+    :param enemies: list of enemies along the way
+    :param reduced: whether to only use the nodes and edges of the reduced visibility graph
+    :param black_hole_tolerance: see `calculate_path`
+    :return: list of waypoints, and the graph of the edges found legal
+    """
+    terminals = len(dict.fromkeys([source] + targets))
+    index = ObstacleIndex(enemies)
+    nodes, provenance = create_graph.get_graph_nodes(source, targets, enemies, black_hole_tolerance)
+    nodes = create_graph.prune_graph_nodes(nodes, terminals, enemies, provenance, index)
+    pair_filter = None
+    if reduced:
+        nodes, pair_filter = create_graph.reduce_graph_nodes(nodes, terminals, enemies, provenance)
+    vertex_tables = create_legal_edges.get_vertex_tables(nodes, enemies, provenance)
+    lazy_edges = LazyEdges(nodes, enemies, index=index, vertex_tables=vertex_tables, pair_filter=pair_filter)
+    stops = [nodes.index(stop) for stop in [source] + targets]
+
+    if len(targets) == 1:
+        path = lazy_edges.shortest_path(stops[0], stops[1])
+    else:
+        legs = {}
+        distances = np.zeros((len(stops), len(stops)))
+        for start in range(len(stops)):
+            for end in range(start + 1, len(stops)):
+                jobs.checkpoint(progress=start / len(stops))
+                leg = lazy_edges.shortest_path(stops[start], stops[end])
+                legs[start, end], legs[end, start] = leg, leg[::-1]
+                distances[start, end] = distances[end, start] = sum(
+                    nodes[u].distance_to(nodes[v]) for u, v in zip(leg, leg[1:]))
+        order = tour.order_stops(distances)
+        path = [stops[0]]
+        for leg_start, leg_end in zip(order, order[1:]):
+            path += legs[leg_start, leg_end][1:]
+
+    graph = lazy_edges.legal_graph()
+    graph.provenance = provenance
+    return [nodes[i] for i in path], graph
+
+
+def plan_leg(graph: CSRGraph, source: int, target: int, allowed_detection: float = 0,
+             relax_detection: bool = False) -> List[int]:
+    """Finds the shortest path between two nodes within the allowed detection
+
+    The plain shortest path is tried first, the constrained search only runs when it is too exposed.
+
+    :param graph: graph containing both nodes
+    :param source: index of the source node
+    :param target: index of the target node
+    :param allowed_detection: maximum allowed distance of radar detection
+    :param relax_detection: see `calculate_path`
+    :return: indices of the nodes along the path
     """
-    main_graph = create_graph.init_graph(source, targets[0], enemies)
-    path = nx.shortest_path(main_graph, source=source, target=targets[0], weight='dist')
-    return path, main_graph
+    path = graph.a_star(source, target)
+    if graph.path_exposure(path) <= allowed_detection + EXPOSURE_TOLERANCE:
+        return path
+    return radar_constrained_path(graph, source, target, allowed_detection, relax_detection)
+
+
+def plan_tour(graph: CSRGraph, source: Coordinate, targets: List[Coordinate],
+              allowed_detection: float = 0, relax_detection: bool = False) -> List[Coordinate]:
+    """Plans a path from the source through all targets, reusing a single graph for all legs
+
+    Shortest paths between every pair of stops are found with one Dijkstra per stop, then the visiting order is
+    chosen by nearest neighbour followed by 2-opt and Or-opt, and the legs are stitched into one path.
+    With radars, when even the least detected legs of that order exceed the allowed detection, the shortest order
+    that fits is used instead, see `tour.order_stops_within`, and when none does the shortest order is kept. Every
+    leg may use the detection left over by the previous legs, minus what the following legs need at the very least.
+
+    :param graph: graph containing the source and all targets as nodes
+    :param source: source coordinate of the spaceship
+    :param targets: coordinates to visit
+    :param allowed_detection: maximum allowed distance of radar detection along the whole path
+    :param relax_detection: see `calculate_path`, every leg is then detected as little as possible once the allowed
+        detection is used up
+    :return: list of waypoints, starting at the source and ending at the last visited target
+    """
+    stops = [graph.node_index(source)] + [graph.node_index(target) for target in targets]
+    searches = [graph.shortest_paths_from(stop) for stop in stops]
+    distances = np.array([[stop_distances[other] for other in stops] for stop_distances, _ in searches])
+    if not np.isfinite(distances[0]).all():
+        unreachable = targets[int(np.argmin(np.isfinite(distances[0]))) - 1]
+        raise nx.NetworkXNoPath(f'No path between {source} and {unreachable}.')
+
+    order = tour.order_stops(distances)
+    # Least detection between every pair of stops. When the shortest order can't fit in the allowed detection, e.g.
+    # it leaves a target inside radar coverage to visit another one, an order that does is searched for
+    if graph.exposures is not None:
+        exposures = np.array([graph.shortest_paths_from(stop, weights=graph.exposures)[0][stops] for stop in stops])
+        if tour.tour_length(order, exposures) > allowed_detection + EXPOSURE_TOLERANCE:
+            order = tour.order_stops_within(distances, exposures, allowed_detection + EXPOSURE_TOLERANCE) or order
+    else:
+        exposures = np.zeros_like(distances)
+    legs = list(zip(order, order[1:]))
+
+    # Least detection every leg needs, and what must be kept for the legs after it
+    least_exposures = [exposures[start, end] for start, end in legs]
+    reserved = np.concatenate([np.cumsum(least_exposures[::-1])[::-1][1:], [0.0]])
+    least_detection = float(np.sum(least_exposures))
+    if least_detection > allowed_detection + EXPOSURE_TOLERANCE and not relax_detection:
+        raise nx.NetworkXNoPath(f'No path from {source} through all targets within the allowed detection of '
+                                f'{allowed_detection}, the least detected one is detected for {least_detection:.6g}.')
 
+    path = [stops[0]]
+    remaining_detection = allowed_detection
+    for leg_number, ((leg_start, leg_end), reserved_after) in enumerate(zip(legs, reserved)):
+        jobs.checkpoint(progress=leg_number / len(legs))
+        _, parents = searches[leg_start]
+        leg = graph.path_from_parents(parents, stops[leg_start], stops[leg_end])
+        budget = remaining_detection - reserved_after
+        if graph.path_exposure(leg) > budget + EXPOSURE_TOLERANCE:
+            leg = radar_constrained_path(graph, stops[leg_start], stops[leg_end], budget, relax_detection)
+        remaining_detection -= graph.path_exposure(leg)
+        path += leg[1:]
+    return graph.path_coordinates(path)
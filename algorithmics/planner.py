@@ -0,0 +1,263 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from algorithmics import create_legal_edges, edge_checker
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.enemy.radar import Radar
+from algorithmics.navigator import plan_path
+from algorithmics.utils import create_graph, profiling
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.csr_graph import CSRGraph
+from algorithmics.utils.obstacle_index import ObstacleIndex, OBSTACLE_TYPES
+
+
+class Planner:
+    """Answers many path queries over the same enemies, building the graph between the enemies' points only once
+
+    A query only adds its source and targets to the graph and checks their edges to the other nodes, so it costs
+    O(n) edge checks instead of the O(n²) of `navigator.calculate_path`, and finds paths of the same length.
+    Queries don't modify the planner, so one planner may serve queries from several threads. Enemies may change
+    between queries, see `update`.
+
+    Usage:
+        planner = Planner(enemies)
+        path = planner.plan(source, [target], allowed_detection)
+        planner.add_enemy(BlackHole(Coordinate(5, 5), 1))
+    """
+
+    def __init__(self, enemies: List[Enemy], reduced: Optional[bool] = None,
+                 black_hole_tolerance: Optional[float] = None, workers: Optional[int] = 1):
+        """Builds the graph between the enemies' points
+
+        :param enemies: list of enemies along the way
+        :param reduced: whether to plan on the reduced visibility graph, see `calculate_path`
+        :param black_hole_tolerance: see `calculate_path`
+        :param workers: amount of processes checking the graph's edges, None for one per core
+        """
+        self.reduced = not any(isinstance(enemy, Radar) for enemy in enemies) if reduced is None else reduced
+        self.black_hole_tolerance = black_hole_tolerance
+        self._set_enemies(enemies)
+
+        with profiling.phase('legal edges'):
+            vertex_tables = create_legal_edges.get_vertex_tables(self.nodes, enemies, self._provenance)
+            self._first, self._second, self._lengths = create_legal_edges.get_legal_edge_arrays(
+                self.coordinates, enemies, index=self.index, vertex_tables=vertex_tables,
+                pair_filter=self._pair_filter, workers=workers)
+        with profiling.phase('exposures'):
+            self._exposures = create_graph.get_edge_exposures(self.coordinates[self._first],
+                                                              self.coordinates[self._second], enemies)
+
+    def _set_enemies(self, enemies: List[Enemy]):
+        """Lists the nodes around the enemies, leaving the edges as they are"""
+        self.enemies = list(enemies)
+        self.index = ObstacleIndex(self.enemies)
+        with profiling.phase('points'):
+            points, self._provenance = create_graph.get_enemy_points(self.enemies, self.black_hole_tolerance)
+            nodes = list(dict.fromkeys(points))
+        with profiling.phase('prune'):
+            nodes = create_graph.prune_graph_nodes(nodes, 0, self.enemies, self._provenance, self.index)
+        self._pair_filter = None
+        if self.reduced:
+            with profiling.phase('reduce'):
+                nodes, self._pair_filter = create_graph.reduce_graph_nodes(nodes, 0, self.enemies, self._provenance)
+        self.nodes = nodes
+        self.coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float).reshape(-1, 2)
+        self._node_indices = {node: i for i, node in enumerate(nodes)}
+
+    def update(self, enemies: List[Enemy]):
+        """Changes the enemies planned around, only checking the edges the added and removed enemies may affect
+
+        Enemies are matched by identity, so moving an enemy means replacing it with a moved copy. The graph ends up
+        exactly as a planner built over `enemies` with the same options would build it: the same nodes, and the same
+        edges in the same order with the same lengths and exposures.
+        - Nodes that are points of added or removed enemies may get new constraints, all their pairs are checked.
+        - The other edges stay legal unless an added obstacle blocks them.
+        - The other pairs that weren't edges are only checked when near a removed obstacle, which may have been all
+          that blocked them.
+        - Exposures are only computed for the new edges, unless radars were added or removed.
+
+        :param enemies: the new list of enemies
+        """
+        previous, current = set(self.enemies), set(enemies)
+        added = [enemy for enemy in enemies if enemy not in previous]
+        removed = [enemy for enemy in self.enemies if enemy not in current]
+        changed = set(added + removed)
+        old_nodes, old_provenance, old_exposures = self.nodes, self._provenance, self._exposures
+        old_indices = self._node_indices
+        self._set_enemies(enemies)
+        node_count = len(self.nodes)
+
+        # Nodes no longer inside an obstacle, or no longer snapped onto another node, have never been checked
+        touched = np.array([node not in old_indices for node in self.nodes], dtype=bool)
+        for provenance in (old_provenance, self._provenance):
+            for point, origins in provenance.origins.items():
+                if point in self._node_indices and not changed.isdisjoint(origins):
+                    touched[self._node_indices[point]] = True
+
+        with profiling.phase('kept edges'):
+            remap = np.array([self._node_indices.get(node, -1) for node in old_nodes], dtype=np.int64)
+            first, second = remap[self._first], remap[self._second]
+            kept = (first >= 0) & (second >= 0)
+            kept[kept] = ~touched[first[kept]] & ~touched[second[kept]]
+            blockers = [enemy for enemy in added if isinstance(enemy, OBSTACLE_TYPES)]
+            if blockers:
+                kept[kept] = self._check(self.coordinates, first[kept], second[kept], blockers,
+                                         ObstacleIndex(blockers))[0]
+            first, second = np.minimum(first, second)[kept], np.maximum(first, second)[kept]
+            lengths = self._lengths[kept]
+            exposures = old_exposures[kept] if old_exposures is not None else None
+
+        with profiling.phase('candidate pairs'):
+            # Every pair with a touched node, once
+            touched_nodes = np.flatnonzero(touched)
+            candidate_first = np.repeat(touched_nodes, node_count)
+            candidate_second = np.tile(np.arange(node_count), len(touched_nodes))
+            once = (candidate_first != candidate_second) & \
+                (~touched[candidate_second] | (candidate_second > candidate_first))
+            candidate_first, candidate_second = candidate_first[once], candidate_second[once]
+
+            removed_obstacles = [enemy for enemy in removed if isinstance(enemy, OBSTACLE_TYPES)]
+            if removed_obstacles:
+                # Pairs of other nodes that weren't edges and pass near a removed obstacle
+                near_first, near_second = np.triu_indices(node_count, k=1)
+                near = ~touched[near_first] & ~touched[near_second]
+                near_first, near_second = near_first[near], near_second[near]
+                near = self._near(near_first, near_second, removed_obstacles)
+                near &= ~np.isin(near_first * node_count + near_second, first * node_count + second)
+                candidate_first = np.concatenate([candidate_first, near_first[near]])
+                candidate_second = np.concatenate([candidate_second, near_second[near]])
+
+            candidate_first, candidate_second = np.minimum(candidate_first, candidate_second), \
+                np.maximum(candidate_first, candidate_second)
+            if self._pair_filter is not None:
+                candidates = self._pair_filter(candidate_first, candidate_second)
+                candidate_first, candidate_second = candidate_first[candidates], candidate_second[candidates]
+            profiling.count('candidate pairs', len(candidate_first))
+
+        with profiling.phase('legal edges'):
+            legal, candidate_lengths = self._check(self.coordinates, candidate_first, candidate_second,
+                                                   self.enemies, self.index)
+            candidate_first, candidate_second = candidate_first[legal], candidate_second[legal]
+
+        with profiling.phase('exposures'):
+            # The exposure of an edge sums over all the radars, so it is only kept if no radar changed, as rounding
+            # depends on the amount of radars
+            if exposures is None or any(isinstance(enemy, Radar) for enemy in changed):
+                first_exposed, second_exposed = np.concatenate([first, candidate_first]), \
+                    np.concatenate([second, candidate_second])
+                exposures = create_graph.get_edge_exposures(self.coordinates[first_exposed],
+                                                            self.coordinates[second_exposed], self.enemies)
+            else:
+                exposures = np.concatenate([exposures, create_graph.get_edge_exposures(
+                    self.coordinates[candidate_first], self.coordinates[candidate_second], self.enemies)])
+
+        # Edges in the order `get_legal_edge_arrays` gives them
+        first = np.concatenate([first, candidate_first])
+        second = np.concatenate([second, candidate_second])
+        order = np.argsort(first * node_count + second, kind='stable')
+        self._first, self._second = first[order], second[order]
+        self._lengths = np.concatenate([lengths, candidate_lengths[legal]])[order]
+        self._exposures = None if exposures is None else exposures[order]
+
+    def add_enemy(self, enemy: Enemy):
+        """Adds an enemy to plan around, see `update`"""
+        self.update(self.enemies + [enemy])
+
+    def remove_enemy(self, enemy: Enemy):
+        """Stops planning around an enemy, see `update`"""
+        self.update([other for other in self.enemies if other is not enemy])
+
+    def move_enemy(self, enemy: Enemy, moved: Enemy):
+        """Replaces an enemy with a moved copy of it, keeping its place in the list of enemies"""
+        self.update([moved if other is enemy else other for other in self.enemies])
+
+    def _near(self, first: np.ndarray, second: np.ndarray, enemies: List[Enemy]) -> np.ndarray:
+        """Finds which edges have a bounding box overlapping the bounding box of any of the enemies"""
+        starts, ends = self.coordinates[first], self.coordinates[second]
+        lower, upper = np.minimum(starts, ends), np.maximum(starts, ends)
+        near = np.zeros(len(first), dtype=bool)
+        for min_x, min_y, max_x, max_y in (enemy.get_bounding_box() for enemy in enemies):
+            near |= (lower[:, 0] <= max_x) & (upper[:, 0] >= min_x) & (lower[:, 1] <= max_y) & (upper[:, 1] >= min_y)
+        return near
+
+    @staticmethod
+    def _check(coordinates: np.ndarray, first: np.ndarray, second: np.ndarray, enemies: List[Enemy],
+               index: ObstacleIndex) -> Tuple[np.ndarray, np.ndarray]:
+        """Checks pairs of nodes in batches, matching zone vertices by coordinates
+
+        :return: legality mask and lengths of the pairs
+        """
+        legal = np.zeros(len(first), dtype=bool)
+        lengths = np.empty(len(first), dtype=float)
+        for batch_start in range(0, len(first), create_legal_edges.BATCH_SIZE):
+            batch = slice(batch_start, batch_start + create_legal_edges.BATCH_SIZE)
+            legal[batch], lengths[batch] = edge_checker.check_edges_batch(coordinates[first[batch]],
+                                                                          coordinates[second[batch]], enemies, index)
+        return legal, lengths
+
+    def connect(self, points: List[Coordinate]) -> CSRGraph:
+        """Builds the graph with the given points added, leaving the planner's graph as is
+
+        :param points: coordinates paths start or end at, points already in the graph keep their node
+        :return: the planner's graph with the new points and the points' legal edges
+        """
+        points = list(dict.fromkeys(points))
+        new_points = [point for point in points if point not in self._node_indices]
+        static_count = len(self.nodes)
+        new_indices = dict(zip(new_points, range(static_count, static_count + len(new_points))))
+        terminals = np.array([self._node_indices.get(point, new_indices.get(point)) for point in points],
+                             dtype=np.int64)
+        coordinates = np.vstack([self.coordinates, np.array([(c.x, c.y) for c in new_points],
+                                                            dtype=float).reshape(-1, 2)])
+
+        # Every point to every other node of the graph, then the points between themselves
+        others = np.setdiff1d(np.arange(static_count), terminals)
+        between_first, between_second = np.triu_indices(len(terminals), k=1)
+        first = np.concatenate([np.repeat(terminals, len(others)), terminals[between_first]])
+        second = np.concatenate([np.tile(others, len(terminals)), terminals[between_second]])
+        in_graph = (first < static_count) & (second < static_count)
+        if self._pair_filter is None:
+            # Pairs of nodes of the graph are checked already
+            candidates = ~in_graph
+        else:
+            # Paths start and end at the points, so only the other end of their edges must be tangent to obstacles
+            to_others = np.arange(len(first)) < len(terminals) * len(others)
+            candidates = np.ones(len(first), dtype=bool)
+            candidates[to_others] = self._pair_filter.kept_nodes[second[to_others]] & \
+                self._pair_filter.tangent_towards(second[to_others], coordinates[first[to_others]])
+            candidates[in_graph] &= ~self._pair_filter(first[in_graph], second[in_graph])
+        first, second = first[candidates], second[candidates]
+        profiling.count('candidate pairs', len(first))
+
+        # Points may be zone vertices too, so vertices are matched by coordinates
+        legal, lengths = self._check(coordinates, first, second, self.enemies, self.index)
+        first, second, lengths = first[legal], second[legal], lengths[legal]
+
+        exposures = None
+        if self._exposures is not None:
+            exposures = np.concatenate([self._exposures, create_graph.get_edge_exposures(
+                coordinates[first], coordinates[second], self.enemies)])
+        return CSRGraph(self.nodes + new_points, np.concatenate([self._first, first]),
+                        np.concatenate([self._second, second]), np.concatenate([self._lengths, lengths]), exposures)
+
+    def plan(self, source: Coordinate, targets: List[Coordinate], allowed_detection: float = 0,
+             relax_detection: bool = False) -> List[Coordinate]:
+        """Calculates a path from the source through all targets without exceeding the allowed radar detection
+
+        :param source: source coordinate of the spaceship
+        :param targets: coordinates to visit
+        :param allowed_detection: maximum allowed distance of radar detection
+        :param relax_detection: see `calculate_path`
+        :return: list of calculated path waypoints
+        """
+        with profiling.phase('connect'):
+            graph = self.connect([source] + targets)
+        with profiling.phase('search'):
+            return plan_path(graph, source, targets, allowed_detection, relax_detection)
+
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    def number_of_edges(self) -> int:
+        return len(self._first)
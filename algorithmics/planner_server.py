@@ -0,0 +1,116 @@
+"""Serves batches of path queries over one scenario's enemies from a single warm `Planner`
+
+The graph between the enemies' points is built once at startup, every query then only connects its own points.
+
+Run from the repository root:
+    python -m algorithmics.planner_server resources/scenarios/<group>/scenario_8.json --port 7325
+
+POST /plan with a JSON body such as
+    {"queries": [{"source": [0, 0], "targets": [[10, 5]], "allowed_detection": 0}]}
+answers, in the order of the queries,
+    {"results": [{"path": [[0, 0], [3, 4], [10, 5]], "length": 11.7}]}
+with {"error": "..."} in place of the path of queries that failed, e.g. when no path fits in the allowed detection.
+Queries may set "relax_detection" to get the least detected path instead. GET /health answers the size of the graph.
+"""
+import argparse
+import json
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict
+
+import networkx as nx
+
+from algorithmics.planner import Planner
+from algorithmics.utils.scenario_loader import load_scenario, parse_coordinate
+
+
+def answer_queries(planner: Planner, queries: List[Dict]) -> List[Dict]:
+    """Plans a batch of queries, e.g. as received by the server
+
+    :param planner: planner over the scenario's enemies
+    :param queries: dictionaries holding the `source`, the `targets` and optionally the `allowed_detection` and
+        `relax_detection`
+    :return: one dictionary per query, holding the `path` and its `length`, or the `error` that prevented planning
+    """
+    results = []
+    for query in queries:
+        try:
+            source = parse_coordinate(query['source'])
+            targets = [parse_coordinate(target) for target in query['targets']]
+            path = planner.plan(source, targets, query.get('allowed_detection', 0),
+                                bool(query.get('relax_detection', False)))
+        except (KeyError, IndexError, TypeError, ValueError, nx.NetworkXNoPath) as e:
+            results.append({'error': f'{type(e).__name__}: {e}'})
+            continue
+        results.append({'path': [(c.x, c.y) for c in path],
+                        'length': sum(start.distance_to(end) for start, end in zip(path, path[1:]))})
+    return results
+
+
+class PlannerRequestHandler(BaseHTTPRequestHandler):
+    # Set on the server's class by `serve`
+    planner: Planner = None
+
+    def do_GET(self):
+        if self.path != '/health':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        self._send_json({'nodes': self.planner.number_of_nodes(), 'edges': self.planner.number_of_edges()})
+
+    def do_POST(self):
+        if self.path != '/plan':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            queries = body['queries']
+        except (ValueError, KeyError, TypeError):
+            self.send_error(HTTPStatus.BAD_REQUEST, 'Expected a JSON object with a list of queries')
+            return
+        self._send_json({'results': answer_queries(self.planner, queries)})
+
+    def _send_json(self, content: Dict):
+        data = json.dumps(content).encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(planner: Planner, host: str = '127.0.0.1', port: int = 7325) -> ThreadingHTTPServer:
+    """Creates a server answering queries with the planner, call `serve_forever` on it to start serving
+
+    :param planner: planner over the scenario's enemies
+    :param host: address to listen on
+    :param port: port to listen on, 0 for any free port
+    :return: the server
+    """
+    handler = type('BoundPlannerRequestHandler', (PlannerRequestHandler,), {'planner': planner})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenario', help="scenario JSON whose enemies are planned around, its source and targets "
+                                         "are ignored")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7325)
+    parser.add_argument('--workers', type=int, default=1, help='processes checking the edges of the graph at startup')
+    args = parser.parse_args()
+
+    _, _, _, enemies = load_scenario(args.scenario)
+    start_time = time.perf_counter()
+    planner = Planner(enemies, workers=args.workers)
+    print(f'Built a graph of {planner.number_of_nodes()} nodes and {planner.number_of_edges()} edges in '
+          f'{time.perf_counter() - start_time:.2f}s, serving on http://{args.host}:{args.port}')
+    server = serve(planner, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import heapq
+from typing import List
+
+import numpy as np
+
+from algorithmics.utils import profiling, jobs
+from algorithmics.utils.csr_graph import CSRGraph
+from algorithmics.utils.lazy_import import lazy_import
+
+nx = lazy_import('networkx')
+
+# Slack allowed on the detection budget, absorbs rounding of the chord lengths
+EXPOSURE_TOLERANCE = 1e-9
+# Labels expanded between checks of whether the running job was cancelled
+CHECKPOINT_INTERVAL = 4096
+
+
+def radar_constrained_path(graph: CSRGraph, source: int, target: int, allowed_detection: float,
+                           relax_detection: bool = False) -> List[int]:
+    """Finds the shortest path whose length inside radar coverage doesn't exceed the allowed detection
+
+    Label-setting search over (length, exposure) labels: a node keeps only labels not dominated by another label of
+    the same node (shorter and less exposed). Labels are expanded by length plus the exact remaining length ignoring
+    radars, and dropped early when even the least exposed way to the target would exceed the budget.
+
+    When no path fits in the allowed detection (e.g. the target itself is inside radar coverage), there is no path,
+    unless `relax_detection` is set: the budget is then raised to the least detection possible, so the shortest
+    among the least detected paths is returned.
+
+    :param graph: graph with edge exposures
+    :param source: index of the source node
+    :param target: index of the target node
+    :param allowed_detection: maximal total length allowed inside radar coverage
+    :param relax_detection: whether to return the least detected path when none fits in the allowed detection
+    :return: indices of the nodes along the path, starting at `source` and ending at `target`
+    :raises nx.NetworkXNoPath: if the nodes aren't connected, or no path fits in the allowed detection and it isn't
+        relaxed
+    """
+    exposures = graph.exposures if graph.exposures is not None else np.zeros_like(graph.weights)
+
+    # Exact lower bounds on what is left to reach the target, from reverse searches
+    length_to_target, _ = graph.shortest_paths_from(target)
+    exposure_to_target, _ = graph.shortest_paths_from(target, weights=exposures)
+    if np.isinf(exposure_to_target[source]):
+        raise nx.NetworkXNoPath(f'No path between {graph.nodes[source]} and {graph.nodes[target]}.')
+    least_detection = float(exposure_to_target[source])
+    if least_detection > allowed_detection + EXPOSURE_TOLERANCE and not relax_detection:
+        raise nx.NetworkXNoPath(f'No path between {graph.nodes[source]} and {graph.nodes[target]} within the allowed '
+                                f'detection of {allowed_detection}, the least detected path is detected for '
+                                f'{least_detection:.6g}.')
+    budget = max(allowed_detection, least_detection) + EXPOSURE_TOLERANCE
+
+    label_nodes = [source]
+    label_lengths = [0.0]
+    label_exposures = [0.0]
+    label_parents = [-1]
+    alive = [True]
+    node_labels: List[List[int]] = [[] for _ in graph.nodes]
+    node_labels[source].append(0)
+    heap = [(float(length_to_target[source]), 0.0, 0)]
+
+    expansions = 0
+    while heap:
+        _, _, label = heapq.heappop(heap)
+        if not alive[label]:
+            continue
+        expansions += 1
+        if expansions % CHECKPOINT_INTERVAL == 0:
+            jobs.checkpoint()
+        node = label_nodes[label]
+        profiling.count('constrained search expansions')
+        if node == target:
+            path = [label]
+            while label_parents[path[-1]] >= 0:
+                path.append(label_parents[path[-1]])
+            return [label_nodes[i] for i in reversed(path)]
+
+        edges = slice(graph.indptr[node], graph.indptr[node + 1])
+        neighbours = graph.indices[edges]
+        lengths = label_lengths[label] + graph.weights[edges]
+        neighbour_exposures = label_exposures[label] + exposures[edges]
+
+        # Drop extensions that cannot reach the target within the budget
+        feasible = neighbour_exposures + exposure_to_target[neighbours] <= budget
+        for neighbour, length, exposure in zip(neighbours[feasible].tolist(), lengths[feasible].tolist(),
+                                               neighbour_exposures[feasible].tolist()):
+            existing = node_labels[neighbour]
+            if any(label_lengths[other] <= length and label_exposures[other] <= exposure for other in existing):
+                continue
+
+            # The new label may dominate some of the existing ones
+            kept = []
+            for other in existing:
+                if length <= label_lengths[other] and exposure <= label_exposures[other]:
+                    alive[other] = False
+                else:
+                    kept.append(other)
+
+            new_label = len(label_nodes)
+            label_nodes.append(neighbour)
+            label_lengths.append(length)
+            label_exposures.append(exposure)
+            label_parents.append(label)
+            alive.append(True)
+            kept.append(new_label)
+            node_labels[neighbour] = kept
+            heapq.heappush(heap, (length + float(length_to_target[neighbour]), exposure, new_label))
+
+    raise nx.NetworkXNoPath(f'No path between {graph.nodes[source]} and {graph.nodes[target]}.')
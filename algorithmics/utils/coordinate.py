@@ -1,4 +1,17 @@
 import math
+from typing import Union
+
+# Size of the grid cells coordinates are snapped to, coordinates in the same cell on both axes are considered equal
+TOLERANCE = 1e-6
+
+
+def quantize(value: float) -> Union[int, float]:
+    """Snaps a value to the grid of `TOLERANCE` sized cells used for coordinate equality and hashing
+
+    Values with no cell (infinite, NaN, or overflowing once divided by the tolerance) are returned as they are.
+    """
+    cell = value / TOLERANCE
+    return round(cell) if math.isfinite(cell) else value
 
 
 class Coordinate:
@@ -50,23 +63,44 @@ class Coordinate:
 
     >>> str(c3), repr(c3)
     ('Coordiante(x=1.0, y=4.0)', 'Coordinate(x=1.0, y=4.0)')
+
+    Equality & Hashing
+    ==================
+
+    Both snap the coordinate to a grid of `TOLERANCE` sized cells, so equal coordinates always share a hash:
+
+    >>> Coordinate(1, 2) == Coordinate(1 + 1e-9, 2)
+    True
+    >>> hash(Coordinate(1, 2)) == hash(Coordinate(1 + 1e-9, 2))
+    True
     """
 
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float) -> None:
         """Initializes a coordinate given its `x`, `y` values
 
         :param x: x value of the coordinate
         :param y: y value of the coordinate
         """
-        super().__init__()
-
         self.x = x
         self.y = y
 
     def __eq__(self, o: object) -> bool:
         if not isinstance(o, Coordinate):
             return False
-        return math.fabs(self.x - o.x) <= 1e-6 and math.fabs(self.y - o.y) <= 1e-6
+        # Cheap answers first, only coordinates closer than the tolerance can share a grid cell. Most comparisons
+        # (e.g. `in zone.boundary` scans) are misses, which stop at the first axis
+        if self.x == o.x and self.y == o.y:
+            return True
+        # Written so that NaN differences (NaN or infinite coordinates) fail the bounds too
+        dx = self.x - o.x
+        if not -TOLERANCE <= dx <= TOLERANCE:
+            return False
+        dy = self.y - o.y
+        if not -TOLERANCE <= dy <= TOLERANCE:
+            return False
+        return quantize(self.x) == quantize(o.x) and quantize(self.y) == quantize(o.y)
 
     def __neg__(self) -> 'Coordinate':
         return Coordinate(-self.x, -self.y)
@@ -140,7 +174,7 @@ class Coordinate:
         return Coordinate(x, y)
 
     def __hash__(self) -> int:
-        return hash(self.x) ^ hash(self.y)
+        return hash((quantize(self.x), quantize(self.y)))
 
     def shifted(self, distance: float, bearing: float) -> 'Coordinate':
         dx = distance * math.cos(bearing)
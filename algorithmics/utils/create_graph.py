@@ -1,18 +1,378 @@
-from typing import List
+import math
+from typing import List, Optional, Tuple
 
-import networkx as nx
+import numpy as np
 
 from algorithmics import edge_checker, create_legal_edges
 from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.black_hole import BlackHole
 from algorithmics.enemy.enemy import Enemy
-from algorithmics.utils.coordinate import Coordinate
+from algorithmics.enemy.radar import Radar
+from algorithmics.utils import geometry, profiling, jobs
+from algorithmics.utils.coordinate import Coordinate, TOLERANCE as COORDINATE_TOLERANCE
+from algorithmics.utils.csr_graph import CSRGraph
+from algorithmics.utils.graph_cache import GraphCache, scenario_key
+from algorithmics.utils.lazy_import import lazy_import
+from algorithmics.utils.node_provenance import NodeProvenance
+from algorithmics.utils.obstacle_index import ObstacleIndex
+from algorithmics.utils.reduced_graph import ReducedGraphFilter
+from algorithmics.utils.tangent_graph import TangentGraph, candidate_tangents, circle_points, arc_corners
 
+nx = lazy_import('networkx')
 
-def init_graph(start: Coordinate, end: Coordinate, enemies: List):
+
+def init_graph(start: Coordinate, end: Coordinate, enemies: List, batch: bool = True, workers: Optional[int] = 1,
+               cache: Optional[GraphCache] = None):
+    provenance = NodeProvenance()
+    with profiling.phase('points'):
+        points = [start, end]
+        for enemy in enemies:
+            enemy_points = enemy.get_points()
+            provenance.add_enemy(enemy, enemy_points)
+            points += enemy_points
+
+    # Same key as `init_csr_graph` builds the same graph with, so both share cache entries
+    key = None if cache is None else scenario_key(start, [end], enemies, reduced=False, black_hole_tolerance=None)
+    cached_graph = None if cache is None else cache.load(key)
+    if cached_graph is not None:
+        profiling.count('cached graphs')
+        main_graph = cached_graph.to_networkx()
+        main_graph.graph.update(provenance=provenance, obstacle_tests=0, pruned_obstacle_tests=0)
+        return main_graph
+
+    index = ObstacleIndex(enemies)
     main_graph = nx.Graph()
-    main_graph.add_node(start)
-    main_graph.add_node(end)
-    for enemy in enemies:
-        main_graph.add_nodes_from(enemy.get_points())
-    create_legal_edges.get_legal_edges(main_graph, enemies)
+    with profiling.phase('prune'):
+        main_graph.add_nodes_from(prune_graph_nodes(list(dict.fromkeys(points)), len(dict.fromkeys([start, end])),
+                                                    enemies, provenance, index))
+    profiling.count('nodes', main_graph.number_of_nodes())
+    with profiling.phase('legal edges'):
+        if batch:
+            create_legal_edges.get_legal_edges_batch(main_graph, enemies, index=index, provenance=provenance,
+                                                     workers=workers)
+        else:
+            create_legal_edges.get_legal_edges(main_graph, enemies, index=index, provenance=provenance)
+    profiling.count('edges', main_graph.number_of_edges())
+    main_graph.graph['provenance'] = provenance
+    main_graph.graph['obstacle_tests'] = index.tests
+    main_graph.graph['pruned_obstacle_tests'] = index.pruned_tests
+    if cache is not None:
+        cache.save(key, CSRGraph.from_networkx(main_graph))
     return main_graph
+
+
+def get_enemy_points(enemies: List, black_hole_tolerance: Optional[float] = None) \
+        -> Tuple[List[Coordinate], NodeProvenance]:
+    """Lists the points of all enemies, which the graph bends around
+
+    :param enemies: list of enemies along the way
+    :param black_hole_tolerance: maximal extra length a path may take going around a black hole, see `init_csr_graph`
+    :return: the points, possibly with duplicates, and the enemies every point came from
+    """
+    provenance = NodeProvenance()
+    points = []
+    for enemy in enemies:
+        if isinstance(enemy, BlackHole) and black_hole_tolerance is not None:
+            enemy_points = enemy.get_points(tolerance=black_hole_tolerance)
+        else:
+            enemy_points = enemy.get_points()
+        provenance.add_enemy(enemy, enemy_points)
+        points += enemy_points
+    return points, provenance
+
+
+def get_graph_nodes(start: Coordinate, targets: List[Coordinate], enemies: List,
+                    black_hole_tolerance: Optional[float] = None) -> Tuple[List[Coordinate], NodeProvenance]:
+    """Lists the nodes of the visibility graph: the source, the targets and the enemies' points
+
+    :param start: source coordinate
+    :param targets: target coordinates
+    :param enemies: list of enemies along the way
+    :param black_hole_tolerance: maximal extra length a path may take going around a black hole, see `init_csr_graph`
+    :return: deduplicated nodes, starting with the source and the targets, and the enemies every node came from
+    """
+    points, provenance = get_enemy_points(enemies, black_hole_tolerance)
+    # Deduplicate exactly like networkx would, keeping insertion order
+    return list(dict.fromkeys([start] + targets + points)), provenance
+
+
+def prune_graph_nodes(nodes: List[Coordinate], terminals: int, enemies: List, provenance: NodeProvenance,
+                      index: Optional[ObstacleIndex] = None) -> List[Coordinate]:
+    """Drops the nodes no legal edge can reach, before any pair of nodes is considered
+
+    Points inside other obstacles (e.g. points around a black hole overlapping an asteroid zone) are dropped. Points
+    closer than the coordinate tolerance to a previous node, but not equal to it because they fall in neighbouring
+    cells of the tolerance grid, are snapped onto it: the kept node comes from the enemies of both.
+
+    :param nodes: deduplicated nodes, as given by `get_graph_nodes`
+    :param terminals: amount of nodes at the start of `nodes` that are kept anyway (the source and the targets)
+    :param enemies: list of enemies along the way
+    :param provenance: enemies every node came from, updated with the snapped nodes
+    :param index: obstacle index built over `enemies`
+    :return: the kept nodes, in the same order
+    """
+    if index is None:
+        index = ObstacleIndex(enemies)
+    coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float).reshape(-1, 2)
+    inside = index.points_inside(coordinates)
+    inside[:terminals] = False
+
+    kept_nodes = []
+    # Kept nodes by tolerance grid cell, nodes are deduplicated so near duplicates are in neighbouring cells
+    cells = {}
+    for i, (cell_x, cell_y) in enumerate(np.round(coordinates / COORDINATE_TOLERANCE).astype(np.int64).tolist()):
+        if inside[i]:
+            continue
+        node = nodes[i]
+        duplicate = None
+        for neighbour in ((cell_x + dx, cell_y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+            for other in cells.get(neighbour, ()):
+                if abs(other.x - node.x) <= COORDINATE_TOLERANCE and abs(other.y - node.y) <= COORDINATE_TOLERANCE:
+                    duplicate = other
+        if duplicate is not None and i >= terminals:
+            provenance.merge(node, duplicate)
+            continue
+        cells.setdefault((cell_x, cell_y), []).append(node)
+        kept_nodes.append(node)
+
+    profiling.count('pruned nodes', len(nodes) - len(kept_nodes))
+    return kept_nodes
+
+
+def reduce_graph_nodes(nodes: List[Coordinate], terminals: int, enemies: List, provenance: NodeProvenance) \
+        -> Tuple[List[Coordinate], ReducedGraphFilter]:
+    """Drops the nodes the reduced visibility graph doesn't need
+
+    :param nodes: nodes as given by `prune_graph_nodes`
+    :param terminals: amount of nodes at the start of `nodes` that are kept anyway (the source and the targets)
+    :param enemies: list of enemies along the way
+    :param provenance: enemies every node came from
+    :return: the kept nodes, and the filter of the pairs of them worth checking
+    """
+    kept_nodes = ReducedGraphFilter(nodes, enemies, provenance, range(terminals)).kept_nodes
+    nodes = [node for node, kept in zip(nodes, kept_nodes) if kept]
+    return nodes, ReducedGraphFilter(nodes, enemies, provenance, range(terminals))
+
+
+def init_csr_graph(start: Coordinate, targets: List[Coordinate], enemies: List, reduced: bool = False,
+                   black_hole_tolerance: Optional[float] = None, workers: Optional[int] = 1,
+                   cache: Optional[GraphCache] = None) -> CSRGraph:
+    """Builds the same graph as `init_graph`, in the compact array-backed representation
+
+    :param start: source coordinate
+    :param targets: target coordinates, all of them are added as nodes
+    :param enemies: list of enemies along the way
+    :param reduced: whether to build the reduced visibility graph, dropping reflex vertices and edges that aren't
+        tangent to the obstacles at both ends. Shortest paths keep the same length with far fewer nodes and edges.
+    :param black_hole_tolerance: maximal extra length a path may take going around a black hole, sets the amount of
+        points around every black hole instead of the fixed default
+    :param workers: amount of processes checking candidate edges, None for one per core
+    :param cache: on-disk cache to load the graph from instead of building it, graphs built are saved to it
+    :return: visibility graph between the source, the targets and the enemies' points
+    """
+    terminals = len(dict.fromkeys([start] + targets))
+    with profiling.phase('points'):
+        nodes, provenance = get_graph_nodes(start, targets, enemies, black_hole_tolerance)
+
+    if cache is not None:
+        key = scenario_key(start, targets, enemies, reduced=reduced, black_hole_tolerance=black_hole_tolerance)
+        with profiling.phase('load cached graph'):
+            graph = cache.load(key)
+        if graph is not None:
+            profiling.count('cached graphs')
+            graph.provenance = provenance
+            graph.obstacle_tests = graph.pruned_obstacle_tests = 0
+            return graph
+
+    index = ObstacleIndex(enemies)
+    with profiling.phase('prune'):
+        nodes = prune_graph_nodes(nodes, terminals, enemies, provenance, index)
+    pair_filter = None
+    if reduced:
+        with profiling.phase('reduce'):
+            nodes, pair_filter = reduce_graph_nodes(nodes, terminals, enemies, provenance)
+    coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float).reshape(-1, 2)
+    profiling.count('nodes', len(nodes))
+
+    jobs.checkpoint('checking edges')
+    with profiling.phase('legal edges'):
+        vertex_tables = create_legal_edges.get_vertex_tables(nodes, enemies, provenance)
+        first, second, lengths = create_legal_edges.get_legal_edge_arrays(coordinates, enemies, index=index,
+                                                                          vertex_tables=vertex_tables,
+                                                                          pair_filter=pair_filter, workers=workers)
+    profiling.count('edges', len(first))
+    with profiling.phase('exposures'):
+        exposures = get_edge_exposures(coordinates[first], coordinates[second], enemies)
+    graph = CSRGraph(nodes, first, second, lengths, exposures)
+    graph.provenance = provenance
+    graph.obstacle_tests = index.tests
+    graph.pruned_obstacle_tests = index.pruned_tests
+    if cache is not None:
+        with profiling.phase('save graph'):
+            cache.save(key, graph)
+    return graph
+
+
+def init_tangent_graph(start: Coordinate, targets: List[Coordinate], enemies: List,
+                       reduced: bool = False) -> TangentGraph:
+    """Builds a visibility graph where black holes are exact circles, see `TangentGraph`
+
+    Tangents and arcs keep a relative clearance of `geometry.CLEARANCE` from the circles, which keeps them clear of the
+    polygons edges are checked against.
+
+    :param start: source coordinate
+    :param targets: target coordinates, all of them are added as nodes
+    :param enemies: list of enemies along the way
+    :param reduced: whether to reduce the edges between the other enemies' points, as in `init_csr_graph`
+    :return: visibility graph between the source, the targets, the other enemies' points and the tangent points
+    """
+    provenance = NodeProvenance()
+    points = []
+    for enemy in enemies:
+        if not isinstance(enemy, BlackHole):
+            enemy_points = enemy.get_points()
+            provenance.add_enemy(enemy, enemy_points)
+            points += enemy_points
+
+    nodes = list(dict.fromkeys([start] + targets + points))
+    terminals = range(len(dict.fromkeys([start] + targets)))
+    pair_filter = None
+    if reduced:
+        kept_nodes = ReducedGraphFilter(nodes, enemies, provenance, terminals).kept_nodes
+        nodes = [node for node, kept in zip(nodes, kept_nodes) if kept]
+        pair_filter = ReducedGraphFilter(nodes, enemies, provenance, terminals)
+    coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float).reshape(-1, 2)
+
+    index = ObstacleIndex(enemies)
+    vertex_tables = create_legal_edges.get_vertex_tables(nodes, enemies, provenance)
+    first, second, lengths = create_legal_edges.get_legal_edge_arrays(coordinates, enemies, index=index,
+                                                                      vertex_tables=vertex_tables,
+                                                                      pair_filter=pair_filter)
+
+    holes = [enemy for enemy in enemies if isinstance(enemy, BlackHole)]
+    centers = np.array([(hole.center.x, hole.center.y) for hole in holes], dtype=float).reshape(-1, 2)
+    radii = np.array([hole.radius * (1 + geometry.CLEARANCE) for hole in holes], dtype=float)
+
+    # Edges only need to avoid the polygon inscribed in a black hole, keep those avoiding the circle itself
+    clear = np.ones(len(first), dtype=bool)
+    for center, radius in zip(centers, radii):
+        clear &= geometry.segments_point_distance(coordinates[first], coordinates[second], center) >= radius
+    first, second, lengths = first[clear], second[clear], lengths[clear]
+
+    tangents = candidate_tangents(coordinates, centers, radii)
+    from_node = tangents.start_nodes >= 0
+    tangent_starts = np.empty((len(from_node), 2))
+    tangent_starts[from_node] = coordinates[tangents.start_nodes[from_node]]
+    tangent_starts[~from_node] = circle_points(centers[tangents.start_holes[~from_node]],
+                                               radii[tangents.start_holes[~from_node]],
+                                               tangents.start_angles[~from_node])
+    tangent_ends = circle_points(centers[tangents.end_holes], radii[tangents.end_holes], tangents.end_angles)
+    zone_vertices = {zone: (np.where(from_node, table[tangents.start_nodes], -1), np.full(len(from_node), -1))
+                     for zone, table in vertex_tables.items()}
+    legal, tangent_lengths = edge_checker.check_edges_batch(tangent_starts, tangent_ends, enemies, index,
+                                                            zone_vertices)
+
+    # Every legal tangent adds a node where it touches each black hole
+    hole_nodes = [[] for _ in holes]
+    segments = [(first, second, lengths)]
+    for i in np.flatnonzero(legal).tolist():
+        ends = []
+        for hole, angle, point in ((tangents.start_holes[i], tangents.start_angles[i], tangent_starts[i]),
+                                   (tangents.end_holes[i], tangents.end_angles[i], tangent_ends[i])):
+            if hole < 0:
+                ends.append(int(tangents.start_nodes[i]))
+                continue
+            hole_nodes[hole].append((float(angle) % (2 * math.pi), len(nodes)))
+            ends.append(len(nodes))
+            nodes.append(Coordinate(float(point[0]), float(point[1])))
+        segments.append((np.array(ends[:1]), np.array(ends[1:]), tangent_lengths[i:i + 1]))
+
+    # Candidate arcs between consecutive tangent points, counter-clockwise. With only two points around a black
+    # hole, both arcs between them are candidates and the shorter legal one is kept.
+    arc_ends, arc_corner_lists = [], []
+    for h, around in enumerate(hole_nodes):
+        around.sort()
+        for j in range(len(around) if len(around) > 1 else 0):
+            (angle, u), (next_angle, v) = around[j], around[(j + 1) % len(around)]
+            sweep = (next_angle - angle) % (2 * math.pi)
+            arc_ends.append((u, v))
+            arc_corner_lists.append(arc_corners(centers[h], radii[h], angle, sweep))
+
+    coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float).reshape(-1, 2)
+    arcs = {}
+    exposures_parts = [get_edge_exposures(coordinates[np.concatenate([part[0] for part in segments])],
+                                          coordinates[np.concatenate([part[1] for part in segments])], enemies)]
+    if arc_ends:
+        # Check every arc as the polyline flown along it
+        polylines = [np.concatenate([coordinates[[u]], corners, coordinates[[v]]])
+                     for (u, v), corners in zip(arc_ends, arc_corner_lists)]
+        piece_starts = np.concatenate([polyline[:-1] for polyline in polylines])
+        piece_ends = np.concatenate([polyline[1:] for polyline in polylines])
+        arc_offsets = np.cumsum([0] + [len(polyline) - 1 for polyline in polylines[:-1]])
+        piece_legal, piece_lengths = edge_checker.check_edges_batch(piece_starts, piece_ends, enemies, index)
+        arc_legal = np.logical_and.reduceat(piece_legal, arc_offsets)
+        arc_lengths = np.add.reduceat(piece_lengths, arc_offsets)
+        piece_exposures = get_edge_exposures(piece_starts, piece_ends, enemies)
+        arc_exposures = None if piece_exposures is None else np.add.reduceat(piece_exposures, arc_offsets)
+
+        kept_arcs = {}
+        for a in np.flatnonzero(arc_legal).tolist():
+            u, v = arc_ends[a]
+            pair = (min(u, v), max(u, v))
+            if pair not in kept_arcs or arc_lengths[a] < arc_lengths[kept_arcs[pair]]:
+                kept_arcs[pair] = a
+        kept = np.array(sorted(kept_arcs.values()), dtype=np.int64)
+        for a in kept.tolist():
+            arcs[arc_ends[a]] = [Coordinate(float(x), float(y)) for x, y in arc_corner_lists[a]]
+        segments.append((np.array([arc_ends[a][0] for a in kept.tolist()], dtype=np.int64),
+                         np.array([arc_ends[a][1] for a in kept.tolist()], dtype=np.int64), arc_lengths[kept]))
+        if arc_exposures is not None:
+            exposures_parts.append(arc_exposures[kept])
+
+    exposures = None if exposures_parts[0] is None else np.concatenate(exposures_parts)
+    graph = TangentGraph(nodes, np.concatenate([part[0] for part in segments]).astype(np.int64),
+                         np.concatenate([part[1] for part in segments]).astype(np.int64),
+                         np.concatenate([part[2] for part in segments]), exposures, arcs)
+    graph.provenance = provenance
+    graph.obstacle_tests = index.tests
+    graph.pruned_obstacle_tests = index.pruned_tests
+    return graph
+
+
+def get_edge_exposures(starts: np.ndarray, ends: np.ndarray, enemies: List) -> Optional[np.ndarray]:
+    """Computes the length of every edge inside radar coverage
+
+    :param starts: (m, 2) array of edge start points
+    :param ends: (m, 2) array of edge end points
+    :param enemies: list of enemies along the way
+    :return: (m,) array of detected lengths, or None if there are no radars
+    """
+    radars = [enemy for enemy in enemies if isinstance(enemy, Radar)]
+    if not radars:
+        return None
+    centers = np.array([(radar.center.x, radar.center.y) for radar in radars], dtype=float)
+    radii = np.array([radar.radius for radar in radars], dtype=float)
+    return geometry.segments_circles_exposure(starts, ends, centers, radii)
+
+
+def get_detected_segments(path: List[Coordinate], enemies: List) -> List[Tuple[Coordinate, Coordinate]]:
+    """Finds the parts of a path inside radar coverage, e.g. to highlight them
+
+    :param path: waypoints of the path
+    :param enemies: list of enemies along the way
+    :return: start and end of every detected part, in the order of the path. A part spanning a waypoint is split
+        in two there.
+    """
+    radars = [enemy for enemy in enemies if isinstance(enemy, Radar)]
+    if not radars or len(path) < 2:
+        return []
+    waypoints = np.array([(c.x, c.y) for c in path], dtype=float)
+    starts, ends = waypoints[:-1], waypoints[1:]
+    centers = np.array([(radar.center.x, radar.center.y) for radar in radars], dtype=float)
+    radii = np.array([radar.radius for radar in radars], dtype=float)
+    segments, enter, leave = geometry.segments_circles_intervals(starts, ends, centers, radii)
+    directions = ends[segments] - starts[segments]
+    entries = starts[segments] + enter[:, None] * directions
+    exits = starts[segments] + leave[:, None] * directions
+    return [(Coordinate(*entry), Coordinate(*exit_point))
+            for entry, exit_point in zip(entries.tolist(), exits.tolist())]
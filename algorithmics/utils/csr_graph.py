@@ -0,0 +1,249 @@
+import heapq
+from typing import List, Tuple, Optional
+
+import numpy as np
+
+from algorithmics.utils import profiling, jobs
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.lazy_import import lazy_import
+
+nx = lazy_import('networkx')
+
+# Nodes settled by a search between checks of whether the running job was cancelled, every node relaxes all its edges
+CHECKPOINT_INTERVAL = 256
+
+
+class CSRGraph:
+    """Compact undirected graph over coordinates, stored as compressed sparse rows
+
+    Nodes are identified by their index in `nodes`. The neighbours of node `i` are
+    `indices[indptr[i]:indptr[i + 1]]` and the matching edge lengths are `weights[indptr[i]:indptr[i + 1]]`.
+    Every undirected edge is stored once in each direction. Scenarios with radars also keep the detected length of
+    every edge in `exposures`, aligned with `weights`.
+    """
+
+    def __init__(self, nodes: List[Coordinate], first: np.ndarray, second: np.ndarray, weights: np.ndarray,
+                 exposures: Optional[np.ndarray] = None):
+        """Builds the graph from a list of undirected edges
+
+        :param nodes: coordinates of the graph's nodes
+        :param first: node indices of one end of every edge
+        :param second: node indices of the other end of every edge
+        :param weights: length of every edge
+        :param exposures: length of every edge inside radar coverage, if the scenario has radars
+        """
+        self.nodes = nodes
+        self.coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float).reshape(-1, 2)
+
+        sources = np.concatenate([first, second]).astype(np.int32)
+        destinations = np.concatenate([second, first]).astype(np.int32)
+        both_weights = np.concatenate([weights, weights]).astype(float)
+
+        order = np.argsort(sources, kind='stable')
+        self.indices = destinations[order]
+        self.weights = both_weights[order]
+        self.exposures = None if exposures is None else \
+            np.concatenate([exposures, exposures]).astype(float)[order]
+        self.indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(nodes)), out=self.indptr[1:])
+
+        self._node_indices = {node: i for i, node in enumerate(nodes)}
+
+    @classmethod
+    def from_networkx(cls, graph: 'nx.Graph', weight: str = 'dist') -> 'CSRGraph':
+        """Converts a networkx graph whose nodes are coordinates
+
+        :param graph: graph to convert
+        :param weight: name of the edge attribute holding the edge length
+        :return: equivalent compact graph
+        """
+        nodes = list(graph.nodes)
+        node_indices = {node: i for i, node in enumerate(nodes)}
+        edges = list(graph.edges(data=True))
+        first = np.array([node_indices[u] for u, _, _ in edges], dtype=np.int32)
+        second = np.array([node_indices[v] for _, v, _ in edges], dtype=np.int32)
+        weights = np.array([data[weight] for _, _, data in edges], dtype=float)
+        has_exposure = len(edges) > 0 and all('exposure' in data for _, _, data in edges)
+        exposures = np.array([data['exposure'] for _, _, data in edges], dtype=float) if has_exposure else None
+        return cls(nodes, first, second, weights, exposures)
+
+    def to_networkx(self, weight: str = 'dist') -> 'nx.Graph':
+        """Converts the graph into a networkx graph whose nodes are coordinates
+
+        :param weight: name of the edge attribute to hold the edge length
+        :return: equivalent networkx graph
+        """
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes)
+        first, second, positions = self.edge_arrays()
+        if self.exposures is None:
+            graph.add_weighted_edges_from(zip([self.nodes[u] for u in first.tolist()],
+                                              [self.nodes[v] for v in second.tolist()],
+                                              self.weights[positions].tolist()), weight=weight)
+        else:
+            graph.add_edges_from((self.nodes[u], self.nodes[v], {weight: w, 'exposure': e})
+                                 for u, v, w, e in zip(first.tolist(), second.tolist(),
+                                                       self.weights[positions].tolist(),
+                                                       self.exposures[positions].tolist()))
+        return graph
+
+    def edge_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Lists every undirected edge once
+
+        :return: node indices of both ends of every edge, and the position of the edge in `indices`, `weights`
+            and `exposures`
+        """
+        sources = np.repeat(np.arange(len(self.nodes)), np.diff(self.indptr))
+        positions = np.flatnonzero(sources < self.indices)
+        return sources[positions], self.indices[positions], positions
+
+    @property
+    def edges(self) -> List[Tuple[Coordinate, Coordinate]]:
+        """Both ends of every undirected edge, like `nx.Graph.edges`"""
+        first, second, _ = self.edge_arrays()
+        return [(self.nodes[u], self.nodes[v]) for u, v in zip(first.tolist(), second.tolist())]
+
+    def edge_segments(self) -> np.ndarray:
+        """Coordinates of both ends of every undirected edge, in the order of `edges`
+
+        :return: array of (x1, y1, x2, y2) rows
+        """
+        first, second, _ = self.edge_arrays()
+        return np.hstack([self.coordinates[first], self.coordinates[second]])
+
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    def number_of_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def node_index(self, node: Coordinate) -> int:
+        """Finds the index of a node given its coordinate"""
+        return self._node_indices[node]
+
+    def _search(self, source: int, target: int = None, weights: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Runs A* from the source towards the target, or a full Dijkstra when no target is given
+
+        :param source: index of the source node
+        :param target: index of the target node, or None to reach every node
+        :param weights: edge weights aligned with `indices`, defaults to the edge lengths. The euclidean heuristic
+            is only used with the edge lengths.
+        :return: distance from the source and parent of every node settled by the search
+        """
+        if weights is None:
+            weights = self.weights
+        elif target is not None:
+            raise ValueError('A* towards a target is only supported with the edge lengths as weights')
+
+        if target is None:
+            heuristic = np.zeros(len(self.nodes))
+        else:
+            target_x, target_y = self.coordinates[target]
+            heuristic = np.sqrt((self.coordinates[:, 0] - target_x) ** 2 + (self.coordinates[:, 1] - target_y) ** 2)
+
+        distances = np.full(len(self.nodes), np.inf)
+        parents = np.full(len(self.nodes), -1, dtype=np.int64)
+        closed = np.zeros(len(self.nodes), dtype=bool)
+        distances[source] = 0.0
+        heap = [(float(heuristic[source]), source)]
+
+        settled = 0
+        while heap:
+            _, node = heapq.heappop(heap)
+            if closed[node]:
+                continue
+            if node == target:
+                break
+            closed[node] = True
+            settled += 1
+            if settled % CHECKPOINT_INTERVAL == 0:
+                jobs.checkpoint()
+
+            # Relax all the edges of the node at once
+            neighbours = self.indices[self.indptr[node]:self.indptr[node + 1]]
+            candidate_distances = distances[node] + weights[self.indptr[node]:self.indptr[node + 1]]
+            improved = candidate_distances < distances[neighbours]
+            neighbours, candidate_distances = neighbours[improved], candidate_distances[improved]
+            distances[neighbours] = candidate_distances
+            parents[neighbours] = node
+            for neighbour, priority in zip(neighbours.tolist(),
+                                           (candidate_distances + heuristic[neighbours]).tolist()):
+                heapq.heappush(heap, (priority, neighbour))
+
+        profiling.count('search expansions', int(np.count_nonzero(closed)))
+        return distances, parents
+
+    @staticmethod
+    def _trace_back(parents: np.ndarray, source: int, target: int) -> List[int]:
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parents[path[-1]]))
+        return path[::-1]
+
+    def a_star(self, source: int, target: int) -> List[int]:
+        """Finds the shortest path between two nodes using A*, with the euclidean distance to the target as heuristic
+
+        The heuristic is admissible as long as edge weights are at least the euclidean distance between their ends.
+
+        :param source: index of the source node
+        :param target: index of the target node
+        :return: indices of the nodes along the path, starting at `source` and ending at `target`
+        """
+        distances, parents = self._search(source, target)
+        if np.isinf(distances[target]):
+            raise nx.NetworkXNoPath(f'No path between {self.nodes[source]} and {self.nodes[target]}.')
+        return self._trace_back(parents, source, target)
+
+    def shortest_paths_from(self, source: int, weights: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Computes the shortest paths from one node to all the others using Dijkstra
+
+        :param source: index of the source node
+        :param weights: edge weights aligned with `indices`, defaults to the edge lengths
+        :return: distance from the source to every node (infinite if unreachable) and the parent of every node along
+            its shortest path, to be followed with `path_from_parents`
+        """
+        return self._search(source, weights=weights)
+
+    def edge_position(self, u: int, v: int) -> int:
+        """Finds the position of the edge from `u` to `v` in `indices`, `weights` and `exposures`"""
+        neighbours = self.indices[self.indptr[u]:self.indptr[u + 1]]
+        return int(self.indptr[u] + np.flatnonzero(neighbours == v)[0])
+
+    def path_exposure(self, path: List[int]) -> float:
+        """Computes the total length of a path inside radar coverage
+
+        :param path: indices of the nodes along the path
+        :return: detected length of the path, 0 if the graph has no exposures
+        """
+        if self.exposures is None:
+            return 0.0
+        return float(sum(self.exposures[self.edge_position(u, v)] for u, v in zip(path, path[1:])))
+
+    def path_from_parents(self, parents: np.ndarray, source: int, target: int) -> List[int]:
+        """Follows the parents computed by `shortest_paths_from` back from the target
+
+        :param parents: parents array returned by `shortest_paths_from(source)`
+        :param source: index of the source node
+        :param target: index of the target node
+        :return: indices of the nodes along the path, starting at `source` and ending at `target`
+        """
+        if target != source and parents[target] < 0:
+            raise nx.NetworkXNoPath(f'No path between {self.nodes[source]} and {self.nodes[target]}.')
+        return self._trace_back(parents, source, target)
+
+    def path_coordinates(self, path: List[int]) -> List[Coordinate]:
+        """Converts a path of node indices into the waypoints the spaceship flies through
+
+        :param path: indices of the nodes along the path
+        :return: coordinates along the path
+        """
+        return [self.nodes[i] for i in path]
+
+    def shortest_path(self, source: Coordinate, target: Coordinate) -> List[Coordinate]:
+        """Finds the shortest path between two coordinates of the graph
+
+        :param source: coordinate of the source node
+        :param target: coordinate of the target node
+        :return: coordinates along the path
+        """
+        return self.path_coordinates(self.a_star(self.node_index(source), self.node_index(target)))
@@ -0,0 +1,281 @@
+from typing import Tuple
+
+import numpy as np
+
+from algorithmics.utils.coordinate import TOLERANCE as COORDINATE_TOLERANCE
+
+# Relative distance kept between a circle and the polygons, tangents and arcs going around it, so they stay clear of
+# it despite rounding
+CLEARANCE = 1e-6
+# Sub-intervals shorter than this (in segment parameter units) are treated as a single point
+_INTERVAL_TOLERANCE = 1e-12
+
+
+def _cross(ax: np.ndarray, ay: np.ndarray, bx: np.ndarray, by: np.ndarray) -> np.ndarray:
+    return ax * by - ay * bx
+
+
+def polygon_edges(vertices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Splits a polygon into the start and end points of its sides
+
+    :param vertices: (k, 2) array of polygon vertices, the polygon is implicitly closed
+    :return: two (k, 2) arrays, the i-th side goes from `starts[i]` to `ends[i]`
+    """
+    return vertices, np.roll(vertices, -1, axis=0)
+
+
+def segments_point_distance(starts: np.ndarray, ends: np.ndarray, point: np.ndarray) -> np.ndarray:
+    """Computes the euclidean distance between every segment and a single point
+
+    :param starts: (m, 2) array of segment start points
+    :param ends: (m, 2) array of segment end points
+    :param point: (2,) array
+    :return: (m,) array of distances
+    """
+    direction = ends - starts
+    to_point = point - starts
+    length_squared = np.einsum('ij,ij->i', direction, direction)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.einsum('ij,ij->i', to_point, direction) / length_squared
+    t = np.clip(np.nan_to_num(t, nan=0.0), 0.0, 1.0)
+    closest = starts + t[:, None] * direction
+    return np.sqrt(np.einsum('ij,ij->i', point - closest, point - closest))
+
+
+def segments_intersect_segments(starts: np.ndarray, ends: np.ndarray,
+                                other_starts: np.ndarray, other_ends: np.ndarray) -> np.ndarray:
+    """Checks every segment in the first set against every segment of the second set
+
+    Touching (an endpoint lying on the other segment) and collinear overlap both count as intersection.
+
+    :param starts: (m, 2) array of segment start points
+    :param ends: (m, 2) array of segment end points
+    :param other_starts: (k, 2) array of segment start points
+    :param other_ends: (k, 2) array of segment end points
+    :return: (m, k) boolean array
+    """
+    ax, ay = starts[:, 0, None], starts[:, 1, None]
+    bx, by = ends[:, 0, None], ends[:, 1, None]
+    px, py = other_starts[None, :, 0], other_starts[None, :, 1]
+    qx, qy = other_ends[None, :, 0], other_ends[None, :, 1]
+
+    d1 = _cross(bx - ax, by - ay, px - ax, py - ay)
+    d2 = _cross(bx - ax, by - ay, qx - ax, qy - ay)
+    d3 = _cross(qx - px, qy - py, ax - px, ay - py)
+    d4 = _cross(qx - px, qy - py, bx - px, by - py)
+
+    crossing = (((d1 > 0) & (d2 < 0)) | ((d1 < 0) & (d2 > 0))) & \
+               (((d3 > 0) & (d4 < 0)) | ((d3 < 0) & (d4 > 0)))
+
+    def on_segment(ux, uy, vx, vy, wx, wy):
+        # w is known to be collinear with u-v, check it lies within the bounding box
+        return (np.minimum(ux, vx) <= wx) & (wx <= np.maximum(ux, vx)) & \
+               (np.minimum(uy, vy) <= wy) & (wy <= np.maximum(uy, vy))
+
+    touching = ((d1 == 0) & on_segment(ax, ay, bx, by, px, py)) | \
+               ((d2 == 0) & on_segment(ax, ay, bx, by, qx, qy)) | \
+               ((d3 == 0) & on_segment(px, py, qx, qy, ax, ay)) | \
+               ((d4 == 0) & on_segment(px, py, qx, qy, bx, by))
+
+    return crossing | touching
+
+
+def points_in_polygon(points: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+    """Checks which points lie strictly inside a polygon using ray casting
+
+    Points on the boundary may be classified either way, callers that care must check the boundary separately.
+
+    :param points: (m, 2) array of points
+    :param vertices: (k, 2) array of polygon vertices
+    :return: (m,) boolean array
+    """
+    edge_starts, edge_ends = polygon_edges(vertices)
+    px, py = points[:, 0, None], points[:, 1, None]
+    x0, y0 = edge_starts[None, :, 0], edge_starts[None, :, 1]
+    x1, y1 = edge_ends[None, :, 0], edge_ends[None, :, 1]
+
+    straddles = (y0 > py) != (y1 > py)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_at_py = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+    crossings = straddles & (px < x_at_py)
+    return np.count_nonzero(crossings, axis=1) % 2 == 1
+
+
+def points_on_polygon_boundary(points: np.ndarray, vertices: np.ndarray,
+                               tolerance: float = _INTERVAL_TOLERANCE) -> np.ndarray:
+    """Checks which points lie on the boundary of a polygon
+
+    :param points: (m, 2) array of points
+    :param vertices: (k, 2) array of polygon vertices
+    :param tolerance: maximal distance from a side to count as lying on it
+    :return: (m,) boolean array
+    """
+    edge_starts, edge_ends = polygon_edges(vertices)
+    on_boundary = np.zeros(len(points), dtype=bool)
+    for start, end in zip(edge_starts, edge_ends):
+        on_boundary |= segments_point_distance(np.broadcast_to(start, points.shape),
+                                               np.broadcast_to(end, points.shape), points) <= tolerance
+    return on_boundary
+
+
+def match_vertices(points: np.ndarray, vertices: np.ndarray, tolerance: float = COORDINATE_TOLERANCE) -> np.ndarray:
+    """Finds, for every point, the index of a polygon vertex equal to it
+
+    Equality follows `Coordinate.__eq__`: both axes must fall in the same cell of a `tolerance` sized grid.
+
+    :param points: (m, 2) array of points
+    :param vertices: (k, 2) array of polygon vertices
+    :param tolerance: grid cell size
+    :return: (m,) integer array holding the first matching vertex index, or -1 where there is none
+    """
+    point_cells = np.round(points / tolerance)
+    vertex_cells = np.round(vertices / tolerance)
+    equal = (point_cells[:, None, 0] == vertex_cells[None, :, 0]) & \
+            (point_cells[:, None, 1] == vertex_cells[None, :, 1])
+    return np.where(equal.any(axis=1), equal.argmax(axis=1), -1)
+
+
+def segments_intersect_polygon(starts: np.ndarray, ends: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+    """Checks which segments intersect a closed polygon (its boundary or its interior)
+
+    :param starts: (m, 2) array of segment start points
+    :param ends: (m, 2) array of segment end points
+    :param vertices: (k, 2) array of polygon vertices
+    :return: (m,) boolean array
+    """
+    edge_starts, edge_ends = polygon_edges(vertices)
+    crosses_boundary = segments_intersect_segments(starts, ends, edge_starts, edge_ends).any(axis=1)
+    # A segment that doesn't touch the boundary intersects the polygon only if it lies entirely inside it
+    return crosses_boundary | points_in_polygon(starts, vertices)
+
+
+def segments_overlap_polygon(starts: np.ndarray, ends: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+    """Checks which segments share a positive-length part with a closed polygon
+
+    A segment merely touching the polygon at isolated points does not overlap it, while a segment running through
+    the interior or along a side does.
+
+    :param starts: (m, 2) array of segment start points
+    :param ends: (m, 2) array of segment end points
+    :param vertices: (k, 2) array of polygon vertices
+    :return: (m,) boolean array
+    """
+    if len(starts) == 0:
+        return np.zeros(0, dtype=bool)
+
+    edge_starts, edge_ends = polygon_edges(vertices)
+    direction = ends - starts
+
+    # Every point where the segment may enter or leave the polygon is either a crossing with a side's line,
+    # or a vertex lying on the segment (collinear overlaps). Extra break points are harmless.
+    side = edge_ends - edge_starts
+    denominator = _cross(direction[:, 0, None], direction[:, 1, None], side[None, :, 0], side[None, :, 1])
+    offset_x = edge_starts[None, :, 0] - starts[:, 0, None]
+    offset_y = edge_starts[None, :, 1] - starts[:, 1, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing_t = _cross(offset_x, offset_y, side[None, :, 0], side[None, :, 1]) / denominator
+        length_squared = np.einsum('ij,ij->i', direction, direction)
+        vertex_t = (offset_x * direction[:, 0, None] + offset_y * direction[:, 1, None]) / length_squared[:, None]
+
+    bounds = np.zeros((len(starts), 2))
+    bounds[:, 1] = 1.0
+    break_points = np.concatenate([bounds, crossing_t, vertex_t], axis=1)
+    break_points = np.where(np.isfinite(break_points), np.clip(break_points, 0.0, 1.0), 0.0)
+    break_points.sort(axis=1)
+
+    lows, highs = break_points[:, :-1], break_points[:, 1:]
+    real_interval = highs - lows > _INTERVAL_TOLERANCE
+    mid_t = (lows + highs) / 2
+
+    rows, columns = np.nonzero(real_interval)
+    mids = starts[rows] + mid_t[rows, columns][:, None] * direction[rows]
+    mid_inside = points_in_polygon(mids, vertices) | points_on_polygon_boundary(mids, vertices)
+
+    overlap = np.zeros(len(starts), dtype=bool)
+    np.logical_or.at(overlap, rows, mid_inside)
+    return overlap
+
+
+def segments_circles_chords(starts: np.ndarray, ends: np.ndarray, centers: np.ndarray,
+                            radii: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes the part of every segment inside every circle, in segment parameter units
+
+    :param starts: (m, 2) array of segment start points
+    :param ends: (m, 2) array of segment end points
+    :param centers: (r, 2) array of circle centers
+    :param radii: (r,) array of circle radii
+    :return: two (m, r) arrays, the entry and exit parameters of the chords, every row sorted by entry. Segments
+        missing a circle have an empty [0, 0] chord in it.
+    """
+    direction = ends - starts
+    to_start_x = starts[:, 0, None] - centers[None, :, 0]
+    to_start_y = starts[:, 1, None] - centers[None, :, 1]
+
+    # Solve |start + t * direction - center| = radius for t, the chord is the part of [0, 1] between the roots
+    a = (direction[:, 0] ** 2 + direction[:, 1] ** 2)[:, None]
+    b = 2 * (direction[:, 0, None] * to_start_x + direction[:, 1, None] * to_start_y)
+    c = to_start_x ** 2 + to_start_y ** 2 - radii[None, :] ** 2
+    discriminant = b ** 2 - 4 * a * c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = np.sqrt(np.maximum(discriminant, 0))
+        enter = np.clip((-b - root) / (2 * a), 0.0, 1.0)
+        leave = np.clip((-b + root) / (2 * a), 0.0, 1.0)
+    crossing = (discriminant > 0) & (a > 0)
+    enter = np.where(crossing, enter, 0.0)
+    leave = np.where(crossing, np.maximum(leave, enter), 0.0)
+
+    order = np.argsort(enter, axis=1)
+    return np.take_along_axis(enter, order, axis=1), np.take_along_axis(leave, order, axis=1)
+
+
+def segments_circles_exposure(starts: np.ndarray, ends: np.ndarray, centers: np.ndarray,
+                              radii: np.ndarray) -> np.ndarray:
+    """Computes the length of every segment lying inside the union of the given circles
+
+    Overlapping circles are only counted once.
+
+    :param starts: (m, 2) array of segment start points
+    :param ends: (m, 2) array of segment end points
+    :param centers: (r, 2) array of circle centers
+    :param radii: (r,) array of circle radii
+    :return: (m,) array of covered lengths
+    """
+    enter, leave = segments_circles_chords(starts, ends, centers, radii)
+
+    # Merge overlapping chords: sweep them by entry, only counting the part beyond the furthest exit so far
+    furthest = np.maximum.accumulate(leave, axis=1)
+    previous_furthest = np.concatenate([np.zeros((len(starts), 1)), furthest[:, :-1]], axis=1)
+    covered = np.maximum(leave - np.maximum(enter, previous_furthest), 0.0).sum(axis=1)
+    direction = ends - starts
+    return covered * np.sqrt(direction[:, 0] ** 2 + direction[:, 1] ** 2)
+
+
+def segments_circles_intervals(starts: np.ndarray, ends: np.ndarray, centers: np.ndarray,
+                               radii: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Finds the parts of every segment lying inside the union of the given circles
+
+    Overlapping chords are merged into a single interval, chords merely touching each other are merged too.
+
+    :param starts: (m, 2) array of segment start points
+    :param ends: (m, 2) array of segment end points
+    :param centers: (r, 2) array of circle centers
+    :param radii: (r,) array of circle radii
+    :return: three (k,) arrays, the segment index and the entry and exit parameters of every covered interval,
+        ordered by segment then entry
+    """
+    enter, leave = segments_circles_chords(starts, ends, centers, radii)
+    chords = leave > enter
+    leave = np.where(chords, leave, -1.0)
+
+    # A chord opens an interval when it enters beyond the furthest exit of the chords before it
+    furthest = np.maximum.accumulate(leave, axis=1)
+    previous_furthest = np.concatenate([np.full((len(starts), 1), -1.0), furthest[:, :-1]], axis=1)
+    opening = chords & (enter > previous_furthest)
+
+    # Chords are kept in order, so the chords of every interval follow the one opening it
+    rows = np.nonzero(chords)[0]
+    enter, leave, opening = enter[chords], leave[chords], opening[chords]
+    firsts = np.flatnonzero(opening)
+    if len(firsts) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+    return rows[firsts], enter[firsts], np.maximum.reduceat(leave, firsts)
@@ -0,0 +1,107 @@
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.black_hole import BlackHole
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.enemy.radar import Radar
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.csr_graph import CSRGraph
+
+# Part of every cache key, bump it whenever a change to graph construction changes the graphs built
+PLANNER_VERSION = 2
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('GRAPH_CACHE_DIR', Path.home() / '.cache' / 'lost_in_space' / 'graphs'))
+
+
+def _describe_enemy(enemy: Enemy) -> list:
+    if isinstance(enemy, AsteroidsZone):
+        return ['AsteroidsZone', [(c.x, c.y) for c in enemy.boundary]]
+    if isinstance(enemy, (BlackHole, Radar)):
+        return [type(enemy).__name__, (enemy.center.x, enemy.center.y), enemy.radius]
+    raise TypeError(f'Cannot describe enemies of type {type(enemy).__name__}')
+
+
+def scenario_key(start: Coordinate, targets: List[Coordinate], enemies: List[Enemy], **options) -> str:
+    """Hashes everything a graph depends on
+
+    :param start: source coordinate
+    :param targets: target coordinates
+    :param enemies: list of enemies along the way
+    :param options: graph construction options, e.g. `reduced=True`
+    :return: hex digest identifying the graph
+    """
+    content = {'version': PLANNER_VERSION,
+               'start': (start.x, start.y),
+               'targets': [(target.x, target.y) for target in targets],
+               'enemies': [_describe_enemy(enemy) for enemy in enemies],
+               'options': options}
+    # Floats are written with their shortest exact representation, so equal scenarios give equal keys
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+class GraphCache:
+    """Directory of graphs stored as .npz files of their arrays, named by `scenario_key`"""
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f'{key}.npz'
+
+    def load(self, key: str) -> Optional[CSRGraph]:
+        """Reads a graph saved under the key
+
+        :param key: key the graph was saved with
+        :return: the graph, with the same nodes and edges in the same order as the saved one, or None if missing or
+            unreadable
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                coordinates = arrays['coordinates']
+                exposures = arrays['exposures'] if 'exposures' in arrays.files else None
+                nodes = [Coordinate(x, y) for x, y in coordinates.tolist()]
+                return CSRGraph(nodes, arrays['first'], arrays['second'], arrays['weights'], exposures)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, zipfile.BadZipFile, KeyError, ValueError):
+            # Truncated, empty or from an incompatible format. Files are replaced atomically so it won't be completed
+            # later, drop it and rebuild the graph
+            with contextlib.suppress(OSError):
+                path.unlink()
+            return None
+
+    def save(self, key: str, graph: CSRGraph):
+        """Writes a graph under the key, replacing the file atomically
+
+        :param key: key to save the graph with
+        :param graph: graph to save
+        """
+        first, second, positions = graph.edge_arrays()
+        arrays = {'coordinates': graph.coordinates, 'first': first, 'second': second,
+                  'weights': graph.weights[positions]}
+        if graph.exposures is not None:
+            arrays['exposures'] = graph.exposures[positions]
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.npz.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def clear(self):
+        for path in self.directory.glob('*.npz'):
+            path.unlink()
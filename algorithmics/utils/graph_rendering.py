@@ -0,0 +1,49 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Edges drawn at most in one view, beyond it the shortest visible edges are left out
+MAX_DRAWN_EDGES = 20000
+
+
+def visible_edges(edges: np.ndarray, x_range: Optional[Tuple[float, float]] = None,
+                  y_range: Optional[Tuple[float, float]] = None, max_edges: int = MAX_DRAWN_EDGES) -> np.ndarray:
+    """Picks the edges worth drawing in a viewport
+
+    Edges whose bounding box misses the viewport are culled. When more than `max_edges` remain, the longest ones are
+    kept: zoomed out, short edges are a few pixels long while long ones outline the graph, and zooming in culls
+    enough edges for the short ones to come back.
+
+    :param edges: array of (x1, y1, x2, y2) rows
+    :param x_range: visible x range, None for no limit
+    :param y_range: visible y range, None for no limit
+    :param max_edges: amount of edges drawn at most
+    :return: rows of the edges to draw, in their original order
+    """
+    edges = np.asarray(edges, dtype=float).reshape(-1, 4)
+    visible = np.ones(len(edges), dtype=bool)
+    for axis_range, columns in ((x_range, edges[:, [0, 2]]), (y_range, edges[:, [1, 3]])):
+        if axis_range is not None:
+            low, high = min(axis_range), max(axis_range)
+            visible &= (columns.max(axis=1) >= low) & (columns.min(axis=1) <= high)
+    edges = edges[visible]
+
+    if len(edges) > max_edges:
+        lengths = np.hypot(edges[:, 2] - edges[:, 0], edges[:, 3] - edges[:, 1])
+        longest = np.argpartition(lengths, len(edges) - max_edges)[len(edges) - max_edges:]
+        edges = edges[np.sort(longest)]
+    return edges
+
+
+def edge_lines(edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Lays edges out as a single lines trace, every edge followed by a NaN gap that breaks the line
+
+    :param edges: array of (x1, y1, x2, y2) rows
+    :return: x and y values of the trace
+    """
+    edges = np.asarray(edges, dtype=float).reshape(-1, 4)
+    xs = np.full(3 * len(edges), np.nan)
+    ys = np.full(3 * len(edges), np.nan)
+    xs[0::3], xs[1::3] = edges[:, 0], edges[:, 2]
+    ys[0::3], ys[1::3] = edges[:, 1], edges[:, 3]
+    return xs, ys
@@ -0,0 +1,193 @@
+import contextlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class JobCancelled(Exception):
+    """Raised inside a job at its next checkpoint once it was cancelled"""
+
+
+class DeadlineExceeded(JobCancelled):
+    """Raised at the next checkpoint once the deadline set by `deadline` passed"""
+
+
+class Job:
+    """A computation running in the background, with the progress it reported so far"""
+
+    PENDING, RUNNING, DONE, FAILED, CANCELLED = 'pending', 'running', 'done', 'failed', 'cancelled'
+
+    def __init__(self, job_id: int, key: Hashable):
+        self.id = job_id
+        self.key = key
+        self.status = Job.PENDING
+        # Stage the job is in and the fraction of it done, as reported by `checkpoint`
+        self.stage = ''
+        self.progress = 0.0
+        self.result: Any = None
+        # Best result so far of a job improving it over time, as reported by `report`
+        self.partial: Any = None
+        self.error: Optional[str] = None
+        # Seconds the computation took, None until it finished
+        self.elapsed: Optional[float] = None
+        # Whether the result came from a previous identical job
+        self.memoized = False
+        self._cancel_requested = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (Job.DONE, Job.FAILED, Job.CANCELLED)
+
+    def cancel(self):
+        """Asks the job to stop, it does at its next checkpoint"""
+        self._cancel_requested.set()
+
+
+# Job the current thread is running, None outside of jobs
+# ContextVar can only be subscripted from Python 3.9 on, annotations of module variables are evaluated
+_current_job: 'ContextVar[Optional[Job]]' = ContextVar('current_job', default=None)
+# `time.perf_counter` time checkpoints stop the computation at, None for no deadline
+_deadline: 'ContextVar[Optional[float]]' = ContextVar('deadline', default=None)
+
+
+@contextlib.contextmanager
+def deadline(seconds: float):
+    """Stops the computation at its first checkpoint after the given time, in or outside of jobs
+
+    Nested deadlines can only make the deadline earlier.
+
+    :param seconds: time from now the computation may take
+    """
+    end_time = time.perf_counter() + seconds
+    outer_end_time = _deadline.get()
+    token = _deadline.set(end_time if outer_end_time is None else min(end_time, outer_end_time))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def checkpoint(stage: Optional[str] = None, progress: Optional[float] = None):
+    """Reports the progress of the running job, and stops it if it was cancelled. Does nothing outside of jobs, but
+    to enforce the deadline.
+
+    :param stage: name of the stage the job entered, None to stay in the current one
+    :param progress: fraction of the current stage done
+    :raises JobCancelled: if the job was cancelled
+    :raises DeadlineExceeded: if the deadline passed
+    """
+    end_time = _deadline.get()
+    if end_time is not None and time.perf_counter() > end_time:
+        raise DeadlineExceeded()
+    job = _current_job.get()
+    if job is None:
+        return
+    if job._cancel_requested.is_set():
+        raise JobCancelled()
+    if stage is not None:
+        job.stage, job.progress = stage, 0.0
+    if progress is not None:
+        job.progress = progress
+
+
+def report(result: Any):
+    """Publishes the best result the running job found so far, in `Job.partial`. Does nothing outside of jobs."""
+    job = _current_job.get()
+    if job is not None:
+        job.partial = result
+
+
+class JobManager:
+    """Runs jobs in a thread pool, sharing identical in-flight jobs and remembering recent results
+
+    Jobs are identified by a key, e.g. a hash of their input: submitting a key whose job is still running gives that
+    job back, and submitting a key that already finished successfully gives its result at once.
+    """
+
+    def __init__(self, max_workers: int = 2, memo_size: int = 32, max_jobs: int = 256):
+        """Initializes the manager
+
+        :param max_workers: amount of jobs running at the same time
+        :param memo_size: amount of results remembered, least recently used ones are forgotten first
+        :param max_jobs: amount of jobs kept for `get`, oldest finished jobs are forgotten first
+        """
+        self.memo_size = memo_size
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='planning-job')
+        self._ids = itertools.count(1)
+        self._jobs: 'OrderedDict[int, Job]' = OrderedDict()
+        self._in_flight: Dict[Hashable, Job] = {}
+        self._results: 'OrderedDict[Hashable, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, function: Callable[[], Any]) -> Job:
+        """Starts a job, unless an identical one is running or finished recently
+
+        :param key: identifies the job's input, jobs with equal keys must compute the same result
+        :param function: computation of the job, may call `checkpoint` to report progress and support cancelling
+        :return: the job computing the result
+        """
+        with self._lock:
+            running = self._in_flight.get(key)
+            if running is not None and not running._cancel_requested.is_set():
+                return running
+
+            job = Job(next(self._ids), key)
+            previous = self._results.get(key)
+            if previous is not None:
+                self._results.move_to_end(key)
+                job.status, job.progress, job.result, job.elapsed = Job.DONE, 1.0, previous.result, previous.elapsed
+                job.memoized = True
+            else:
+                self._in_flight[key] = job
+            self._register(job)
+
+        if not job.finished:
+            self._executor.submit(self._run, job, function)
+        return job
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: int):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def _register(self, job: Job):
+        self._jobs[job.id] = job
+        for old_id in [old_id for old_id, old_job in self._jobs.items() if old_job.finished]:
+            if len(self._jobs) <= self.max_jobs:
+                break
+            del self._jobs[old_id]
+
+    def _run(self, job: Job, function: Callable[[], Any]):
+        token = _current_job.set(job)
+        job.status = Job.RUNNING
+        start_time = time.perf_counter()
+        try:
+            checkpoint()
+            job.result = function()
+        except JobCancelled:
+            job.status = Job.CANCELLED
+        except Exception as e:
+            job.error = f'{type(e).__name__}: {e}'
+            job.status = Job.FAILED
+        else:
+            job.progress = 1.0
+            job.status = Job.DONE
+        finally:
+            job.elapsed = time.perf_counter() - start_time
+            _current_job.reset(token)
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+                if job.status == Job.DONE:
+                    self._results[job.key] = job
+                    while len(self._results) > self.memo_size:
+                        self._results.popitem(last=False)
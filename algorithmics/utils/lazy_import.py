@@ -0,0 +1,33 @@
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+
+class _LazyModule(ModuleType):
+    """Stand-in for a module, importing it when one of its attributes is first used"""
+
+    def __getattr__(self, attribute: str):
+        # Only called for attributes not copied over yet. The real module is imported through the import system,
+        # which makes threads racing for it wait until it is fully initialized (unlike `importlib.util.LazyLoader`
+        # before Python 3.12.3, which can execute it twice or expose it half initialized)
+        value = getattr(importlib.import_module(self.__name__), attribute)
+        setattr(self, attribute, value)
+        return value
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Imports a top level module on first attribute access instead of right away
+
+    Keeps heavy dependencies used off the common path (e.g. networkx, only needed for `nx.Graph` results and its
+    exceptions) out of the import time of the planning core. Annotations naming the module's attributes must be strings,
+    as evaluating them would load it. Safe to use from several threads.
+
+    :param name: name of the module, e.g. 'networkx'
+    :return: the module if it was already imported, otherwise a stand-in importing it once an attribute is first used
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+    return _LazyModule(name)
@@ -0,0 +1,199 @@
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from algorithmics import edge_checker
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.utils import profiling, jobs
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.csr_graph import CSRGraph
+from algorithmics.utils.lazy_import import lazy_import
+from algorithmics.utils.obstacle_index import ObstacleIndex
+
+nx = lazy_import('networkx')
+
+# Nodes found to have this many illegal edges get all their other edges checked at once, instead of one search per
+# edge found illegal
+BLOCKED_EDGES = 2
+
+
+class LazyEdges:
+    """Complete graph over the nodes, whose edges are checked for legality only when a search asks for them
+
+    Results of the checks are kept, so every pair is checked at most once however many searches run over the graph.
+    Only the checked pairs are stored and edge lengths are computed when a search needs them, so memory grows with the
+    amount of checks rather than with the square of the amount of nodes.
+    """
+
+    def __init__(self, nodes: List[Coordinate], enemies: List[Enemy], index: Optional[ObstacleIndex] = None,
+                 vertex_tables: Optional[Dict[Enemy, np.ndarray]] = None,
+                 pair_filter: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None):
+        """Initializes the graph with every edge unchecked
+
+        :param nodes: nodes of the graph
+        :param enemies: list of enemies along the way
+        :param index: obstacle index built over `enemies`
+        :param vertex_tables: for asteroid zones, the vertex index of every node, see `get_legal_edge_arrays`
+        :param pair_filter: mask of the pairs worth checking, pairs it rejects are never edges. See
+            `get_legal_edge_arrays`.
+        """
+        self.nodes = nodes
+        self.enemies = enemies
+        self.coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float).reshape(-1, 2)
+        self.index = index if index is not None else ObstacleIndex(enemies)
+        self.vertex_tables = vertex_tables
+        self.pair_filter = pair_filter
+        # Amount of pairs checked so far
+        self.checks = 0
+        # Legality of the checked pairs, keyed by (smaller index, larger index)
+        self.legal: Dict[Tuple[int, int], bool] = {}
+        # Nodes every node was found to have no edge to
+        self._illegal_neighbours: Dict[int, List[int]] = {}
+        # Nodes the pair filter keeps for every node expanded so far and the lengths of the edges to them, without
+        # the ones found illegal since
+        self._filtered_neighbours: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def lengths_from(self, node: int, others: np.ndarray) -> np.ndarray:
+        """Computes the lengths of the edges between a node and other nodes
+
+        :param node: index of the node
+        :param others: indices of the other nodes
+        :return: length of the edge to every other node
+        """
+        return np.hypot(*(self.coordinates[others] - self.coordinates[node]).T)
+
+    def check(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Checks the given pairs that weren't checked before
+
+        :param first: node indices of one end of the pairs
+        :param second: node indices of the other end
+        :return: legality mask of the pairs
+        """
+        pairs = [(u, v) if u < v else (v, u) for u, v in zip(first.tolist(), second.tolist())]
+        unknown = list(dict.fromkeys(pair for pair in pairs if pair not in self.legal))
+        if unknown:
+            pairs_first, pairs_second = np.array(unknown, dtype=np.int64).T
+            zone_vertices = None if self.vertex_tables is None else \
+                {zone: (table[pairs_first], table[pairs_second]) for zone, table in self.vertex_tables.items()}
+            legal, _ = edge_checker.check_edges_batch(self.coordinates[pairs_first], self.coordinates[pairs_second],
+                                                      self.enemies, self.index, zone_vertices)
+            for (u, v), pair_legal in zip(unknown, legal.tolist()):
+                self.legal[u, v] = pair_legal
+                if not pair_legal:
+                    self._remove_edge(u, v)
+                    self._remove_edge(v, u)
+            self.checks += len(unknown)
+            profiling.count('lazy edge checks', len(unknown))
+        return np.array([self.legal[pair] for pair in pairs], dtype=bool)
+
+    def legal_graph(self) -> CSRGraph:
+        """Builds the graph of the edges found legal so far"""
+        first, second = np.array(sorted(pair for pair, legal in self.legal.items() if legal),
+                                 dtype=np.int64).reshape(-1, 2).T
+        delta = self.coordinates[first] - self.coordinates[second]
+        return CSRGraph(self.nodes, first, second, np.hypot(delta[:, 0], delta[:, 1]))
+
+    def _remove_edge(self, node: int, other: int):
+        """Records that a node has no edge to another node, the other way around must be recorded separately"""
+        self._illegal_neighbours.setdefault(node, []).append(other)
+        if node in self._filtered_neighbours:
+            neighbours, lengths = self._filtered_neighbours[node]
+            kept = neighbours != other
+            self._filtered_neighbours[node] = neighbours[kept], lengths[kept]
+
+    def _neighbours(self, node: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the nodes a node may have an edge to, as far as is known so far
+
+        :param node: index of the node
+        :return: indices of the nodes neither rejected by the pair filter nor checked to be illegal, and the lengths of
+            the edges to them
+        """
+        if self.pair_filter is None:
+            possible = np.ones(len(self.nodes), dtype=bool)
+            possible[node] = False
+            possible[self._illegal_neighbours.get(node, [])] = False
+            neighbours = np.flatnonzero(possible)
+            return neighbours, self.lengths_from(node, neighbours)
+
+        # The filter usually keeps few pairs, the ones of every expanded node are kept for the next searches
+        if node not in self._filtered_neighbours:
+            others = np.arange(len(self.nodes))
+            possible = self.pair_filter(np.full(len(self.nodes), node), others)
+            possible[node] = False
+            possible[self._illegal_neighbours.get(node, [])] = False
+            neighbours = others[possible]
+            self._filtered_neighbours[node] = neighbours, self.lengths_from(node, neighbours)
+        return self._filtered_neighbours[node]
+
+    def _search(self, source: int, target: int, heuristic: np.ndarray) -> List[int]:
+        """A* over the edges not known to be illegal, weighted by their length
+
+        Edges are only ever removed between searches, so distances to the target can only grow: the heuristic of the
+        expanded nodes is raised to what this search found (Adaptive A*), making the next search expand fewer nodes.
+
+        :param heuristic: lower bounds on the distances to the target, updated in place
+        """
+        distances = np.full(len(self.nodes), np.inf)
+        parents = np.full(len(self.nodes), -1, dtype=np.int64)
+        closed = np.zeros(len(self.nodes), dtype=bool)
+        distances[source] = 0.0
+        heap = [(float(heuristic[source]), source)]
+
+        expansions = 0
+        while heap:
+            priority, node = heapq.heappop(heap)
+            # Skip entries left behind when a shorter way to the node was found
+            if closed[node] or priority > distances[node] + heuristic[node]:
+                continue
+            if node == target:
+                heuristic[closed] = np.maximum(heuristic[closed], distances[target] - distances[closed])
+                profiling.count('lazy search expansions', expansions)
+                path = [target]
+                while path[-1] != source:
+                    path.append(int(parents[path[-1]]))
+                return path[::-1]
+            closed[node] = True
+            expansions += 1
+
+            neighbours, lengths = self._neighbours(node)
+            candidate_distances = distances[node] + lengths
+            improved = candidate_distances < distances[neighbours]
+            neighbours, candidate_distances = neighbours[improved], candidate_distances[improved]
+            distances[neighbours] = candidate_distances
+            parents[neighbours] = node
+            closed[neighbours] = False
+            for neighbour, neighbour_priority in zip(neighbours.tolist(),
+                                                     (candidate_distances + heuristic[neighbours]).tolist()):
+                heapq.heappush(heap, (neighbour_priority, neighbour))
+        profiling.count('lazy search expansions', expansions)
+        raise nx.NetworkXNoPath(f'No path between {self.nodes[source]} and {self.nodes[target]}.')
+
+    def shortest_path(self, source: int, target: int) -> List[int]:
+        """Finds the shortest legal path, checking only the edges of the candidate paths (LazySP)
+
+        The shortest path over the edges not known to be illegal is found, its unchecked edges are checked, and the
+        search runs again until every edge of the path is legal. Around obstacles, searches keep trying the edges of the
+        same nodes one by one, so once a node had `BLOCKED_EDGES` edges found illegal its other edges are checked in
+        a single batch.
+
+        :param source: index of the source node
+        :param target: index of the target node
+        :return: indices of the nodes along the path
+        """
+        heuristic = self.lengths_from(target, np.arange(len(self.nodes)))
+        while True:
+            jobs.checkpoint()
+            profiling.count('lazy searches')
+            path = self._search(source, target, heuristic)
+            first, second = np.array(path[:-1], dtype=np.int64), np.array(path[1:], dtype=np.int64)
+            legal = self.check(first, second)
+            if legal.all():
+                return path
+
+            blocked = [node for node in dict.fromkeys(first[~legal].tolist() + second[~legal].tolist())
+                       if len(self._illegal_neighbours[node]) >= BLOCKED_EDGES]
+            if blocked:
+                neighbours = [self._neighbours(node)[0] for node in blocked]
+                self.check(np.repeat(blocked, [len(others) for others in neighbours]).astype(np.int64),
+                           np.concatenate(neighbours))
@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.utils.coordinate import Coordinate
+
+
+class NodeProvenance:
+    """Records which enemy, and which of its vertices, every graph node comes from
+
+    A node may come from several enemies, e.g. a corner shared by two asteroid zones.
+    Lookups replace linear scans such as `c in zone.boundary` with dictionary accesses.
+    """
+
+    def __init__(self):
+        self.origins: Dict[Coordinate, Dict[Enemy, int]] = {}
+
+    def add_enemy(self, enemy: Enemy, points: List[Coordinate]):
+        """Records the points of an enemy
+
+        :param enemy: enemy the points belong to
+        :param points: the enemy's points, as returned by `get_points`
+        """
+        for i, point in enumerate(points):
+            # Keep the first index if the enemy repeats a vertex
+            self.origins.setdefault(point, {}).setdefault(enemy, i)
+
+    def merge(self, node: Coordinate, into: Coordinate):
+        """Records that a node was snapped onto another, which now comes from the enemies of both
+
+        :param node: the node that was dropped
+        :param into: the node kept in its place
+        """
+        for enemy, i in self.origins.get(node, {}).items():
+            self.origins.setdefault(into, {}).setdefault(enemy, i)
+
+    def vertex_index(self, node: Coordinate, enemy: Enemy) -> Optional[int]:
+        """Finds which vertex of the enemy the node is
+
+        :param node: coordinate of the node
+        :param enemy: enemy to look in
+        :return: the vertex index, or None if the node isn't a vertex of the enemy
+        """
+        return self.origins.get(node, {}).get(enemy)
+
+    def are_adjacent(self, c0: Coordinate, c1: Coordinate, enemy: Enemy, vertices_amount: int) -> bool:
+        """Checks whether two nodes are consecutive vertices of the enemy's polygon
+
+        :param c0: coordinate of the first node
+        :param c1: coordinate of the second node
+        :param enemy: enemy whose polygon is checked
+        :param vertices_amount: amount of vertices of the polygon
+        :return: True if the nodes share a side of the polygon
+        """
+        i0, i1 = self.vertex_index(c0, enemy), self.vertex_index(c1, enemy)
+        if i0 is None or i1 is None:
+            return False
+        return abs(i0 - i1) in (1, vertices_amount - 1)
+
+    def vertex_table(self, nodes: List[Coordinate], enemy: Enemy) -> np.ndarray:
+        """Lists the vertex index of every node in the enemy, for array based checks
+
+        :param nodes: coordinates of the graph's nodes
+        :param enemy: enemy to look in
+        :return: (n,) integer array holding the vertex index of every node, or -1 where it isn't a vertex
+        """
+        return np.array([self.origins.get(node, {}).get(enemy, -1) for node in nodes], dtype=np.int64)
+
+    def vertex_tables(self, nodes: List[Coordinate], enemies: List[Enemy]) -> Dict[Enemy, np.ndarray]:
+        """Lists the vertex index of every node in each of the enemies, like `vertex_table` but in a single pass
+
+        :param nodes: coordinates of the graph's nodes, without duplicates
+        :param enemies: enemies to look in
+        :return: (n,) integer array by enemy, holding the vertex index of every node or -1 where it isn't a vertex
+        """
+        tables = {enemy: np.full(len(nodes), -1, dtype=np.int64) for enemy in enemies}
+        positions = {node: i for i, node in enumerate(nodes)}
+        for point, origins in self.origins.items():
+            position = positions.get(point)
+            if position is None:
+                continue
+            for enemy, vertex in origins.items():
+                if enemy in tables:
+                    tables[enemy][position] = vertex
+        return tables
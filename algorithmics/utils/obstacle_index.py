@@ -0,0 +1,150 @@
+import math
+from collections import defaultdict
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.black_hole import BlackHole, CIRCLE_QUAD_SEGMENTS
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.utils import geometry
+from algorithmics.utils.coordinate import Coordinate, TOLERANCE as COORDINATE_TOLERANCE
+
+# Enemies that edges are not allowed to pass through
+OBSTACLE_TYPES = (AsteroidsZone, BlackHole)
+
+
+class ObstacleIndex:
+    """Uniform grid over the bounding boxes of a scenario's obstacles
+
+    Built once per scenario, it lets edge checks skip obstacles whose bounding box is nowhere near the edge.
+    It also counts how many obstacle tests were skipped that way.
+    """
+
+    def __init__(self, enemies: List[Enemy], cell_size: float = None):
+        """Indexes the obstacles among the given enemies
+
+        :param enemies: list of enemies of the scenario, enemies that are not obstacles are ignored
+        :param cell_size: side of a grid cell, defaults to the median obstacle size
+        """
+        self.obstacles: List[Enemy] = [enemy for enemy in enemies if isinstance(enemy, OBSTACLE_TYPES)]
+        self.bounding_boxes = np.array([obstacle.get_bounding_box() for obstacle in self.obstacles],
+                                       dtype=float).reshape(-1, 4)
+
+        # Counters of obstacle tests requested and of those skipped thanks to the index
+        self.tests = 0
+        self.pruned_tests = 0
+
+        if cell_size is None:
+            sizes = np.maximum(self.bounding_boxes[:, 2] - self.bounding_boxes[:, 0],
+                               self.bounding_boxes[:, 3] - self.bounding_boxes[:, 1])
+            cell_size = float(np.median(sizes)) if len(sizes) > 0 else 1.0
+        self.cell_size = cell_size if cell_size > 0 else 1.0
+
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, box in enumerate(self.bounding_boxes):
+            min_x, min_y, max_x, max_y = self._cell_range(*box)
+            for cell_x in range(min_x, max_x + 1):
+                for cell_y in range(min_y, max_y + 1):
+                    self._cells[(cell_x, cell_y)].append(i)
+
+    def _cell_range(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Tuple[int, int, int, int]:
+        return (math.floor(min_x / self.cell_size), math.floor(min_y / self.cell_size),
+                math.floor(max_x / self.cell_size), math.floor(max_y / self.cell_size))
+
+    def query(self, c0: Coordinate, c1: Coordinate) -> List[Enemy]:
+        """Finds the obstacles whose bounding box overlaps the bounding box of the segment between two coordinates
+
+        :param c0: first end of the segment
+        :param c1: second end of the segment
+        :return: obstacles that may intersect the segment, in the order they were given
+        """
+        min_x, max_x = min(c0.x, c1.x), max(c0.x, c1.x)
+        min_y, max_y = min(c0.y, c1.y), max(c0.y, c1.y)
+        cell_min_x, cell_min_y, cell_max_x, cell_max_y = self._cell_range(min_x, min_y, max_x, max_y)
+
+        # Long segments cover many cells, scanning all boxes is cheaper for them
+        if (cell_max_x - cell_min_x + 1) * (cell_max_y - cell_min_y + 1) > len(self.obstacles):
+            candidates = range(len(self.obstacles))
+        else:
+            candidates = sorted({i for cell_x in range(cell_min_x, cell_max_x + 1)
+                                 for cell_y in range(cell_min_y, cell_max_y + 1)
+                                 for i in self._cells.get((cell_x, cell_y), ())})
+
+        found = []
+        for i in candidates:
+            box_min_x, box_min_y, box_max_x, box_max_y = self.bounding_boxes[i]
+            if box_min_x <= max_x and min_x <= box_max_x and box_min_y <= max_y and min_y <= box_max_y:
+                found.append(self.obstacles[i])
+
+        self.tests += len(self.obstacles)
+        self.pruned_tests += len(self.obstacles) - len(found)
+        return found
+
+    def overlapping_segments(self, obstacle_index: int, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Finds which segments have a bounding box overlapping the bounding box of one obstacle
+
+        :param obstacle_index: index of the obstacle in `obstacles`
+        :param starts: (m, 2) array of segment start points
+        :param ends: (m, 2) array of segment end points
+        :return: (m,) boolean array
+        """
+        box_min_x, box_min_y, box_max_x, box_max_y = self.bounding_boxes[obstacle_index]
+        overlapping = (np.minimum(starts[:, 0], ends[:, 0]) <= box_max_x) & \
+                      (np.maximum(starts[:, 0], ends[:, 0]) >= box_min_x) & \
+                      (np.minimum(starts[:, 1], ends[:, 1]) <= box_max_y) & \
+                      (np.maximum(starts[:, 1], ends[:, 1]) >= box_min_y)
+
+        self.tests += len(starts)
+        self.pruned_tests += len(starts) - int(np.count_nonzero(overlapping))
+        return overlapping
+
+    def points_inside(self, points: np.ndarray) -> np.ndarray:
+        """Finds which points lie inside an obstacle, clear of its boundary, where no legal edge can reach them
+
+        Points closer than the coordinate tolerance to a zone's boundary, or outside the polygon edges are checked
+        against for a black hole, are never inside.
+
+        :param points: (m, 2) array of points
+        :return: (m,) boolean array
+        """
+        inside = np.zeros(len(points), dtype=bool)
+        for obstacle, (box_min_x, box_min_y, box_max_x, box_max_y) in zip(self.obstacles, self.bounding_boxes):
+            candidates = np.flatnonzero(~inside & (points[:, 0] > box_min_x) & (points[:, 0] < box_max_x) &
+                                        (points[:, 1] > box_min_y) & (points[:, 1] < box_max_y))
+            if len(candidates) == 0:
+                continue
+            candidate_points = points[candidates]
+            if isinstance(obstacle, BlackHole):
+                # Within the inner radius of the polygon inscribed in the circle
+                inner_radius = obstacle.radius * math.cos(math.pi / (4 * CIRCLE_QUAD_SEGMENTS))
+                inside[candidates] = np.hypot(candidate_points[:, 0] - obstacle.center.x,
+                                              candidate_points[:, 1] - obstacle.center.y) \
+                    < inner_radius - COORDINATE_TOLERANCE
+            else:
+                candidates = candidates[geometry.points_in_polygon(candidate_points, obstacle.vertices)]
+                inside[candidates] = ~geometry.points_on_polygon_boundary(points[candidates], obstacle.vertices,
+                                                                          COORDINATE_TOLERANCE)
+        return inside
+
+    def overlapping_obstacles(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Finds which obstacles have a bounding box overlapping the bounding box of any of the segments
+
+        Tests of the obstacles overlapping none of the segments are counted as pruned, the tests of the other ones
+        are left for `overlapping_segments` to count.
+
+        :param starts: (m, 2) array of segment start points
+        :param ends: (m, 2) array of segment end points
+        :return: (k,) boolean array, by obstacle
+        """
+        segment_min = np.minimum(starts, ends)[:, np.newaxis, :]
+        segment_max = np.maximum(starts, ends)[:, np.newaxis, :]
+        overlapping = ((segment_min[..., 0] <= self.bounding_boxes[:, 2]) &
+                       (segment_max[..., 0] >= self.bounding_boxes[:, 0]) &
+                       (segment_min[..., 1] <= self.bounding_boxes[:, 3]) &
+                       (segment_max[..., 1] >= self.bounding_boxes[:, 1])).any(axis=0)
+
+        skipped_tests = len(starts) * (len(self.obstacles) - int(np.count_nonzero(overlapping)))
+        self.tests += skipped_tests
+        self.pruned_tests += skipped_tests
+        return overlapping
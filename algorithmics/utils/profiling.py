@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, ContextManager
+
+# Returned by `phase` when profiling is disabled, entering and leaving it does nothing
+_DISABLED_PHASE = nullcontext()
+
+
+class Profile:
+    """Time spent in every phase of the planner and counters of the work done, recorded while profiling is enabled
+
+    Phases nest, a phase entered inside another one is recorded as `outer/inner`.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._phases: List[str] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._phases.append(name)
+        full_name = '/'.join(self._phases)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[full_name] += time.perf_counter() - start_time
+            self.calls[full_name] += 1
+            self._phases.pop()
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Converts the profile into plain dictionaries, e.g. to store it or send it to the browser
+
+        :return: `timings` (seconds) and `calls` by phase, and `counters` by name
+        """
+        return {'timings': dict(self.timings), 'calls': dict(self.calls), 'counters': dict(self.counters)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, float]]) -> 'Profile':
+        """Restores a profile converted by `as_dict`"""
+        profile = cls()
+        profile.timings.update(data['timings'])
+        profile.calls.update(data['calls'])
+        profile.counters.update(data['counters'])
+        return profile
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=2)
+
+    def to_csv(self) -> str:
+        """Lists phases and counters as CSV rows of kind, name, value and calls"""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['kind', 'name', 'value', 'calls'])
+        writer.writerows(['phase', name, seconds, self.calls[name]] for name, seconds in self.timings.items())
+        writer.writerows(['counter', name, value, ''] for name, value in self.counters.items())
+        return output.getvalue()
+
+    def summary(self) -> str:
+        """Human readable breakdown, every phase indented under the phase it ran in"""
+        lines = []
+        for name in sorted(self.timings):
+            depth = name.count('/')
+            label = '  ' * depth + name.split('/')[-1]
+            lines.append(f'{label:<40}{self.timings[name] * 1000:>10.2f} ms  x{self.calls[name]}')
+        for name in sorted(self.counters):
+            lines.append(f'{name:<40}{self.counters[name]:>10}')
+        return '\n'.join(lines)
+
+
+# Profile being recorded by the current thread / task, None when profiling is disabled
+# ContextVar can only be subscripted from Python 3.9 on, annotations of module variables are evaluated
+_active_profile: 'ContextVar[Optional[Profile]]' = ContextVar('active_profile', default=None)
+
+
+@contextmanager
+def profiling() -> Iterator[Profile]:
+    """Enables profiling for the enclosed code, and gives the profile it records
+
+    Usage:
+        with profiling() as profile:
+            calculate_path(...)
+        print(profile.summary())
+    """
+    profile = Profile()
+    token = _active_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _active_profile.reset(token)
+
+
+def phase(name: str) -> ContextManager:
+    """Times the enclosed code as a phase of the active profile, does nothing when profiling is disabled"""
+    profile = _active_profile.get()
+    return _DISABLED_PHASE if profile is None else profile.phase(name)
+
+
+def count(name: str, amount: int = 1):
+    """Adds to a counter of the active profile, does nothing when profiling is disabled"""
+    profile = _active_profile.get()
+    if profile is not None:
+        profile.counters[name] += amount
@@ -0,0 +1,152 @@
+import math
+from typing import List, Iterable
+
+import numpy as np
+
+from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.black_hole import BlackHole, CIRCLE_QUAD_SEGMENTS
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.node_provenance import NodeProvenance
+
+# Relative tolerance for a polygon neighbour to count as lying on the edge's line
+_SIDE_TOLERANCE = 1e-9
+
+
+def reflex_vertices(vertices: np.ndarray) -> np.ndarray:
+    """Finds the vertices where a simple polygon's interior angle exceeds 180 degrees
+
+    :param vertices: (k, 2) array of polygon vertices, in either orientation
+    :return: (k,) boolean array, collinear vertices are not reflex
+    """
+    previous_vertices, next_vertices = np.roll(vertices, 1, axis=0), np.roll(vertices, -1, axis=0)
+    incoming, outgoing = vertices - previous_vertices, next_vertices - vertices
+    turns = incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0]
+
+    # Twice the signed area, positive for counter-clockwise polygons
+    orientation = np.sum(vertices[:, 0] * next_vertices[:, 1] - next_vertices[:, 0] * vertices[:, 1])
+    return turns * orientation < 0
+
+
+class ReducedGraphFilter:
+    """Prunes a visibility graph down to the nodes and edges shortest paths can use
+
+    Shortest paths only bend around convex obstacle corners, and only along edges that are tangent to the obstacles
+    at both ends. This drops reflex asteroid zone vertices, and rejects candidate edges whose line cuts into an
+    asteroid zone at one of its vertices, or into a black hole at one of the points around it, before any
+    intersection test is made.
+
+    Nodes that aren't obstacle points (radar points) and protected nodes (source, targets) are never dropped nor
+    constrained.
+    """
+
+    def __init__(self, nodes: List[Coordinate], enemies: List[Enemy], provenance: NodeProvenance,
+                 protected_nodes: Iterable[int] = ()):
+        """Prepares the per-node data used by the filter
+
+        :param nodes: coordinates of the graph's nodes
+        :param enemies: list of enemies along the way
+        :param provenance: enemy points every node comes from
+        :param protected_nodes: indices of nodes paths start or end at
+        """
+        self.coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float).reshape(-1, 2)
+        self.protected = np.zeros(len(nodes), dtype=bool)
+        self.protected[list(protected_nodes)] = True
+
+        # Polygon neighbours of every zone vertex, one layer per zone the node belongs to
+        zone_layers = []
+        self.reflex = np.zeros(len(nodes), dtype=bool)
+        # Center and inner radius of the black hole every black hole point belongs to, one layer per hole
+        hole_layers = []
+
+        tables = provenance.vertex_tables(nodes, enemies)
+        for enemy in enemies:
+            table = tables[enemy]
+            members = np.flatnonzero(table >= 0)
+            if len(members) == 0:
+                continue
+
+            if isinstance(enemy, AsteroidsZone):
+                vertices = enemy.vertices
+                vertex_indices = table[members]
+                self.reflex[members] |= reflex_vertices(vertices)[vertex_indices]
+                layer = self._free_layer(zone_layers, members, 4)
+                layer[members, 0:2] = vertices[(vertex_indices - 1) % len(vertices)]
+                layer[members, 2:4] = vertices[(vertex_indices + 1) % len(vertices)]
+
+            elif isinstance(enemy, BlackHole):
+                layer = self._free_layer(hole_layers, members, 3)
+                layer[members] = (enemy.center.x, enemy.center.y,
+                                  enemy.radius * math.cos(math.pi / (4 * CIRCLE_QUAD_SEGMENTS)))
+
+        self._zone_layers = zone_layers
+        self._hole_layers = hole_layers
+
+    def _free_layer(self, layers: List[np.ndarray], members: np.ndarray, width: int) -> np.ndarray:
+        for layer in layers:
+            if np.isnan(layer[members, 0]).all():
+                return layer
+        layers.append(np.full((len(self.coordinates), width), np.nan))
+        return layers[-1]
+
+    @property
+    def kept_nodes(self) -> np.ndarray:
+        """(n,) boolean array of the nodes a shortest path may go through"""
+        return ~self.reflex | self.protected
+
+    def tangent_at(self, ends: np.ndarray, others: np.ndarray) -> np.ndarray:
+        """Checks that every edge is tangent to the obstacles at its `ends` node
+
+        :param ends: (m,) node indices of the end being checked
+        :param others: (m,) node indices of the other end
+        :return: (m,) boolean array
+        """
+        return self.tangent_towards(ends, self.coordinates[others]) | self.protected[ends]
+
+    def tangent_towards(self, ends: np.ndarray, others: np.ndarray) -> np.ndarray:
+        """Checks that every segment is tangent to the obstacles at its `ends` node, whatever its other end
+
+        Unlike `tangent_at`, protected nodes are constrained too.
+
+        :param ends: (m,) node indices of the end being checked
+        :param others: (m, 2) coordinates of the other end, which doesn't have to be a node
+        :return: (m,) boolean array
+        """
+        tangent = np.ones(len(ends), dtype=bool)
+        points = self.coordinates[ends]
+        direction = others - points
+        direction_norm = np.sqrt(direction[:, 0] ** 2 + direction[:, 1] ** 2)
+
+        for layer in self._zone_layers:
+            neighbours = layer[ends]
+            member = ~np.isnan(neighbours[:, 0])
+            sides = []
+            for offset in (0, 2):
+                to_neighbour = neighbours[:, offset:offset + 2] - points
+                side = direction[:, 0] * to_neighbour[:, 1] - direction[:, 1] * to_neighbour[:, 0]
+                scale = direction_norm * np.sqrt(to_neighbour[:, 0] ** 2 + to_neighbour[:, 1] ** 2)
+                sides.append(np.where(np.abs(side) <= _SIDE_TOLERANCE * scale, 0.0, np.sign(side)))
+            # Both polygon neighbours must be on the same side of the edge's line, or on it
+            tangent &= ~member | (sides[0] * sides[1] >= 0)
+
+        for layer in self._hole_layers:
+            holes = layer[ends]
+            member = ~np.isnan(holes[:, 0])
+            to_center = holes[:, 0:2] - points
+            with np.errstate(divide='ignore', invalid='ignore'):
+                line_distance = np.abs(direction[:, 0] * to_center[:, 1] - direction[:, 1] * to_center[:, 0]) / \
+                                direction_norm
+            # The edge's line must not cut through the black hole
+            tangent &= ~member | ~(line_distance < holes[:, 2] * (1 - _SIDE_TOLERANCE))
+
+        return tangent
+
+    def __call__(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Keeps candidate edges between kept nodes that are tangent to the obstacles at both ends
+
+        :param first: (m,) node indices of one end of every candidate edge
+        :param second: (m,) node indices of the other end
+        :return: (m,) boolean array of the candidates worth checking
+        """
+        kept = self.kept_nodes
+        return kept[first] & kept[second] & self.tangent_at(first, second) & self.tangent_at(second, first)
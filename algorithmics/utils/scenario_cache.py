@@ -0,0 +1,73 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple, Optional, Tuple, Any
+
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.scenario_loader import load_scenario
+
+
+class CachedScenario(NamedTuple):
+    source: Coordinate
+    targets: List[Coordinate]
+    allowed_detection: float
+    enemies: List[Enemy]
+    # Whatever the cache's `build_traces` derived from the scenario, None without it
+    traces: Any
+
+
+class ScenarioCache:
+    """In-process LRU cache of parsed scenarios, keyed by path and modification time
+
+    Editing a scenario file changes its modification time, so the next lookup parses it again. Cached scenarios are
+    shared between callers, who must not mutate them.
+    """
+
+    def __init__(self, max_entries: int = 32,
+                 build_traces: Optional[Callable[[Coordinate, List[Coordinate], List[Enemy]], Any]] = None):
+        """Initializes an empty cache
+
+        :param max_entries: amount of scenarios kept, the least recently used one is evicted beyond it
+        :param build_traces: derives static data from a parsed scenario (e.g. its plotly traces), stored with it
+        """
+        self.max_entries = max_entries
+        self.build_traces = build_traces
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[str, int], CachedScenario]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scenario_path: str) -> CachedScenario:
+        """Gives the parsed scenario, reading the file only if it isn't cached or changed since
+
+        :param scenario_path: path to scenario's JSON in the file system
+        :return: the parsed scenario and its derived traces
+        """
+        key = (os.path.abspath(scenario_path), os.stat(scenario_path).st_mtime_ns)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        source, targets, allowed_detection, enemies = load_scenario(scenario_path)
+        traces = None if self.build_traces is None else self.build_traces(source, targets, enemies)
+        scenario = CachedScenario(source, targets, allowed_detection, enemies, traces)
+
+        with self._lock:
+            self.misses += 1
+            # Older versions of the same file will never be looked up again
+            for stale_key in [k for k in self._entries if k[0] == key[0]]:
+                del self._entries[stale_key]
+            self._entries[key] = scenario
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return scenario
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
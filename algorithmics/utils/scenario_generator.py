@@ -0,0 +1,154 @@
+"""Generates large random scenarios, in the JSON schema `scenario_loader.load_scenario` reads
+
+The same seed and options always give the same scenario.
+
+Run from the repository root:
+    python -m algorithmics.utils.scenario_generator scenario_400.json --obstacles 400 --vertices 8 --seed 3
+"""
+import argparse
+import json
+import math
+import random
+from typing import Dict, List, Tuple
+
+# Gap kept between the bounding circles of separated obstacles, relative to their radii. Black hole points lie
+# slightly outside the black hole, the gap keeps them outside the other obstacles too.
+SEPARATION = 0.1
+# Digits obstacle coordinates are rounded to, keeps the JSON small
+DIGITS = 3
+# Attempts at placing every obstacle or point before giving up
+MAX_ATTEMPTS = 1000
+
+
+class _PlacementGrid:
+    """Bounding circles placed so far, bucketed in square cells to find the ones near a new circle quickly"""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[Tuple[float, float, float]]] = {}
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def is_free(self, x: float, y: float, radius: float) -> bool:
+        """Checks that a circle keeps its distance from the circles placed so far, which are at most a cell wide"""
+        cell_x, cell_y = self._cell(x, y)
+        reach = math.ceil(radius / self.cell_size) + 1
+        for i in range(cell_x - reach, cell_x + reach + 1):
+            for j in range(cell_y - reach, cell_y + reach + 1):
+                for other_x, other_y, other_radius in self.cells.get((i, j), ()):
+                    if math.hypot(x - other_x, y - other_y) < (radius + other_radius) * (1 + SEPARATION):
+                        return False
+        return True
+
+    def add(self, x: float, y: float, radius: float):
+        self.cells.setdefault(self._cell(x, y), []).append((x, y, radius))
+
+
+def _star_polygon(rng: random.Random, x: float, y: float, radius: float, vertices: int,
+                  concavity: float) -> List[List[float]]:
+    """Random simple polygon inside the circle, star shaped around its center
+
+    Every vertex gets its own sector of angles around the center, so consecutive vertices are less than half a turn
+    apart and the boundary can't cross itself.
+    """
+    angles = [2 * math.pi * (i + rng.uniform(0, 0.5)) / vertices for i in range(vertices)]
+    boundary = []
+    for angle in angles:
+        distance = radius * (1 - concavity * rng.random())
+        boundary.append([round(x + distance * math.cos(angle), DIGITS), round(y + distance * math.sin(angle), DIGITS)])
+    # Rounding may merge vertices of tiny polygons
+    return [vertex for i, vertex in enumerate(boundary) if vertex != boundary[i - 1]]
+
+
+def generate_scenario(obstacles: int, seed: int = 0, vertices: int = 6, density: float = 0.15,
+                      black_hole_share: float = 0.5, radars: int = 0, targets: int = 1,
+                      allowed_detection: float = 0, min_radius: float = 1, max_radius: float = 3,
+                      concavity: float = 0.5, separated: bool = True) -> Dict:
+    """Generates a random scenario over a square map
+
+    Obstacles are black holes and star shaped asteroid zones, each within a bounding circle of random radius. The
+    map's side is chosen so the bounding circles cover about `density` of it. The source and targets are placed
+    outside of all the obstacles, radars anywhere.
+
+    :param obstacles: amount of black holes and asteroid zones
+    :param seed: seed of the random generator
+    :param vertices: amount of vertices of every asteroid zone
+    :param density: share of the map covered by the obstacles' bounding circles
+    :param black_hole_share: share of the obstacles that are black holes
+    :param radars: amount of radars
+    :param targets: amount of targets
+    :param allowed_detection: allowed detection of the scenario
+    :param min_radius: smallest radius of an obstacle's bounding circle
+    :param max_radius: largest radius of an obstacle's bounding circle
+    :param concavity: how far asteroid zone vertices may be pulled from the bounding circle towards its center, 0 for
+        convex zones
+    :param separated: whether the obstacles' bounding circles must not overlap
+    :return: scenario as a JSON dictionary
+    """
+    if vertices < 3:
+        raise ValueError(f'Asteroid zones need at least 3 vertices, got {vertices}')
+    if not 0 < density < 1:
+        raise ValueError(f'Density must be between 0 and 1, got {density}')
+
+    rng = random.Random(seed)
+    radii = [rng.uniform(min_radius, max_radius) for _ in range(obstacles)]
+    side = math.sqrt(sum(math.pi * radius ** 2 for radius in radii) / density) if obstacles else 10 * max_radius
+    grid = _PlacementGrid(2 * max_radius)
+
+    def place(radius: float, keep_free: bool) -> Tuple[float, float]:
+        for _ in range(MAX_ATTEMPTS):
+            x, y = rng.uniform(radius, side - radius), rng.uniform(radius, side - radius)
+            if not keep_free or grid.is_free(x, y, radius):
+                return x, y
+        raise ValueError(f'Could not place {obstacles} separated obstacles at density {density}, lower it')
+
+    scenario = {'black_holes': [], 'asteroids_zones': [], 'radars': []}
+    # Largest first, they are the hardest to fit
+    for radius in sorted(radii, reverse=True):
+        x, y = place(radius, separated)
+        grid.add(x, y, radius)
+        if rng.random() < black_hole_share:
+            scenario['black_holes'].append({'center': [round(x, DIGITS), round(y, DIGITS)],
+                                            'radius': round(radius, DIGITS)})
+        else:
+            scenario['asteroids_zones'].append({'boundary': _star_polygon(rng, x, y, radius, vertices, concavity)})
+
+    for _ in range(radars):
+        radius = rng.uniform(2 * min_radius, 2 * max_radius)
+        x, y = place(0, False)
+        scenario['radars'].append({'center': [round(x, DIGITS), round(y, DIGITS)], 'radius': round(radius, DIGITS)})
+
+    # Points are placed as zero-radius circles, so they stay out of all obstacles even when those overlap
+    scenario['source'] = [round(value, DIGITS) for value in place(0, True)]
+    scenario['targets'] = [[round(value, DIGITS) for value in place(0, True)] for _ in range(targets)]
+    scenario['allowed-detection'] = allowed_detection
+    return scenario
+
+
+def write_scenario(scenario: Dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(scenario, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help='path of the scenario JSON to write')
+    parser.add_argument('--obstacles', type=int, default=100, help='amount of black holes and asteroid zones')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--vertices', type=int, default=6, help='vertices of every asteroid zone')
+    parser.add_argument('--density', type=float, default=0.15, help='share of the map covered by obstacles')
+    parser.add_argument('--black-hole-share', type=float, default=0.5, help='share of obstacles that are black holes')
+    parser.add_argument('--radars', type=int, default=0)
+    parser.add_argument('--targets', type=int, default=1)
+    parser.add_argument('--allowed-detection', type=float, default=0)
+    parser.add_argument('--overlapping', action='store_true', help='let obstacles overlap')
+    args = parser.parse_args()
+
+    scenario = generate_scenario(args.obstacles, args.seed, args.vertices, args.density, args.black_hole_share,
+                                 args.radars, args.targets, args.allowed_detection, separated=not args.overlapping)
+    write_scenario(scenario, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.black_hole import BlackHole
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.enemy.radar import Radar
+from algorithmics.utils.coordinate import Coordinate
+
+SCENARIOS_DIR = Path(__file__).resolve().parents[2] / 'resources' / 'scenarios'
+SCENARIO_NAMES_PATH = SCENARIOS_DIR.parent / 'scenario_names.json'
+
+
+def scenario_number(path: str) -> int:
+    """Extract the number of a scenario given its name in the file system, e.g. `scenario_5.json` gives 5"""
+    return int(re.match(r'.*scenario_(\d+)\.json', str(path)).group(1))
+
+
+def list_scenario_paths(scenarios_dir: Path = SCENARIOS_DIR) -> List[Path]:
+    """Lists the JSON files of all scenario groups, ordered by scenario number
+
+    :param scenarios_dir: directory holding a sub directory per scenario group
+    :return: paths of all scenario files
+    """
+    return sorted(scenarios_dir.glob('*/scenario_*.json'), key=scenario_number)
+
+
+def list_scenario_groups(scenarios_dir: Path = SCENARIOS_DIR) -> Dict[str, List[Path]]:
+    """Lists the JSON files of every scenario group, groups and files ordered by scenario number
+
+    :param scenarios_dir: directory holding a sub directory per scenario group
+    :return: paths of the scenario files of every group, by group name
+    """
+    groups: Dict[str, List[Path]] = {}
+    for path in list_scenario_paths(scenarios_dir):
+        groups.setdefault(path.parent.name, []).append(path)
+    return groups
+
+
+def load_scenario_names(names_path: Path = SCENARIO_NAMES_PATH) -> Dict[int, str]:
+    """Reads the display name of every scenario, by scenario number"""
+    with open(names_path, 'r') as f:
+        return {int(number): name for number, name in json.load(f).items()}
+
+
+def parse_coordinate(values: List[float]) -> Coordinate:
+    return Coordinate(values[0], values[1])
+
+
+def load_scenario(scenario_path: str) -> Tuple[Coordinate, List[Coordinate], float, List[Enemy]]:
+    """Reads and parses a scenario JSON file
+
+    :param scenario_path: path to scenario's JSON in the file system
+    :return: source, targets, allowed detection and enemies of the scenario
+    """
+    with open(scenario_path, 'r') as f:
+        raw_scenario = json.load(f)
+
+    # Parse scenario JSON
+    source = parse_coordinate(raw_scenario['source'])
+    targets = [parse_coordinate(target) for target in raw_scenario['targets']]
+    allowed_detection = raw_scenario['allowed-detection']
+    enemies: List[Enemy] = []
+    enemies += [BlackHole(parse_coordinate(hole['center']), hole['radius'])
+                for hole in raw_scenario['black_holes']]
+    enemies += [AsteroidsZone([parse_coordinate(c) for c in raw_zone['boundary']])
+                for raw_zone in raw_scenario['asteroids_zones']]
+    enemies += [Radar(parse_coordinate(raw_radar['center']), raw_radar['radius'])
+                for raw_radar in raw_scenario['radars']]
+
+    return source, targets, allowed_detection, enemies
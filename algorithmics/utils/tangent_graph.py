@@ -0,0 +1,163 @@
+import math
+from typing import List, Tuple, Optional, Dict, NamedTuple
+
+import numpy as np
+
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.csr_graph import CSRGraph
+
+# Arcs are flown along a polyline with at least this many segments per full turn
+ARC_SEGMENTS = 64
+
+
+def point_tangents(points: np.ndarray, center: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Finds where the two tangents from every point touch a circle
+
+    :param points: (m, 2) array of points
+    :param center: (2,) array, center of the circle
+    :param radius: radius of the circle
+    :return: two (m,) arrays holding the angle around the center of both tangent points, NaN for points that
+        aren't outside the circle
+    """
+    offset = points - center
+    distance = np.sqrt(offset[:, 0] ** 2 + offset[:, 1] ** 2)
+    direction = np.arctan2(offset[:, 1], offset[:, 0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spread = np.where(distance > radius, np.arccos(np.minimum(radius / distance, 1.0)), np.nan)
+    return direction - spread, direction + spread
+
+
+def circle_bitangents(center0: np.ndarray, radius0: float,
+                      center1: np.ndarray, radius1: float) -> List[Tuple[float, float]]:
+    """Finds the common tangents of two circles
+
+    Outer tangents exist unless one circle contains the other, inner tangents only for disjoint circles.
+
+    :param center0: (2,) array, center of the first circle
+    :param radius0: radius of the first circle
+    :param center1: (2,) array, center of the second circle
+    :param radius1: radius of the second circle
+    :return: for every tangent, the angle of its tangent point around the first and around the second center
+    """
+    offset = center1 - center0
+    distance = math.hypot(offset[0], offset[1])
+    direction = math.atan2(offset[1], offset[0])
+
+    tangents = []
+    if distance > abs(radius0 - radius1):
+        spread = math.acos((radius0 - radius1) / distance)
+        tangents += [(direction + spread, direction + spread), (direction - spread, direction - spread)]
+    if distance > radius0 + radius1:
+        spread = math.acos((radius0 + radius1) / distance)
+        tangents += [(direction + spread, direction + spread + math.pi),
+                     (direction - spread, direction - spread + math.pi)]
+    return tangents
+
+
+class Tangents(NamedTuple):
+    """Candidate straight segments touching black holes, each starting at a graph node or at a black hole
+
+    `start_nodes` is -1 for tangents starting at a black hole, `start_holes` and `start_angles` are -1 and NaN for
+    tangents starting at a node. Tangents always end at the black hole `end_holes`.
+    """
+    start_nodes: np.ndarray
+    start_holes: np.ndarray
+    start_angles: np.ndarray
+    end_holes: np.ndarray
+    end_angles: np.ndarray
+
+
+def candidate_tangents(coordinates: np.ndarray, centers: np.ndarray, radii: np.ndarray) -> Tangents:
+    """Lists the tangents from every node to every black hole, and the common tangents of every two black holes
+
+    :param coordinates: (n, 2) array of node coordinates
+    :param centers: (h, 2) array of black hole centers
+    :param radii: (h,) array of black hole radii
+    :return: the candidate tangents
+    """
+    parts = []
+    for h in range(len(centers)):
+        for angles in point_tangents(coordinates, centers[h], radii[h]):
+            outside = np.flatnonzero(~np.isnan(angles))
+            parts.append((outside, np.full(len(outside), -1), np.full(len(outside), np.nan),
+                          np.full(len(outside), h), angles[outside]))
+        for other in range(h + 1, len(centers)):
+            bitangents = np.array(circle_bitangents(centers[h], radii[h], centers[other], radii[other])).reshape(-1, 2)
+            parts.append((np.full(len(bitangents), -1), np.full(len(bitangents), h), bitangents[:, 0],
+                          np.full(len(bitangents), other), bitangents[:, 1]))
+
+    columns = [np.concatenate(column) for column in zip(*parts)] if parts else [np.zeros(0)] * 5
+    return Tangents(columns[0].astype(np.int64), columns[1].astype(np.int64), columns[2].astype(float),
+                    columns[3].astype(np.int64), columns[4].astype(float))
+
+
+def circle_points(centers: np.ndarray, radii: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """Computes points on circles given their angles around the centers
+
+    :param centers: (m, 2) array of circle centers
+    :param radii: (m,) array of circle radii
+    :param angles: (m,) array of angles
+    :return: (m, 2) array of points
+    """
+    return centers + radii[:, None] * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+
+def arc_corners(center: np.ndarray, radius: float, angle: float, sweep: float) -> np.ndarray:
+    """Computes the polyline followed along a counter-clockwise arc of a circle
+
+    The polyline goes around the outside of the circle, it is tangent to it at both ends of the arc and at every
+    `2 * pi / ARC_SEGMENTS` at most in between.
+
+    :param center: (2,) array, center of the circle
+    :param radius: radius of the circle
+    :param angle: angle around the center where the arc starts
+    :param sweep: angle covered by the arc
+    :return: (k, 2) array of the polyline's corners, excluding both ends of the arc
+    """
+    pieces = max(1, math.ceil(sweep * ARC_SEGMENTS / (2 * math.pi)))
+    step = sweep / pieces
+    corner_angles = angle + step * (np.arange(pieces) + 0.5)
+    corner_radius = radius / math.cos(step / 2)
+    return center + corner_radius * np.stack([np.cos(corner_angles), np.sin(corner_angles)], axis=1)
+
+
+class TangentGraph(CSRGraph):
+    """Visibility graph where black holes are exact circles instead of polygons around them
+
+    Black holes contribute no points of their own. The graph's other nodes are connected to the points where their
+    tangents touch every black hole, black holes are connected to each other along their common tangents, and
+    consecutive tangent points around every black hole are connected along the circle.
+
+    Arcs are edges between their end nodes weighted by the length flown along them, the corners of the polyline
+    followed in between are kept in `arcs`.
+    """
+
+    def __init__(self, nodes: List[Coordinate], first: np.ndarray, second: np.ndarray, weights: np.ndarray,
+                 exposures: Optional[np.ndarray] = None,
+                 arcs: Optional[Dict[Tuple[int, int], List[Coordinate]]] = None):
+        """Builds the graph from a list of undirected edges
+
+        :param nodes: coordinates of the graph's nodes
+        :param first: node indices of one end of every edge
+        :param second: node indices of the other end of every edge
+        :param weights: length of every edge
+        :param exposures: length of every edge inside radar coverage, if the scenario has radars
+        :param arcs: corners of the polyline followed along every arc edge, from its first end to its second
+        """
+        super().__init__(nodes, first, second, weights, exposures)
+        self.arcs: Dict[Tuple[int, int], List[Coordinate]] = {} if arcs is None else arcs
+
+    def path_coordinates(self, path: List[int]) -> List[Coordinate]:
+        """Converts a path of node indices into the waypoints the spaceship flies through, following arcs
+
+        :param path: indices of the nodes along the path
+        :return: coordinates along the path
+        """
+        coordinates = [self.nodes[i] for i in path[:1]]
+        for u, v in zip(path, path[1:]):
+            if (u, v) in self.arcs:
+                coordinates += self.arcs[(u, v)]
+            elif (v, u) in self.arcs:
+                coordinates += self.arcs[(v, u)][::-1]
+            coordinates.append(self.nodes[v])
+        return coordinates
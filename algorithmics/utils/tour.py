@@ -0,0 +1,139 @@
+from itertools import permutations
+from typing import List, Optional
+
+import numpy as np
+
+# Up to this many stops besides the start, every order is tried when the shortest one is too exposed
+EXHAUSTIVE_STOPS = 8
+
+
+def nearest_neighbour_order(distances: np.ndarray) -> List[int]:
+    """Orders the visits greedily, always moving to the closest unvisited stop
+
+    :param distances: (k, k) matrix of distances between the stops, stop 0 is the fixed starting point
+    :return: order of the stops, starting with 0
+    """
+    order = [0]
+    unvisited = set(range(1, len(distances)))
+    while unvisited:
+        closest = min(unvisited, key=lambda stop: distances[order[-1], stop])
+        order.append(closest)
+        unvisited.remove(closest)
+    return order
+
+
+def two_opt(order: List[int], distances: np.ndarray) -> List[int]:
+    """Improves an open tour by reversing sections of it for as long as that shortens it
+
+    The tour starts at `order[0]`, which stays in place, and may end at any stop.
+
+    :param order: initial order of the stops
+    :param distances: (k, k) symmetric matrix of distances between the stops
+    :return: improved order of the stops
+    """
+    order = list(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(order) - 1):
+            for j in range(i + 1, len(order)):
+                # Reversing order[i..j] replaces the edges (i-1, i) and (j, j+1) with (i-1, j) and (i, j+1)
+                before, first, last = order[i - 1], order[i], order[j]
+                delta = distances[before, last] - distances[before, first]
+                if j + 1 < len(order):
+                    after = order[j + 1]
+                    delta += distances[first, after] - distances[last, after]
+                if delta < -1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    improved = True
+    return order
+
+
+def or_opt(order: List[int], distances: np.ndarray, max_segment: int = 3) -> List[int]:
+    """Improves an open tour by moving short runs of stops elsewhere in it, possibly reversed
+
+    :param order: initial order of the stops, `order[0]` stays in place
+    :param distances: (k, k) symmetric matrix of distances between the stops
+    :param max_segment: longest run of consecutive stops to move
+    :return: improved order of the stops
+    """
+    order = list(order)
+    improved = True
+    while improved:
+        improved = False
+        for length in range(1, max_segment + 1):
+            for i in range(1, len(order) - length + 1):
+                j = i + length - 1
+                first, last, before = order[i], order[j], order[i - 1]
+                after = order[j + 1] if j + 1 < len(order) else None
+                removal_gain = distances[before, first]
+                if after is not None:
+                    removal_gain += distances[last, after] - distances[before, after]
+
+                rest = order[:i] + order[j + 1:]
+                segment = order[i:j + 1]
+                best_delta, best_order = -1e-9, None
+                for position in range(len(rest)):
+                    if position == i - 1:
+                        continue
+                    left = rest[position]
+                    right = rest[position + 1] if position + 1 < len(rest) else None
+                    for inserted in (segment, segment[::-1]):
+                        cost = distances[left, inserted[0]]
+                        if right is not None:
+                            cost += distances[inserted[-1], right] - distances[left, right]
+                        if cost - removal_gain < best_delta:
+                            best_delta = cost - removal_gain
+                            best_order = rest[:position + 1] + inserted + rest[position + 1:]
+                if best_order is not None:
+                    order = best_order
+                    improved = True
+                    break
+            if improved:
+                break
+    return order
+
+
+def order_stops(distances: np.ndarray) -> List[int]:
+    """Finds a short order to visit all stops, starting at stop 0
+
+    Starts from the nearest neighbour order and alternates 2-opt and Or-opt until neither improves it.
+
+    :param distances: (k, k) symmetric matrix of distances between the stops
+    :return: order of the stops, starting with 0
+    """
+    order = nearest_neighbour_order(distances)
+    length = tour_length(order, distances)
+    while True:
+        order = or_opt(two_opt(order, distances), distances)
+        new_length = tour_length(order, distances)
+        if new_length >= length - 1e-9:
+            return order
+        length = new_length
+
+
+def tour_length(order: List[int], distances: np.ndarray) -> float:
+    return float(sum(distances[a, b] for a, b in zip(order, order[1:])))
+
+
+def order_stops_within(distances: np.ndarray, exposures: np.ndarray, allowed_exposure: float) -> Optional[List[int]]:
+    """Finds a short order to visit all stops, starting at stop 0, whose exposure stays within the allowed exposure
+
+    With up to `EXHAUSTIVE_STOPS` stops every order is tried, and the shortest fitting one is returned. With more, the
+    order is optimized for exposure alone, like `order_stops` does for length.
+
+    :param distances: (k, k) symmetric matrix of distances between the stops
+    :param exposures: (k, k) symmetric matrix of the least exposures between the stops
+    :param allowed_exposure: maximal total exposure of the order
+    :return: order of the stops starting with 0, or None if no order found fits
+    """
+    if len(distances) - 1 > EXHAUSTIVE_STOPS:
+        order = order_stops(exposures)
+        return order if tour_length(order, exposures) <= allowed_exposure else None
+
+    orders = np.array([(0,) + order for order in permutations(range(1, len(distances)))], dtype=np.int64)
+    order_exposures = exposures[orders[:, :-1], orders[:, 1:]].sum(axis=1)
+    fitting = orders[order_exposures <= allowed_exposure]
+    if len(fitting) == 0:
+        return None
+    return fitting[np.argmin(distances[fitting[:, :-1], fitting[:, 1:]].sum(axis=1))].tolist()
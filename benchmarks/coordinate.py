@@ -0,0 +1,90 @@
+"""Compares the slotted, quantized-hash `Coordinate` with the previous dict-based one
+
+Measures memory per instance, hash collisions on a grid of points, building a networkx graph keyed by coordinates
+and `in zone.boundary` lookups.
+
+Run from the repository root:
+    python -m benchmarks.coordinate
+"""
+import math
+import time
+import tracemalloc
+from itertools import combinations
+
+import networkx as nx
+
+from algorithmics.utils.coordinate import Coordinate
+
+
+class _LegacyCoordinate:
+    """The coordinate as it was before: instance `__dict__` and an xor hash"""
+
+    def __init__(self, x: float, y: float) -> None:
+        super().__init__()
+        self.x = x
+        self.y = y
+
+    def __eq__(self, o: object) -> bool:
+        if not isinstance(o, _LegacyCoordinate):
+            return False
+        return math.fabs(self.x - o.x) <= 1e-6 and math.fabs(self.y - o.y) <= 1e-6
+
+    def __hash__(self) -> int:
+        return hash(self.x) ^ hash(self.y)
+
+
+def _grid(cls, size: int):
+    return [cls(float(x), float(y)) for x in range(size) for y in range(size)]
+
+
+def _bytes_per_instance(cls, amount: int = 100_000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [cls(float(i), float(-i)) for i in range(amount)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del instances
+    return (after - before) / amount
+
+
+def _hash_collisions(cls, size: int = 100) -> int:
+    points = _grid(cls, size)
+    return len(points) - len({hash(point) for point in points})
+
+
+def _graph_build_time(cls, size: int = 20) -> float:
+    points = _grid(cls, size)
+    start_time = time.perf_counter()
+    graph = nx.Graph()
+    graph.add_nodes_from(points)
+    graph.add_edges_from(combinations(points, 2))
+    return time.perf_counter() - start_time
+
+
+def _boundary_lookup_time(cls, vertices: int = 200, lookups: int = 2_000, repeats: int = 7) -> float:
+    boundary = [cls(math.cos(i), math.sin(i)) for i in range(vertices)]
+    # Spread over twice the boundary's angles, so some queries are on it and most aren't
+    angles = [i * 2 * vertices / lookups for i in range(lookups)]
+    queries = [cls(math.cos(angle), math.sin(angle)) for angle in angles]
+    # Best of several runs, a single one is within the noise of the difference
+    best = float('inf')
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        for query in queries:
+            _ = query in boundary
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def main():
+    rows = [('bytes per instance', _bytes_per_instance),
+            ('hash collisions on 100x100 grid', _hash_collisions),
+            ('graph build on 20x20 grid [s]', _graph_build_time),
+            ('`in boundary` lookups [s]', _boundary_lookup_time)]
+    print(f'{"":<34}{"legacy":>12}{"slotted":>12}')
+    for name, measure in rows:
+        print(f'{name:<34}{measure(_LegacyCoordinate):>12.4g}{measure(Coordinate):>12.4g}')
+
+
+if __name__ == '__main__':
+    main()
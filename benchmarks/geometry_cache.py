@@ -0,0 +1,69 @@
+"""Measures the planner time saved by caching enemy geometry
+
+Builds every bundled scenario's graph with the per-edge checker twice: once with the cached prepared geometry of
+the enemies and once rebuilding the shapely geometry for every edge, as the checker used to.
+
+Run from the repository root:
+    python -m benchmarks.geometry_cache
+"""
+import contextlib
+import io
+import time
+from unittest import mock
+
+from shapely.geometry import LineString, Point, Polygon
+
+from algorithmics import edge_checker
+from algorithmics.utils import create_graph
+from algorithmics.utils.scenario_loader import list_scenario_paths, load_scenario
+
+
+def _uncached_is_legal_edge_astroid(c0, c1, zone, provenance=None):
+    # Scans the boundary like the checker used to, the provenance it's given now is ignored
+    line = LineString([(c0.x, c0.y), (c1.x, c1.y)])
+    poly = Polygon([(c.x, c.y) for c in zone.boundary])
+    if not line.intersects(poly):
+        return True
+    if (c0 in zone.boundary) != (c1 in zone.boundary):
+        return 'LineString' not in str(type(line.intersection(poly)))
+    boundary = zone.boundary
+    for i in range(len(boundary)):
+        if {c0, c1} == {boundary[i - 1], boundary[i]}:
+            return True
+    return False
+
+
+def _uncached_is_legal_edge_black_hole(c0, c1, hole):
+    line = LineString([(c0.x, c0.y), (c1.x, c1.y)])
+    return not line.intersects(Point(hole.center.x, hole.center.y).buffer(hole.radius))
+
+
+def _time_graph_build(scenario_path, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        # Fresh enemies every time so no geometry is cached from a previous run
+        source, targets, _, enemies = load_scenario(scenario_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start_time = time.perf_counter()
+            create_graph.init_graph(source, targets[0], enemies, batch=False)
+            best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def main(repeats: int = 3):
+    total_cached = total_uncached = 0
+    print(f'{"scenario":<20}{"uncached [s]":>14}{"cached [s]":>14}{"saved":>8}')
+    for path in list_scenario_paths():
+        cached = _time_graph_build(path, repeats)
+        with mock.patch.object(edge_checker, 'is_legal_edge_astroid', _uncached_is_legal_edge_astroid), \
+                mock.patch.object(edge_checker, 'is_legal_edge_black_hole', _uncached_is_legal_edge_black_hole):
+            uncached = _time_graph_build(path, repeats)
+        total_cached += cached
+        total_uncached += uncached
+        saved = 1 - cached / uncached if uncached > 0 else 0
+        print(f'{path.name:<20}{uncached:>14.4f}{cached:>14.4f}{saved:>8.0%}')
+    print(f'{"total":<20}{total_uncached:>14.4f}{total_cached:>14.4f}{1 - total_cached / total_uncached:>8.0%}')
+
+
+if __name__ == '__main__':
+    main()
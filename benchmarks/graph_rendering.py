@@ -0,0 +1,68 @@
+"""Compares drawing a large graph's edges with the previous list-based trace against the culled NumPy one
+
+The previous trace flattened every edge through list comprehensions, and the app sent all of them to the browser.
+The new one culls the edges outside the viewport and keeps at most `MAX_DRAWN_EDGES` of the longest ones. Measures
+the time to build the trace's x / y values and the size of their JSON, zoomed out and zoomed in.
+
+Run from the repository root:
+    python -m benchmarks.graph_rendering
+    python -m benchmarks.graph_rendering --edges 500000
+"""
+import argparse
+import json
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from algorithmics.utils.graph_rendering import visible_edges, edge_lines, MAX_DRAWN_EDGES
+
+
+def _legacy_lines(edges: List[Tuple[float, float, float, float]]) -> Tuple[list, list]:
+    xs = [x for pairs in [[edge[0], edge[2], None] for edge in edges] for x in pairs]
+    ys = [y for pairs in [[edge[1], edge[3], None] for edge in edges] for y in pairs]
+    return xs, ys
+
+
+def _payload(xs, ys) -> str:
+    # Plotly sends NaN gaps as null, like the None gaps of the legacy trace
+    if isinstance(xs, np.ndarray):
+        xs = [None if np.isnan(x) else x for x in xs.tolist()]
+        ys = [None if np.isnan(y) else y for y in ys.tolist()]
+    return json.dumps({'x': xs, 'y': ys})
+
+
+def _synthetic_edges(amount: int, seed: int = 0) -> np.ndarray:
+    """Edges from random points of a 100 x 100 square to points around them, mostly short with a tail of long ones"""
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform(0, 100, (amount, 2))
+    ends = starts + rng.standard_cauchy((amount, 2)).clip(-100, 100) * 3
+    return np.hstack([starts, ends])
+
+
+def _measure(name: str, build, repeats: int):
+    times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        xs, ys = build()
+        times.append(time.perf_counter() - start_time)
+    payload = _payload(xs, ys)
+    print(f'{name:<28}{min(times) * 1000:>10.1f} ms  {len(payload) / 1e6:>8.2f} MB  {len(xs) // 3:>8} edges')
+
+
+def main(edges_amount: int = 150000, repeats: int = 3):
+    edges = _synthetic_edges(edges_amount)
+    edge_tuples = [tuple(edge) for edge in edges.tolist()]
+    print(f'{edges_amount} edges, drawing at most {MAX_DRAWN_EDGES}')
+    _measure('legacy lists', lambda: _legacy_lines(edge_tuples), repeats)
+    _measure('numpy, zoomed out', lambda: edge_lines(visible_edges(edges)), repeats)
+    _measure('numpy, zoomed in 4x', lambda: edge_lines(visible_edges(edges, (40, 65), (40, 65))), repeats)
+    _measure('numpy, zoomed in 20x', lambda: edge_lines(visible_edges(edges, (50, 55), (50, 55))), repeats)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--edges', type=int, default=150000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    main(args.edges, args.repeats)
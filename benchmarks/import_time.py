@@ -0,0 +1,80 @@
+"""Measures how long importing the planning core takes, and checks it doesn't load UI or lazily loaded dependencies
+
+Every module is imported in a fresh interpreter, so nothing is shared between measurements. numpy is imported
+eagerly by the core, its own import time is shown as the floor. networkx and shapely are only loaded once used
+(networkx through `lazy_import`, shapely by the functions using it), and the UI's dependencies (dash, plotly,
+cryptography) must not be loaded at all.
+
+Run from the repository root:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeats 9 --max-ms 300
+
+The exit status is 1 if a core module loads one of those dependencies, or with `--max-ms`, if its median import
+time is above that.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+CORE_MODULES = ['algorithmics.navigator', 'algorithmics.edge_checker', 'algorithmics.utils.create_graph',
+                'algorithmics.enemy.asteroids_zone', 'algorithmics.enemy.black_hole', 'algorithmics.enemy.radar',
+                'algorithmics.planner']
+# Dependencies the core must not load on import
+UI_DEPENDENCIES = ['dash', 'plotly', 'cryptography']
+LAZY_DEPENDENCIES = ['networkx', 'shapely']
+
+_MEASURE = '''
+import json, sys, time
+from types import ModuleType
+start_time = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start_time
+# Lazily imported modules only appear in sys.modules once used
+loaded = [name for name in {dependencies!r} if type(sys.modules.get(name)) is ModuleType]
+print(json.dumps({{'time': duration, 'loaded': loaded}}))
+'''
+
+
+def measure_import(module: str, repeats: int) -> Dict[str, object]:
+    """Imports a module in fresh interpreters
+
+    :param module: name of the module to import
+    :param repeats: amount of interpreters to time the import in
+    :return: median import time in seconds, and the dependencies the import loaded
+    """
+    times, loaded = [], set()
+    for _ in range(repeats):
+        code = _MEASURE.format(module=module, dependencies=UI_DEPENDENCIES + LAZY_DEPENDENCIES)
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        times.append(result['time'])
+        loaded.update(result['loaded'])
+    return {'time': statistics.median(times), 'loaded': sorted(loaded)}
+
+
+def main(modules: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=modules or CORE_MODULES, help='modules to import')
+    parser.add_argument('--repeats', type=int, default=5, help='fresh interpreters per module')
+    parser.add_argument('--max-ms', type=float, help='median import time above which the run fails')
+    args = parser.parse_args()
+
+    print(f'{"module":<36}{"import [ms]":>12}  loaded')
+    for name in ['numpy'] + LAZY_DEPENDENCIES:
+        print(f'{name:<36}{measure_import(name, args.repeats)["time"] * 1000:>12.1f}  (reference)')
+    failed = False
+    for module in args.modules:
+        result = measure_import(module, args.repeats)
+        too_slow = args.max_ms is not None and result['time'] * 1000 > args.max_ms
+        failed |= too_slow or bool(result['loaded'])
+        print(f'{module:<36}{result["time"] * 1000:>12.1f}  {", ".join(result["loaded"]) or "-"}'
+              f'{"  too slow" if too_slow else ""}')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
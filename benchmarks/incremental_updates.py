@@ -0,0 +1,80 @@
+"""Compares updating a `Planner` after one enemy changes against building a new planner over the changed enemies
+
+Every step adds, moves or removes a random enemy, the updated graph is checked to be identical to the rebuilt one.
+
+Run from the repository root:
+    python -m benchmarks.incremental_updates [steps]
+"""
+import random
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.black_hole import BlackHole
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.enemy.radar import Radar
+from algorithmics.planner import Planner
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.scenario_loader import list_scenario_paths, load_scenario
+from benchmarks.parallel_edges import _synthetic_enemies
+
+
+def _moved(enemy: Enemy, dx: float, dy: float) -> Enemy:
+    if isinstance(enemy, Radar):
+        return Radar(Coordinate(enemy.center.x + dx, enemy.center.y + dy), enemy.radius)
+    if isinstance(enemy, BlackHole):
+        return BlackHole(Coordinate(enemy.center.x + dx, enemy.center.y + dy), enemy.radius)
+    return AsteroidsZone([Coordinate(c.x + dx, c.y + dy) for c in enemy.boundary])
+
+
+def _same_graph(planner: Planner, other: Planner) -> bool:
+    if planner.nodes != other.nodes:
+        return False
+    for first, second in ((planner._first, other._first), (planner._second, other._second),
+                          (planner._lengths, other._lengths), (planner._exposures, other._exposures)):
+        if (first is None) != (second is None) or (first is not None and not np.array_equal(first, second)):
+            return False
+    return True
+
+
+def _compare(name: str, enemies: List[Enemy], steps: int, seed: int = 0):
+    rng = random.Random(seed)
+    planner = Planner(list(enemies))
+    update_time = build_time = 0.0
+    same = True
+    for step in range(steps):
+        enemy = rng.choice(planner.enemies)
+        start_time = time.perf_counter()
+        if step % 3 == 0:
+            planner.add_enemy(_moved(enemy, rng.uniform(-8, 8), rng.uniform(-8, 8)))
+        elif step % 3 == 1:
+            planner.move_enemy(enemy, _moved(enemy, rng.uniform(-3, 3), rng.uniform(-3, 3)))
+        else:
+            planner.remove_enemy(enemy)
+        update_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        rebuilt = Planner(planner.enemies, reduced=planner.reduced)
+        build_time += time.perf_counter() - start_time
+        same &= _same_graph(planner, rebuilt)
+
+    print(f'{name:<16}{planner.number_of_nodes():>8}{build_time / steps * 1000:>14.2f}'
+          f'{update_time / steps * 1000:>14.2f}{build_time / update_time:>10.1f}x{"yes" if same else "NO":>7}')
+
+
+def main(steps: int = 9):
+    print(f'{steps} changes per map, alternately adding, moving and removing an enemy')
+    print(f'{"map":<16}{"nodes":>8}{"rebuild [ms]":>14}{"update [ms]":>14}{"speedup":>11}{"same":>7}')
+    _compare('synthetic 60', _synthetic_enemies(40, 20), steps)
+    _compare('synthetic 240', _synthetic_enemies(160, 80), steps)
+    for scenario_path in list_scenario_paths():
+        if scenario_path.stem in ('scenario_8', 'scenario_13', 'scenario_17'):
+            _, _, _, enemies = load_scenario(scenario_path)
+            _compare(scenario_path.stem, enemies, steps)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
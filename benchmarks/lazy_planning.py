@@ -0,0 +1,65 @@
+"""Compares lazy planning, which only checks the edges on candidate paths, with building the whole graph first
+
+Plans sparse synthetic scenarios of growing size, and the bundled scenarios without radars, both ways. Prints the
+amount of edges checked, the time taken and whether both ways found paths of the same length.
+
+Maps with fewer than `LAZY_MIN_OBSTACLES` obstacles, like the bundled scenarios, get their whole graph built even when
+lazy planning is asked for. They are planned with `plan_lazy` directly here, to show where the threshold comes from.
+
+Run from the repository root:
+    python -m benchmarks.lazy_planning
+"""
+import time
+from typing import List
+
+import networkx as nx
+
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.enemy.radar import Radar
+from algorithmics.navigator import calculate_path, plan_lazy
+from algorithmics.utils import profiling
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.scenario_loader import list_scenario_paths, load_scenario
+from benchmarks.parallel_edges import _synthetic_enemies
+
+
+def _path_length(path: List[Coordinate]) -> float:
+    return sum(start.distance_to(end) for start, end in zip(path, path[1:]))
+
+
+def _compare(name: str, source: Coordinate, targets: List[Coordinate], enemies: List[Enemy]):
+    results = []
+    for lazy in (False, True):
+        with profiling.profiling() as profile:
+            start_time = time.perf_counter()
+            if lazy:
+                path, _ = plan_lazy(source, targets, enemies, reduced=True)
+            else:
+                path, _ = calculate_path(source, targets, enemies, as_networkx=False)
+            elapsed = time.perf_counter() - start_time
+        checks = profile.counters['lazy edge checks' if lazy else 'candidate pairs']
+        results.append((checks, elapsed, _path_length(path)))
+    (eager_checks, eager_time, eager_length), (lazy_checks, lazy_time, lazy_length) = results
+    print(f'{name:<20}{eager_checks:>10}{lazy_checks:>10}{eager_time:>10.3f}{lazy_time:>10.3f}'
+          f'{"yes" if abs(eager_length - lazy_length) < 1e-6 else "NO":>8}')
+
+
+def main():
+    print(f'{"scenario":<20}{"eager":>10}{"lazy":>10}{"eager [s]":>10}{"lazy [s]":>10}{"same":>8}')
+    print(f'{"":<20}{"checks":>10}{"checks":>10}')
+    for obstacles in (10, 40, 160):
+        enemies = _synthetic_enemies(obstacles, obstacles // 2)
+        _compare(f'synthetic {obstacles + obstacles // 2}', Coordinate(-5, -5), [Coordinate(105, 105)], enemies)
+
+    for scenario_path in list_scenario_paths():
+        source, targets, _, enemies = load_scenario(scenario_path)
+        if any(isinstance(enemy, Radar) for enemy in enemies):
+            continue
+        try:
+            _compare(scenario_path.stem, source, targets, enemies)
+        except nx.NetworkXNoPath as e:
+            print(f'{scenario_path.stem:<20}{e}')
+
+
+if __name__ == '__main__':
+    main()
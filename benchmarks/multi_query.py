@@ -0,0 +1,71 @@
+"""Compares answering many queries over one map with `Planner` against calling `calculate_path` for every query
+
+The planner builds the graph between the enemies' points once, then every query only checks the edges of its own
+source and target. Random queries are planned both ways over a synthetic map and over bundled scenarios.
+
+Run from the repository root:
+    python -m benchmarks.multi_query [queries]
+"""
+import random
+import sys
+import time
+from typing import List
+
+import networkx as nx
+
+from algorithmics.enemy.enemy import Enemy
+from algorithmics.navigator import calculate_path
+from algorithmics.planner import Planner
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.scenario_loader import list_scenario_paths, load_scenario
+from benchmarks.parallel_edges import _synthetic_enemies
+
+
+def _path_length(path: List[Coordinate]) -> float:
+    return sum(start.distance_to(end) for start, end in zip(path, path[1:]))
+
+
+def _try_plan(plan, source: Coordinate, target: Coordinate) -> float:
+    try:
+        return _path_length(plan(source, [target]))
+    except nx.NetworkXNoPath:
+        return float('inf')
+
+
+def _compare(name: str, enemies: List[Enemy], area: List[Coordinate], queries: int, seed: int = 0):
+    rng = random.Random(seed)
+    min_x, max_x = min(c.x for c in area), max(c.x for c in area)
+    min_y, max_y = min(c.y for c in area), max(c.y for c in area)
+    pairs = [tuple(Coordinate(rng.uniform(min_x, max_x), rng.uniform(min_y, max_y)) for _ in range(2))
+             for _ in range(queries)]
+
+    start_time = time.perf_counter()
+    eager_lengths = [_try_plan(lambda source, targets: calculate_path(source, targets, enemies, as_networkx=False)[0],
+                               source, target) for source, target in pairs]
+    eager_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    planner = Planner(enemies)
+    build_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    planner_lengths = [_try_plan(planner.plan, source, target) for source, target in pairs]
+    query_time = time.perf_counter() - start_time
+
+    same = all(abs(a - b) < 1e-6 or a == b for a, b in zip(eager_lengths, planner_lengths))
+    print(f'{name:<16}{planner.number_of_nodes():>8}{eager_time / queries * 1000:>12.2f}{build_time * 1000:>12.2f}'
+          f'{query_time / queries * 1000:>12.2f}{eager_time / (build_time + query_time):>10.1f}x'
+          f'{"yes" if same else "NO":>7}')
+
+
+def main(queries: int = 20):
+    print(f'{queries} random queries per map')
+    print(f'{"map":<16}{"nodes":>8}{"eager [ms]":>12}{"build [ms]":>12}{"query [ms]":>12}{"speedup":>11}{"same":>7}')
+    _compare('synthetic 60', _synthetic_enemies(40, 20), [Coordinate(0, 0), Coordinate(100, 100)], queries)
+    for scenario_path in list_scenario_paths():
+        if scenario_path.stem in ('scenario_8', 'scenario_13', 'scenario_17'):
+            source, targets, _, enemies = load_scenario(scenario_path)
+            _compare(scenario_path.stem, enemies, [source] + targets, queries)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
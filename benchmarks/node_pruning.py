@@ -0,0 +1,63 @@
+"""Measures what dropping unreachable nodes before checking edges saves, end to end
+
+Scenarios with overlapping obstacles, like "The Packman" (13 and 20), have many black hole points inside asteroid
+zones. Every scenario is planned with `create_graph.prune_graph_nodes` and with it replaced by a pass keeping all the
+nodes, the paths must have the same length.
+
+Run from the repository root:
+    python -m benchmarks.node_pruning [repeats]
+"""
+import contextlib
+import io
+import statistics
+import sys
+import time
+from typing import List
+from unittest import mock
+
+from algorithmics.navigator import calculate_path
+from algorithmics.utils import profiling
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.scenario_loader import list_scenario_paths, load_scenario
+
+SCENARIOS = ('scenario_5', 'scenario_8', 'scenario_13', 'scenario_20')
+
+
+def _keep_all_nodes(nodes: List[Coordinate], *args, **kwargs) -> List[Coordinate]:
+    return nodes
+
+
+def _time_plan(scenario_path):
+    source, targets, allowed_detection, enemies = load_scenario(scenario_path)
+    with profiling.profiling() as profile, contextlib.redirect_stdout(io.StringIO()):
+        start_time = time.perf_counter()
+        # Scenarios 13 and 20 have targets inside radar coverage
+        path, _ = calculate_path(source, targets, enemies, allowed_detection, as_networkx=False, relax_detection=True)
+        duration = time.perf_counter() - start_time
+    length = sum(start.distance_to(end) for start, end in zip(path, path[1:]))
+    return duration, profile.counters, length
+
+
+def main(repeats: int = 15):
+    print(f'{"scenario":<14}{"nodes":>8}{"pruned":>8}{"pairs before":>14}{"pairs after":>13}'
+          f'{"before [ms]":>13}{"after [ms]":>12}{"speedup":>9}{"same":>6}')
+    for scenario_path in list_scenario_paths():
+        if scenario_path.stem not in SCENARIOS:
+            continue
+        # Alternating the runs spreads load changes of the machine over both
+        before_times, after_times = [], []
+        for _ in range(repeats):
+            with mock.patch('algorithmics.utils.create_graph.prune_graph_nodes', _keep_all_nodes):
+                before, before_counters, before_length = _time_plan(scenario_path)
+            after, after_counters, after_length = _time_plan(scenario_path)
+            before_times.append(before)
+            after_times.append(after)
+        before, after = statistics.median(before_times), statistics.median(after_times)
+        print(f'{scenario_path.stem:<14}{before_counters["nodes"]:>8}{after_counters.get("pruned nodes", 0):>8}'
+              f'{before_counters["candidate pairs"]:>14}{after_counters["candidate pairs"]:>13}'
+              f'{before * 1000:>13.1f}{after * 1000:>12.1f}{before / after:>8.2f}x'
+              f'{"yes" if abs(before_length - after_length) < 1e-9 else "NO":>6}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,68 @@
+"""Measures how edge construction scales with the amount of worker processes
+
+Builds the legal edges of a large synthetic scenario with 1 to N workers, and checks every run finds the same edges
+in the same order as the serial one.
+
+Run from the repository root:
+    python -m benchmarks.parallel_edges [max workers]
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from algorithmics import create_legal_edges
+from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.black_hole import BlackHole
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.node_provenance import NodeProvenance
+from algorithmics.utils.obstacle_index import ObstacleIndex
+
+
+def _synthetic_enemies(zones: int, holes: int, seed: int = 0):
+    rng = random.Random(seed)
+    enemies = []
+    for _ in range(zones):
+        x, y, size = rng.uniform(0, 100), rng.uniform(0, 100), rng.uniform(1, 4)
+        enemies.append(AsteroidsZone([Coordinate(x, y), Coordinate(x + size, y),
+                                      Coordinate(x + size, y + size), Coordinate(x, y + size)]))
+    for _ in range(holes):
+        enemies.append(BlackHole(Coordinate(rng.uniform(0, 100), rng.uniform(0, 100)), rng.uniform(0.5, 2)))
+    return enemies
+
+
+def main(max_workers: int = None, zones: int = 40, holes: int = 20, repeats: int = 3):
+    max_workers = max_workers or os.cpu_count() or 1
+    enemies = _synthetic_enemies(zones, holes)
+    provenance = NodeProvenance()
+    nodes = []
+    for enemy in enemies:
+        points = enemy.get_points()
+        provenance.add_enemy(enemy, points)
+        nodes += points
+    nodes = list(dict.fromkeys(nodes))
+    coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float)
+    vertex_tables = create_legal_edges.get_vertex_tables(nodes, enemies, provenance)
+    pairs = len(nodes) * (len(nodes) - 1) // 2
+    print(f'{len(nodes)} nodes, {pairs} candidate pairs, {os.cpu_count()} cores')
+
+    print(f'{"workers":<10}{"time [s]":>12}{"speedup":>10}')
+    serial_time = expected = None
+    for workers in range(1, max_workers + 1):
+        best = float('inf')
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            edges = create_legal_edges.get_legal_edge_arrays(coordinates, enemies, index=ObstacleIndex(enemies),
+                                                             vertex_tables=vertex_tables, workers=workers)
+            best = min(best, time.perf_counter() - start_time)
+        if expected is None:
+            serial_time, expected = best, edges
+        elif not all(np.array_equal(found, wanted) for found, wanted in zip(edges, expected)):
+            raise AssertionError(f'{workers} workers found different edges than a single one')
+        print(f'{workers:<10}{best:>12.3f}{serial_time / best:>9.2f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
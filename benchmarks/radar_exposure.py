@@ -0,0 +1,49 @@
+"""Compares computing radar exposures with NumPy chords against shapely intersections, segment by segment
+
+Random segments are scored against random, overlapping radars: the covered length of every segment (as stored on
+graph edges) and the covered intervals (as highlighted on paths).
+
+Run from the repository root:
+    python -m benchmarks.radar_exposure [segments] [radars]
+"""
+import sys
+import time
+
+import numpy as np
+from shapely.geometry import LineString, Point
+from shapely.ops import unary_union
+
+from algorithmics.utils import geometry
+
+
+def main(segments: int = 20000, radars: int = 10):
+    rng = np.random.default_rng(0)
+    starts, ends = rng.uniform(0, 100, (segments, 2)), rng.uniform(0, 100, (segments, 2))
+    centers, radii = rng.uniform(0, 100, (radars, 2)), rng.uniform(5, 20, radars)
+
+    start_time = time.perf_counter()
+    coverage = unary_union([Point(*center).buffer(radius, 64) for center, radius in zip(centers, radii)])
+    shapely_exposures = np.array([LineString([start, end]).intersection(coverage).length
+                                  for start, end in zip(starts, ends)])
+    shapely_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    exposures = geometry.segments_circles_exposure(starts, ends, centers, radii)
+    exposure_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    rows, _, _ = geometry.segments_circles_intervals(starts, ends, centers, radii)
+    interval_time = time.perf_counter() - start_time
+
+    # Shapely's circles are polygons, slightly inside the true circles
+    difference = np.abs(exposures - shapely_exposures).max()
+    print(f'{segments} segments, {radars} radars, {len(rows)} detected intervals')
+    print(f'{"method":<20}{"time [ms]":>12}{"speedup":>10}')
+    print(f'{"shapely":<20}{shapely_time * 1000:>12.1f}')
+    print(f'{"numpy exposures":<20}{exposure_time * 1000:>12.1f}{shapely_time / exposure_time:>9.0f}x')
+    print(f'{"numpy intervals":<20}{interval_time * 1000:>12.1f}{shapely_time / interval_time:>9.0f}x')
+    print(f'largest difference from shapely: {difference:.2e}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
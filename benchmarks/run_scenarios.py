@@ -0,0 +1,185 @@
+"""Runs the planner over every bundled scenario without the Dash app, and compares result files
+
+Every scenario is loaded like the app loads it and planned several times. The results hold, per scenario, the wall
+time (min / median / p95), the graph's node and edge counts, the path length and the path's radar exposure.
+
+Run from the repository root:
+    python -m benchmarks.run_scenarios run --repeats 5 --output results.json
+    python -m benchmarks.run_scenarios run --output results.csv
+    python -m benchmarks.run_scenarios compare baseline.json results.json
+
+`compare` lists the regressions of the second file against the first, and exits with status 1 if there are any.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import networkx as nx
+import numpy as np
+
+from algorithmics.navigator import calculate_path
+from algorithmics.utils.create_graph import get_edge_exposures
+from algorithmics.utils.scenario_loader import SCENARIOS_DIR, list_scenario_paths, load_scenario
+
+FIELDS = ['scenario', 'time_min', 'time_median', 'time_p95', 'nodes', 'edges', 'path_length', 'exposure', 'error']
+
+# Default slack before a slower median time counts as a regression, relative and absolute (seconds)
+TIME_TOLERANCE = 0.2
+TIME_ABSOLUTE_TOLERANCE = 0.005
+# Slack on path lengths and exposures, absorbs rounding
+LENGTH_TOLERANCE = 1e-6
+
+
+def run_scenario(scenario_path: Path, repeats: int) -> Dict[str, object]:
+    """Plans a scenario several times
+
+    :param scenario_path: path to the scenario's JSON
+    :param repeats: amount of runs to time
+    :return: result row, see `FIELDS`
+    """
+    row = {'scenario': scenario_path.stem, 'error': ''}
+    times = []
+    for _ in range(repeats):
+        source, targets, allowed_detection, enemies = load_scenario(scenario_path)
+        try:
+            start_time = time.perf_counter()
+            # Many bundled scenarios have targets inside radar coverage, their exposure is recorded instead
+            path, graph = calculate_path(source, targets, enemies, allowed_detection, as_networkx=False,
+                                         relax_detection=True)
+            times.append(time.perf_counter() - start_time)
+        except nx.NetworkXNoPath as e:
+            row['error'] = str(e)
+            return row
+
+    waypoints = np.array([(c.x, c.y) for c in path], dtype=float)
+    path_length = np.linalg.norm(np.diff(waypoints, axis=0), axis=1).sum()
+    exposures = get_edge_exposures(waypoints[:-1], waypoints[1:], enemies)
+    row.update(time_min=float(np.min(times)), time_median=float(np.median(times)),
+               time_p95=float(np.percentile(times, 95)), nodes=graph.number_of_nodes(),
+               edges=graph.number_of_edges(), path_length=float(path_length),
+               exposure=0.0 if exposures is None else float(exposures.sum()))
+    return row
+
+
+def run(scenarios_dir: Path = SCENARIOS_DIR, repeats: int = 5, only: Optional[List[str]] = None) \
+        -> List[Dict[str, object]]:
+    """Plans every scenario of the directory
+
+    :param scenarios_dir: directory holding a sub directory per scenario group
+    :param repeats: amount of timed runs per scenario
+    :param only: names of the scenarios to run (e.g. `scenario_5`), all of them when None
+    :return: one result row per scenario
+    """
+    rows = []
+    for scenario_path in list_scenario_paths(scenarios_dir):
+        if only and scenario_path.stem not in only:
+            continue
+        row = run_scenario(scenario_path, repeats)
+        rows.append(row)
+        print(_format_row(row), file=sys.stderr)
+    return rows
+
+
+def _format_row(row: Dict[str, object]) -> str:
+    if row['error']:
+        return f'{row["scenario"]:<14}{row["error"]}'
+    return f'{row["scenario"]:<14}median {row["time_median"]:.4f}s  {row["nodes"]} nodes  {row["edges"]} edges  ' \
+           f'length {row["path_length"]:.4f}  exposure {row["exposure"]:.4f}'
+
+
+def save_results(rows: List[Dict[str, object]], output: Path):
+    """Writes result rows as CSV when the file name ends with `.csv`, as JSON otherwise"""
+    if output.suffix == '.csv':
+        with open(output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(output, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, object]]:
+    """Reads a result file written by `save_results`
+
+    :return: result rows by scenario name
+    """
+    if path.suffix == '.csv':
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            for field in FIELDS[1:-1]:
+                row[field] = float(row[field]) if row[field] != '' else None
+    else:
+        with open(path) as f:
+            rows = json.load(f)
+    return {row['scenario']: row for row in rows}
+
+
+def compare(baseline: Dict[str, Dict[str, object]], results: Dict[str, Dict[str, object]],
+            time_tolerance: float = TIME_TOLERANCE) -> List[str]:
+    """Finds the regressions of new results against a baseline
+
+    A scenario regresses when it fails while it used to succeed, when its path gets longer or more exposed, or when
+    its median time grows by more than `time_tolerance` (relative) and `TIME_ABSOLUTE_TOLERANCE`. Scenarios missing
+    from either side are skipped.
+
+    :param baseline: result rows by scenario name
+    :param results: new result rows by scenario name
+    :param time_tolerance: allowed relative growth of the median time
+    :return: description of every regression
+    """
+    regressions = []
+    for scenario, old in baseline.items():
+        new = results.get(scenario)
+        if new is None:
+            continue
+        if new['error'] or old['error']:
+            if new['error'] and not old['error']:
+                regressions.append(f'{scenario}: failed ({new["error"]})')
+            continue
+
+        for field in ('path_length', 'exposure'):
+            if new[field] > old[field] + LENGTH_TOLERANCE:
+                regressions.append(f'{scenario}: {field} {old[field]:.6f} -> {new[field]:.6f}')
+        if new['time_median'] > old['time_median'] * (1 + time_tolerance) and \
+                new['time_median'] - old['time_median'] > TIME_ABSOLUTE_TOLERANCE:
+            regressions.append(f'{scenario}: median time {old["time_median"]:.4f}s -> {new["time_median"]:.4f}s')
+    return regressions
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='plan every scenario and save the results')
+    run_parser.add_argument('--repeats', type=int, default=5, help='timed runs per scenario')
+    run_parser.add_argument('--output', type=Path, default=Path('results.json'), help='.json or .csv result file')
+    run_parser.add_argument('--scenarios-dir', type=Path, default=SCENARIOS_DIR)
+    run_parser.add_argument('--only', nargs='*', help='names of the scenarios to run, e.g. scenario_5')
+
+    compare_parser = commands.add_parser('compare', help='flag the regressions of a result file against another')
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('results', type=Path)
+    compare_parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE,
+                                help='allowed relative growth of the median time')
+
+    args = parser.parse_args(arguments)
+    if args.command == 'run':
+        save_results(run(args.scenarios_dir, args.repeats, args.only), args.output)
+        return 0
+
+    baseline, results = load_results(args.baseline), load_results(args.results)
+    regressions = compare(baseline, results, args.time_tolerance)
+    for regression in regressions:
+        print(regression)
+    print(f'{len(regressions)} regressions over {len(baseline.keys() & results.keys())} scenarios')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Measures how planning time and memory grow with the amount of obstacles, over generated scenarios
+
+Scenarios of growing size are generated with `scenario_generator` (same seed and options), written to JSON and loaded
+back like the bundled ones, then planned. Peak memory is measured with tracemalloc in a separate run, as tracing
+slows planning down. The growth exponent is fitted over the largest sizes, where fixed costs no longer dominate.
+
+Run from the repository root:
+    python -m benchmarks.scaling --sizes 25 50 100 200 400 --output scaling.csv --plot scaling.html
+    python -m benchmarks.scaling --radars 5 --max-exponent 2.5
+
+With `--max-exponent`, the exit status is 1 if time or memory grow faster than that power of the obstacle count.
+`--plot` writes a log-log plotly chart, and needs plotly.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+import networkx as nx
+import numpy as np
+
+from algorithmics.navigator import calculate_path
+from algorithmics.utils.scenario_generator import generate_scenario, write_scenario
+from algorithmics.utils.scenario_loader import load_scenario
+
+FIELDS = ['obstacles', 'nodes', 'edges', 'time_median', 'peak_memory_mb', 'error']
+
+
+def _plan(scenario_path: Path):
+    source, targets, allowed_detection, enemies = load_scenario(scenario_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Targets may be generated inside radar coverage
+        return calculate_path(source, targets, enemies, allowed_detection, as_networkx=False, relax_detection=True)
+
+
+def measure(obstacles: int, repeats: int, directory: Path, **options) -> Dict[str, object]:
+    """Generates a scenario and plans it
+
+    :param obstacles: amount of obstacles in the scenario
+    :param repeats: amount of runs to time
+    :param directory: where the scenario's JSON is written
+    :param options: options of `generate_scenario`
+    :return: result row, see `FIELDS`
+    """
+    scenario_path = directory / f'scenario_{obstacles}.json'
+    write_scenario(generate_scenario(obstacles, **options), scenario_path)
+    row = {'obstacles': obstacles, 'error': ''}
+    times = []
+    try:
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            _, graph = _plan(scenario_path)
+            times.append(time.perf_counter() - start_time)
+        tracemalloc.start()
+        try:
+            _plan(scenario_path)
+            row['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    except nx.NetworkXNoPath as e:
+        row['error'] = str(e)
+        return row
+    row.update(nodes=graph.number_of_nodes(), edges=graph.number_of_edges(), time_median=float(np.median(times)))
+    return row
+
+
+def growth_exponent(sizes: List[float], values: List[float]) -> float:
+    """Fits values ~ sizes ** exponent, by least squares over the logarithms"""
+    return float(np.polyfit(np.log(sizes), np.log(values), 1)[0])
+
+
+def plot(rows: List[Dict[str, object]], path: str):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    rows = [row for row in rows if not row['error']]
+    obstacles = [row['obstacles'] for row in rows]
+    figure = make_subplots(rows=1, cols=2, subplot_titles=['Planning time [s]', 'Peak memory [MB]'])
+    figure.add_trace(go.Scatter(x=obstacles, y=[row['time_median'] for row in rows], mode='lines+markers'), 1, 1)
+    figure.add_trace(go.Scatter(x=obstacles, y=[row['peak_memory_mb'] for row in rows], mode='lines+markers'), 1, 2)
+    figure.update_xaxes(type='log', title_text='obstacles')
+    figure.update_yaxes(type='log')
+    figure.update_layout(showlegend=False)
+    figure.write_html(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[25, 50, 100, 200],
+                        help='obstacle counts of the generated scenarios')
+    parser.add_argument('--repeats', type=int, default=3, help='timed runs per scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--vertices', type=int, default=6, help='vertices of every asteroid zone')
+    parser.add_argument('--density', type=float, default=0.15, help='share of the map covered by obstacles')
+    parser.add_argument('--radars', type=int, default=0)
+    parser.add_argument('--targets', type=int, default=1)
+    parser.add_argument('--fit-points', type=int, default=3, help='largest sizes the growth exponent is fitted over')
+    parser.add_argument('--max-exponent', type=float, help='growth exponent above which the run fails')
+    parser.add_argument('--output', help='CSV file to write the results to')
+    parser.add_argument('--plot', help='HTML file to write a log-log chart to')
+    args = parser.parse_args()
+
+    rows = []
+    print(f'{"obstacles":>10}{"nodes":>8}{"edges":>10}{"time [s]":>10}{"memory [MB]":>13}')
+    with tempfile.TemporaryDirectory() as directory:
+        for obstacles in sorted(args.sizes):
+            row = measure(obstacles, args.repeats, Path(directory), seed=args.seed, vertices=args.vertices,
+                          density=args.density, radars=args.radars, targets=args.targets)
+            rows.append(row)
+            if row['error']:
+                print(f'{obstacles:>10}  {row["error"]}')
+            else:
+                print(f'{obstacles:>10}{row["nodes"]:>8}{row["edges"]:>10}{row["time_median"]:>10.3f}'
+                      f'{row["peak_memory_mb"]:>13.1f}')
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.plot:
+        plot(rows, args.plot)
+
+    fitted = [row for row in rows if not row['error']][-args.fit_points:]
+    if len(fitted) < 2:
+        return
+    too_fast = False
+    for field, name in (('time_median', 'time'), ('peak_memory_mb', 'memory')):
+        exponent = growth_exponent([row['obstacles'] for row in fitted], [row[field] for row in fitted])
+        too_fast |= args.max_exponent is not None and exponent > args.max_exponent
+        print(f'{name} grows as obstacles^{exponent:.2f} over {fitted[0]["obstacles"]}-{fitted[-1]["obstacles"]}')
+    if too_fast:
+        print(f'Growth exceeds obstacles^{args.max_exponent}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
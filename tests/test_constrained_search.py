@@ -0,0 +1,86 @@
+"""Checks the radar constrained search against trying every path of small graphs"""
+import random
+from typing import List, Tuple
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithmics.utils.constrained_search import EXPOSURE_TOLERANCE, radar_constrained_path
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.csr_graph import CSRGraph
+
+
+def _random_graph(seed: int, nodes: int = 9, edge_probability: float = 0.4) -> CSRGraph:
+    rng = random.Random(seed)
+    coordinates = [Coordinate(rng.uniform(0, 10), rng.uniform(0, 10)) for _ in range(nodes)]
+    first, second = [], []
+    for start in range(nodes):
+        for end in range(start + 1, nodes):
+            if rng.random() < edge_probability or end == start + 1:
+                first.append(start)
+                second.append(end)
+    weights = np.array([coordinates[u].distance_to(coordinates[v]) for u, v in zip(first, second)])
+    # Some edges stay undetected, the others are detected along part of their length
+    exposures = weights * np.array([rng.choice([0, rng.uniform(0.1, 1)]) for _ in weights])
+    return CSRGraph(coordinates, np.array(first), np.array(second), weights, exposures)
+
+
+def _path_costs(graph: CSRGraph, path: List[int]) -> Tuple[float, float]:
+    length = exposure = 0.0
+    for start, end in zip(path, path[1:]):
+        position = graph.edge_position(start, end)
+        length += graph.weights[position]
+        exposure += graph.exposures[position]
+    return length, exposure
+
+
+def _all_path_costs(graph: CSRGraph, source: int, target: int) -> List[Tuple[float, float]]:
+    networkx_graph = nx.Graph()
+    first, second, _ = graph.edge_arrays()
+    networkx_graph.add_edges_from(zip(first.tolist(), second.tolist()))
+    return [_path_costs(graph, path) for path in nx.all_simple_paths(networkx_graph, source, target)]
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_matches_brute_force(seed):
+    graph = _random_graph(seed)
+    source, target = 0, len(graph.nodes) - 1
+    costs = _all_path_costs(graph, source, target)
+    least_exposure = min(exposure for _, exposure in costs)
+
+    for allowed_detection in sorted({exposure for _, exposure in costs}):
+        path = radar_constrained_path(graph, source, target, allowed_detection)
+
+        length, exposure = _path_costs(graph, path)
+        assert path[0] == source and path[-1] == target
+        assert exposure <= allowed_detection + EXPOSURE_TOLERANCE
+        assert length == pytest.approx(min(length for length, exposure in costs
+                                           if exposure <= allowed_detection + EXPOSURE_TOLERANCE))
+
+    if least_exposure > 0:
+        with pytest.raises(nx.NetworkXNoPath):
+            radar_constrained_path(graph, source, target, least_exposure / 2)
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_relaxed_detection_returns_shortest_least_detected_path(seed):
+    graph = _random_graph(seed)
+    source, target = 0, len(graph.nodes) - 1
+    costs = _all_path_costs(graph, source, target)
+    least_exposure = min(exposure for _, exposure in costs)
+
+    path = radar_constrained_path(graph, source, target, least_exposure / 2, relax_detection=True)
+
+    length, exposure = _path_costs(graph, path)
+    assert exposure == pytest.approx(least_exposure)
+    assert length == pytest.approx(min(length for length, exposure in costs
+                                       if exposure <= least_exposure + EXPOSURE_TOLERANCE))
+
+
+def test_unreachable_target():
+    nodes = [Coordinate(0, 0), Coordinate(1, 0), Coordinate(5, 5)]
+    graph = CSRGraph(nodes, np.array([0]), np.array([1]), np.array([1.0]), np.array([0.0]))
+
+    with pytest.raises(nx.NetworkXNoPath):
+        radar_constrained_path(graph, 0, 2, 10, relax_detection=True)
@@ -0,0 +1,27 @@
+"""Checks coordinate equality and hashing on the tolerance grid"""
+import math
+
+import pytest
+
+from algorithmics.utils.coordinate import TOLERANCE, Coordinate
+
+
+def test_same_grid_cell_is_equal():
+    first, second = Coordinate(1.0, 2.0), Coordinate(1.0 + TOLERANCE / 4, 2.0 - TOLERANCE / 4)
+
+    assert first == second
+    assert hash(first) == hash(second)
+    assert Coordinate(1.0, 2.0) != Coordinate(1.0 + 3 * TOLERANCE, 2.0)
+
+
+@pytest.mark.parametrize('value', [math.nan, math.inf, -math.inf, 1e308])
+def test_non_finite_values(value):
+    coordinate = Coordinate(value, 0)
+
+    assert coordinate != Coordinate(1, 0)
+    assert Coordinate(1, 0) != coordinate
+    assert coordinate != Coordinate(value, 1)
+    assert isinstance(hash(coordinate), int)
+    if not math.isnan(value):
+        assert coordinate == Coordinate(value, 0)
+        assert hash(coordinate) == hash(Coordinate(value, 0))
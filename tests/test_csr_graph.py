@@ -0,0 +1,59 @@
+"""Checks the searches of the compact graph against networkx"""
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.csr_graph import CSRGraph
+
+
+def _random_graph(seed: int, nodes: int = 40, edge_probability: float = 0.15) -> nx.Graph:
+    rng = random.Random(seed)
+    graph = nx.Graph()
+    graph.add_nodes_from(Coordinate(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(nodes))
+    for start in graph.nodes:
+        for end in graph.nodes:
+            if start != end and rng.random() < edge_probability:
+                # Edges may be longer than the straight line, like detours, keeping the heuristic admissible
+                graph.add_edge(start, end, dist=start.distance_to(end) * rng.uniform(1, 2))
+    return graph
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_a_star_matches_networkx(seed):
+    graph = _random_graph(seed)
+    csr_graph = CSRGraph.from_networkx(graph)
+    source = csr_graph.nodes[0]
+
+    expected = nx.single_source_dijkstra_path_length(graph, source, weight='dist')
+    for target in csr_graph.nodes[1:]:
+        if target not in expected:
+            with pytest.raises(nx.NetworkXNoPath):
+                csr_graph.shortest_path(source, target)
+            continue
+        path = csr_graph.shortest_path(source, target)
+        assert path[0] == source and path[-1] == target
+        assert sum(graph[start][end]['dist'] for start, end in zip(path, path[1:])) == pytest.approx(expected[target])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_dijkstra_matches_networkx(seed):
+    graph = _random_graph(seed)
+    csr_graph = CSRGraph.from_networkx(graph)
+
+    distances, _ = csr_graph.shortest_paths_from(0)
+
+    expected = nx.single_source_dijkstra_path_length(graph, csr_graph.nodes[0], weight='dist')
+    np.testing.assert_allclose(distances, [expected.get(node, np.inf) for node in csr_graph.nodes])
+
+
+def test_disconnected_target():
+    graph = nx.Graph()
+    graph.add_edge(Coordinate(0, 0), Coordinate(1, 0), dist=1.0)
+    graph.add_node(Coordinate(5, 5))
+    csr_graph = CSRGraph.from_networkx(graph)
+
+    with pytest.raises(nx.NetworkXNoPath):
+        csr_graph.shortest_path(Coordinate(0, 0), Coordinate(5, 5))
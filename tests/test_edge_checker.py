@@ -0,0 +1,80 @@
+"""Checks the batch edge checker against the per-edge shapely checks"""
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from algorithmics import create_legal_edges, edge_checker
+from algorithmics.enemy.asteroids_zone import AsteroidsZone
+from algorithmics.enemy.black_hole import BlackHole
+from algorithmics.enemy.radar import Radar
+from algorithmics.utils import create_graph
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.obstacle_index import ObstacleIndex
+from algorithmics.utils.scenario_loader import list_scenario_paths, load_scenario
+
+
+@pytest.fixture
+def enemies():
+    square = AsteroidsZone([Coordinate(0, 0), Coordinate(4, 0), Coordinate(4, 4), Coordinate(0, 4)])
+    # Concave, so some edges between its vertices cross the outside of the zone
+    notch = AsteroidsZone([Coordinate(8, 0), Coordinate(12, 0), Coordinate(12, 4), Coordinate(10, 1),
+                           Coordinate(8, 4)])
+    return [square, notch, BlackHole(Coordinate(6, 8), 1.5), Radar(Coordinate(0, 10), 3)]
+
+
+def _pairs(nodes):
+    first, second = np.array(list(combinations(range(len(nodes)), 2))).T
+    coordinates = np.array([(c.x, c.y) for c in nodes], dtype=float)
+    return first, second, coordinates[first], coordinates[second]
+
+
+def test_matches_is_legal_edge(enemies):
+    nodes, _ = create_graph.get_graph_nodes(Coordinate(-2, 2), [Coordinate(14, 6), Coordinate(6, 5)], enemies)
+    nodes += [Coordinate(2, 2), Coordinate(10, 0), Coordinate(4, 2), Coordinate(6, 8)]
+    first, second, starts, ends = _pairs(nodes)
+
+    legal, lengths = edge_checker.check_edges_batch(starts, ends, enemies)
+
+    expected = [edge_checker.is_legal_edge(nodes[u], nodes[v], enemies) for u, v in zip(first, second)]
+    assert legal.tolist() == expected
+    assert 0 < np.count_nonzero(legal) < len(legal)
+    np.testing.assert_allclose(lengths, [nodes[u].distance_to(nodes[v]) for u, v in zip(first, second)])
+
+
+def test_edge_through_zone_touching_another_vertex(enemies):
+    # Leaves the notch from a vertex through its interior, then touches the vertex at (12, 4)
+    start, end = Coordinate(8, 0), Coordinate(14, 6)
+    legal, _ = edge_checker.check_edges_batch(np.array([[start.x, start.y]]), np.array([[end.x, end.y]]), enemies)
+
+    assert not legal[0]
+    assert not edge_checker.is_legal_edge(start, end, enemies)
+
+
+def test_small_batches_match_large_ones(enemies):
+    nodes, _ = create_graph.get_graph_nodes(Coordinate(-2, 2), [Coordinate(14, 6)], enemies)
+    _, _, starts, ends = _pairs(nodes)
+    index = ObstacleIndex(enemies)
+
+    legal, _ = edge_checker.check_edges_batch(starts, ends, enemies, index)
+    assert len(starts) > edge_checker.SMALL_BATCH
+
+    for batch in range(0, len(starts), 7):
+        small_legal, _ = edge_checker.check_edges_batch(starts[batch:batch + 7], ends[batch:batch + 7], enemies, index)
+        assert small_legal.tolist() == legal[batch:batch + 7].tolist()
+
+
+@pytest.mark.parametrize('scenario_path', list_scenario_paths()[:6], ids=lambda path: path.stem)
+def test_matches_is_legal_edge_on_scenarios(scenario_path):
+    source, targets, _, enemies = load_scenario(scenario_path)
+    nodes, provenance = create_graph.get_graph_nodes(source, targets, enemies)
+    first, second, starts, ends = _pairs(nodes)
+    index = ObstacleIndex(enemies)
+    tables = create_legal_edges.get_vertex_tables(nodes, enemies, provenance)
+    zone_vertices = {zone: (table[first], table[second]) for zone, table in tables.items()}
+
+    legal, _ = edge_checker.check_edges_batch(starts, ends, enemies, index, zone_vertices)
+
+    expected = [edge_checker.is_legal_edge(nodes[u], nodes[v], enemies, index, provenance)
+                for u, v in zip(first, second)]
+    assert legal.tolist() == expected
@@ -0,0 +1,62 @@
+"""Checks the radar exposure of segments against analytic chord lengths"""
+import math
+
+import numpy as np
+import pytest
+
+from algorithmics.utils import geometry
+
+
+def _exposure(start, end, centers, radii):
+    return geometry.segments_circles_exposure(np.array([start], dtype=float), np.array([end], dtype=float),
+                                              np.array(centers, dtype=float).reshape(-1, 2),
+                                              np.array(radii, dtype=float))[0]
+
+
+@pytest.mark.parametrize('offset', [0, 0.5, 1.2, 2.9, 3, 4])
+def test_chord_through_circle(offset):
+    # Horizontal segment crossing a circle of radius 3 at the given distance from its center
+    exposure = _exposure((-10, offset), (10, offset), [(0, 0)], [3])
+
+    assert exposure == pytest.approx(2 * math.sqrt(max(9 - offset ** 2, 0)), abs=1e-12)
+
+
+def test_segment_ending_inside():
+    assert _exposure((-10, 0), (0, 0), [(0, 0)], [3]) == pytest.approx(3)
+    # Oblique, leaving from the center
+    assert _exposure((1, 1), (21, 16), [(1, 1)], [2.5]) == pytest.approx(2.5)
+
+
+def test_segment_inside():
+    assert _exposure((-1, 1), (1, -1), [(0, 0)], [3]) == pytest.approx(2 * math.sqrt(2))
+
+
+def test_overlapping_circles_counted_once():
+    # Chords [-3, 3] and [1, 7] along the x axis, their union is [-3, 7]
+    assert _exposure((-10, 0), (10, 0), [(0, 0), (4, 0)], [3, 3]) == pytest.approx(10)
+    # Nested circles
+    assert _exposure((-10, 0), (10, 0), [(0, 0), (0.5, 0)], [3, 1]) == pytest.approx(6)
+
+
+def test_disjoint_circles_add_up():
+    offset = 1.5
+    expected = 2 * math.sqrt(4 - offset ** 2) + 2 * math.sqrt(1 - offset ** 2 / 4)
+    assert _exposure((-10, offset), (10, offset), [(-5, 0), (5, offset / 2)], [2, 1]) == pytest.approx(expected)
+
+
+def test_many_segments():
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(-10, 10, (50, 2))
+    ends = rng.uniform(-10, 10, (50, 2))
+    center, radius = np.array([1.0, -2.0]), 4.0
+
+    exposures = geometry.segments_circles_exposure(starts, ends, center[None, :], np.array([radius]))
+
+    # Chord of the infinite line, clipped to the segment
+    direction = ends - starts
+    length = np.hypot(direction[:, 0], direction[:, 1])
+    unit = direction / length[:, None]
+    along = np.einsum('ij,ij->i', center - starts, unit)
+    half_chord = np.sqrt(np.maximum(radius ** 2 - (np.sum((center - starts) ** 2, axis=1) - along ** 2), 0))
+    expected = np.maximum(np.minimum(along + half_chord, length) - np.maximum(along - half_chord, 0), 0)
+    np.testing.assert_allclose(exposures, expected, atol=1e-9)
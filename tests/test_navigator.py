@@ -0,0 +1,61 @@
+"""Checks the order multi-target tours visit their targets in, with radars"""
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithmics.enemy.radar import Radar
+from algorithmics.navigator import calculate_path, plan_tour
+from algorithmics.utils.coordinate import Coordinate
+from algorithmics.utils.csr_graph import CSRGraph
+
+
+@pytest.fixture
+def graph():
+    # Target A is inside a radar between the source S and target B, P goes around the radar
+    nodes = [Coordinate(0, 0), Coordinate(10, 0), Coordinate(20, 0), Coordinate(10, 10)]
+    source, target_a, target_b, detour = range(len(nodes))
+    edges = [(source, target_a, 2.0), (target_a, target_b, 2.0), (source, detour, 0.0), (detour, target_b, 0.0)]
+    first, second, exposures = (np.array(values) for values in zip(*edges))
+    weights = np.array([nodes[u].distance_to(nodes[v]) for u, v in zip(first, second)])
+    return CSRGraph(nodes, first, second, weights, exposures)
+
+
+def _exposure(graph, path):
+    indices = [graph.node_index(waypoint) for waypoint in path]
+    return graph.path_exposure(indices)
+
+
+def test_tour_reorders_targets_to_fit_the_allowed_detection(graph):
+    source, target_a, target_b = graph.nodes[:3]
+
+    # S -> A -> B is shorter but enters and leaves the radar, S -> B -> A only enters it
+    path = plan_tour(graph, source, [target_a, target_b], allowed_detection=3)
+
+    assert path == [source, graph.nodes[3], target_b, target_a]
+    assert _exposure(graph, path) == pytest.approx(2)
+
+
+def test_tour_keeps_the_shortest_order_when_it_fits(graph):
+    source, target_a, target_b = graph.nodes[:3]
+
+    assert plan_tour(graph, source, [target_a, target_b], allowed_detection=4) == [source, target_a, target_b]
+
+
+def test_tour_raises_only_when_no_order_fits(graph):
+    source, target_a, target_b = graph.nodes[:3]
+
+    with pytest.raises(nx.NetworkXNoPath):
+        plan_tour(graph, source, [target_a, target_b], allowed_detection=1)
+    # Relaxed, the shortest order is kept with its legs detected as little as possible
+    path = plan_tour(graph, source, [target_a, target_b], allowed_detection=1, relax_detection=True)
+    assert path == [source, target_a, target_b]
+
+
+def test_calculate_path_with_a_target_inside_a_radar():
+    source, target_a, target_b = Coordinate(0, 0), Coordinate(10, 0), Coordinate(20, 0)
+    enemies = [Radar(Coordinate(10, 0), 2)]
+
+    path, _ = calculate_path(source, [target_a, target_b], enemies, allowed_detection=3, as_networkx=False)
+
+    assert path[0] == source and path[-1] == target_a
+    assert target_b in path